@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file batch.py
+#
+# @brief Reconnaissance d'empreintes digitales en lot, sans interface graphique.
+#
+# EXPLICATION :
+#   -- Les empreintes à traiter sont données par des dossiers, des images ou des fichiers manifestes (un chemin d'image par ligne, relatif au manifeste).
+#   -- Elles sont reconnues par un moteur (project.RecognitionEngine) qui garde la BDD en mémoire : le démarrage n'est payé qu'une fois pour tout le lot.
+#   -- Un résultat JSON est écrit par ligne dès qu'il est disponible, puis un résumé (débit et latences p50/p95/p99 des empreintes reconnues sans erreur, nombre d'erreurs).
+#   -- Avec --workers, les empreintes sont réparties sur plusieurs processus possédant chacun leur moteur.
+#   -- Avec --matcher descriptors, les empreintes sont comparées par descripteurs de minuties (descriptors.py) au lieu du template matching.
+#
+# @section Description
+# Programme en ligne de commande réalisé avec argparse
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - sys standard library (https://docs.python.org/3/library/sys.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+# - concurrent.futures standard library (https://docs.python.org/3/library/concurrent.futures.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import argparse, json, os, sys, time
+import concurrent.futures
+
+# Import des autres fichiers
+import project, tracing
+
+def list_probes(inputs):
+    """! Liste des empreintes à traiter
+
+    Fonction pour obtenir les chemins des images à partir de dossiers, d'images ou de manifestes.
+
+    @param inputs: Dossiers, images ou manifestes (.txt, .lst)
+    @type inputs: Tableau de String
+
+    @return: Chemins des images
+    @rtype: Tableau de String
+
+    """
+
+    probes = []
+
+    for path in inputs:
+        if os.path.isdir(path):
+            # Images du dossier
+            probes += [os.path.join(path, f) for f in sorted(os.listdir(path)) if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS]
+        elif os.path.splitext(path)[1].lower() in MANIFEST_EXTENSIONS:
+            # Chemins du manifeste (les lignes vides et les commentaires sont ignorés)
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        probes.append(os.path.join(os.path.dirname(path), line))
+        else:
+            probes.append(path)
+
+    return probes
+
+def identify_probe(engine, probe, args):
+    """! Reconnaissance d'une empreinte du lot
+
+    @param engine: Moteur de reconnaissance
+    @type engine: project.RecognitionEngine
+
+    @param probe: Chemin de l'image à traiter
+    @type probe: String
+
+    @param args: Paramètres de la reconnaissance (binarization, skeletonization, minutiae, search_radius, max_matches, prefilter, binning, segment, matcher)
+    @type args: Dictionnaire
+
+    @return: Résultat sérialisable en JSON
+    @rtype: Dictionnaire
+
+    """
+
+    start = time.perf_counter()
+
+    if not os.path.isfile(probe):
+        return {"probe": probe, "error": "Fichier introuvable.", "latency": 0.0}
+
+    try:
+        if args["matcher"] == "descriptors":
+            result = engine.identify_descriptors([probe], args["binarization"], max_matches=args["max_matches"])[0]
+        else:
+            result = engine.identify(probe, args["binarization"], args["skeletonization"], args["minutiae"], args["search_radius"], None, args["max_matches"], args["prefilter"], args["binning"], args["segment"])
+    except Exception as e:
+        return {"probe": probe, "error": str(e), "latency": time.perf_counter() - start}
+
+    return {
+        "probe": probe,
+        "persons": result.persons(),
+        "scores": result.scores,
+        "minutiae_number": result.minutiae_number,
+        "bifurcation_number": result.bifurcation_number,
+        "pruned_entries": result.pruned_entries,
+        "pattern_class": result.pattern_class,
+        "bounding_box": result.bounding_box,
+        "timings": {
+            "binarize": result.binarized_time,
+            "skeletonize": result.skeleton_time,
+            "minutiae": result.minutiae_time,
+            "detection": result.detection_time,
+        },
+        "latency": time.perf_counter() - start,
+    }
+
+def load_engine(args):
+    """! Création d'un moteur et chargement de la BDD
+
+    @param args: Paramètres de la reconnaissance
+    @type args: Dictionnaire
+
+    @return: Moteur de reconnaissance
+    @rtype: project.RecognitionEngine
+
+    """
+
+    engine = project.RecognitionEngine(args["db"], key_file=args["key"])
+    if args["matcher"] == "descriptors":
+        engine.gallery(args["binarization"])
+    else:
+        engine.database(args["binarization"], args["skeletonization"])
+
+    return engine
+
+def init_worker(args):
+    """! Initialisation d'un processus du lot
+
+    Fonction appelée une seule fois par processus pour créer son moteur de reconnaissance et charger la BDD.
+
+    @param args: Paramètres de la reconnaissance
+    @type args: Dictionnaire
+
+    """
+
+    global worker_engine, worker_args
+    worker_engine = load_engine(args)
+    worker_args = args
+
+def worker_identify(probe):
+    """! Reconnaissance d'une empreinte dans un processus du lot
+
+    @param probe: Chemin de l'image à traiter
+    @type probe: String
+
+    @return: Résultat sérialisable en JSON
+    @rtype: Dictionnaire
+
+    """
+
+    return identify_probe(worker_engine, probe, worker_args)
+
+def summary(latencies, errors, wall_time, warmup_time):
+    """! Résumé du lot
+
+    @param latencies: Latences de chaque empreinte reconnue sans erreur (en secondes)
+    @type latencies: Tableau de réels
+
+    @param errors: Nombre d'empreintes en erreur
+    @type errors: int
+
+    @param wall_time: Durée totale du lot (en secondes)
+    @type wall_time: float
+
+    @param warmup_time: Durée du chargement de la BDD (en secondes)
+    @type warmup_time: float
+
+    @return: Débit et latences (calculés sur les seules empreintes reconnues sans erreur)
+    @rtype: Dictionnaire
+
+    """
+
+    latencies = np.array(latencies, dtype=float)
+    percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [0.0, 0.0, 0.0]
+
+    return {
+        "probes": len(latencies) + errors,
+        "errors": errors,
+        "wall_time": wall_time,
+        "warmup_time": warmup_time,
+        "throughput": len(latencies) / wall_time if wall_time > 0 else 0.0,
+        "latency": {"p50": float(percentiles[0]), "p95": float(percentiles[1]), "p99": float(percentiles[2]), "mean": float(latencies.mean()) if len(latencies) else 0.0},
+    }
+
+def run(probes, args, output):
+    """! Reconnaissance du lot
+
+    Fonction pour reconnaître toutes les empreintes du lot et écrire les résultats au format JSON lines.
+
+    @param probes: Chemins des images à traiter
+    @type probes: Tableau de String
+
+    @param args: Paramètres de la reconnaissance
+    @type args: Dictionnaire
+
+    @param output: Fichier de sortie
+    @type output: Fichier texte
+
+    @return: Résumé du lot
+    @rtype: Dictionnaire
+
+    """
+
+    # Initialisation de variables
+    latencies = [] # Latence de chaque empreinte reconnue sans erreur
+    errors = 0     # Nombre d'empreintes en erreur
+    start = time.perf_counter()
+
+    if args["workers"] <= 1:
+        # Chargement du moteur puis reconnaissance en série
+        engine = load_engine(args)
+        warmup_time = time.perf_counter() - start
+        results = (identify_probe(engine, probe, args) for probe in probes)
+        executor = None
+    else:
+        # Répartition des empreintes sur plusieurs processus (le chargement est compris dans le premier résultat)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args["workers"], initializer=init_worker, initargs=(args,))
+        results = executor.map(worker_identify, probes)
+        warmup_time = None
+
+    try:
+        # Écriture des résultats au fur et à mesure (dans l'ordre du lot)
+        for result in results:
+            # Les erreurs (fichier introuvable, image illisible, ...) sont comptées à part pour ne pas fausser les latences
+            if "error" in result:
+                errors += 1
+            else:
+                latencies.append(result["latency"])
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    report = summary(latencies, errors, time.perf_counter() - start, warmup_time)
+    output.write(json.dumps({"summary": report}, ensure_ascii=False) + "\n")
+
+    return report
+
+# Initialisation de variables
+IMAGE_EXTENSIONS = (".tif", ".tiff", ".png", ".jpg", ".jpeg", ".bmp") # Extensions des images recherchées dans les dossiers
+MANIFEST_EXTENSIONS = (".txt", ".lst")                                # Extensions des manifestes
+worker_engine = None # Moteur de reconnaissance d'un processus du lot
+worker_args = None   # Paramètres de la reconnaissance d'un processus du lot
+
+# Exécute la reconnaissance en lot
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconnaissance d'empreintes digitales en lot (résultats au format JSON lines).")
+    parser.add_argument("inputs", nargs="+", help="Dossiers, images ou manifestes (un chemin par ligne) des empreintes à traiter")
+    parser.add_argument("--binarization", default="Méthode d'Otsu", choices=["Méthode d'Otsu", "Moyenne adaptative", "Gaussienne adaptative"], help="Méthode de binarisation")
+    parser.add_argument("--skeletonization", default="Filtre Laplacien", choices=["Filtre Laplacien", "Filtre Sobel", "zhang_suen", "guo_hall", "morphology"], help="Méthode de squelettisation")
+    parser.add_argument("--matcher", default="templates", choices=["templates", "descriptors"], help="Comparaison par template matching des minuties ou par descripteurs de minuties")
+    parser.add_argument("--minutiae", type=int, default=12, help="Nombre de minuties à retrouver")
+    parser.add_argument("--search-radius", type=int, default=None, help="Déplacement toléré d'une minutie en pixels (recherche dans une fenêtre, cf. project.compare_entry)")
+    parser.add_argument("--max-matches", type=int, default=None, help="Arrêt de la recherche après ce nombre de personnes reconnues")
+    parser.add_argument("--prefilter", type=int, default=None, help="Nombre d'empreintes de la BDD comparées en détail, choisies d'après les caractéristiques globales des minuties (toutes par défaut)")
+    parser.add_argument("--binning", action="store_true", default=None, help="Comparaison aux seules empreintes de la BDD de classes compatibles avec celle de l'empreinte (classes calculées par classification.py)")
+    parser.add_argument("--segment", action="store_true", default=None, help="Extraction et comparaison des minuties limitées à la zone de l'empreinte (fond et bord de l'empreinte ignorés)")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus")
+    parser.add_argument("--db", default="DB", help="Dossier de la BDD")
+    parser.add_argument("--key", default="key.txt", help="Fichier contenant la clé de cryptage")
+    parser.add_argument("--output", default=None, help="Fichier de sortie (sortie standard par défaut)")
+    parser.add_argument("--metrics", default=None, help="Fichier des durées des étapes et des compteurs (.prom pour Prometheus, JSON sinon, processus principal uniquement)")
+    args = parser.parse_args()
+
+    probes = list_probes(args.inputs)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    try:
+        report = run(probes, vars(args), output)
+    finally:
+        if args.output:
+            output.close()
+        if args.metrics:
+            tracing.export(args.metrics)
+
+    # Résumé lisible sur la sortie d'erreur
+    latency = report["latency"]
+    print(f"{report['probes']} empreintes ({report['errors']} erreurs) en {round(report['wall_time'], 2)} s : "
+          f"{round(report['throughput'], 2)} empreintes/s, p50 = {round(latency['p50'], 4)} s, p95 = {round(latency['p95'], 4)} s, p99 = {round(latency['p99'], 4)} s", file=sys.stderr)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file benchmark.py
+#
+# @brief Mesure des performances de la reconnaissance sur des BDD synthétiques de taille croissante.
+#
+# EXPLICATION :
+#   -- Les empreintes sont générées synthétiquement : un champ d'orientation (noyau + deltas, perturbé aléatoirement) guide le filtrage de Gabor répété d'un bruit, ce qui fait apparaître des crêtes.
+#   -- Les empreintes sont enrôlées comme celles de DB_original (image cryptée dans la BDD, minuties des 3 méthodes de binarisation dans DB.csv et dans le stockage binaire).
+#   -- La BDD est complétée jusqu'à chaque taille demandée (100, 1000 et 10000 par défaut), puis la reconnaissance d'empreintes bruitées et décalées est mesurée.
+#   -- Chaque étape est chronométrée : génération, binarisation, squelettisation, crossing number, cryptage, décryptage, écritures, chargement de la BDD et reconnaissance.
+#   -- Le rapport est écrit au format JSON pour comparer les performances d'une version à l'autre.
+#
+# @section Description
+# Mesures réalisées avec time.perf_counter, empreintes synthétiques générées avec OpenCV
+#
+# @section Libraries/Modules
+# - opencv-python extern library (https://pypi.org/project/opencv-python/)
+# - numpy extern library (https://numpy.org/)
+# - Fernet extern library (https://cryptography.io/en/latest/fernet/)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+# - base64 standard library (https://docs.python.org/3/library/base64.html?highlight=base64#module-base64)
+# - contextlib standard library (https://docs.python.org/3/library/contextlib.html)
+# - csv standard library (https://docs.python.org/3/library/csv.html?highlight=csv#module-csv)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - platform standard library (https://docs.python.org/3/library/platform.html)
+# - shutil standard library (https://docs.python.org/3/library/shutil.html)
+# - tempfile standard library (https://docs.python.org/3/library/tempfile.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import cv2
+import numpy as np
+from cryptography.fernet import Fernet
+import argparse, base64, contextlib, csv, json, os, platform, shutil, tempfile, time
+
+# Import des autres fichiers
+import project, cryptage, cache, minutiae_store
+
+class StageTimer:
+    """! Chronométrage des étapes
+
+    Classe enregistrant la durée de chaque exécution des étapes chronométrées.
+
+    """
+
+    def __init__(self):
+        self.durations = {} # Durées de chaque étape (en secondes)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """! Chronométrage d'une étape
+
+        @param name: Nom de l'étape
+        @type name: String
+
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def report(self):
+        """! Statistiques des étapes
+
+        @return: Nombre d'exécutions, durée totale, moyenne, médiane, 95e centile et maximum de chaque étape
+        @rtype: Dictionnaire
+
+        """
+
+        stats = {}
+        for name, durations in self.durations.items():
+            durations = np.array(durations)
+            stats[name] = {"count": len(durations), "total": float(durations.sum()), "mean": float(durations.mean()),
+                           "p50": float(np.percentile(durations, 50)), "p95": float(np.percentile(durations, 95)), "max": float(durations.max())}
+
+        return stats
+
+def orientation_field(rng, height, width):
+    """! Champ d'orientation d'une empreinte synthétique
+
+    Fonction pour calculer l'orientation des crêtes à partir d'un noyau et de 0 à 2 deltas (modèle de Sherlock et Monro), perturbée par un bruit lisse.
+
+    @param rng: Générateur aléatoire
+    @type rng: np.random.Generator
+
+    @param height: Hauteur de l'image
+    @type height: int
+
+    @param width: Largeur de l'image
+    @type width: int
+
+    @return: Orientation des crêtes en chaque pixel (en radians)
+    @rtype: Tableau de réels
+
+    """
+
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    # Noyau proche du centre de l'empreinte
+    core_x, core_y = width * 0.5 + rng.normal(0, width * 0.05), height * 0.45 + rng.normal(0, height * 0.05)
+    theta = np.arctan2(y - core_y, x - core_x)
+
+    # Deltas sous le noyau
+    for _ in range(rng.integers(0, 3)):
+        delta_x, delta_y = core_x + rng.normal(0, width * 0.25), core_y + height * 0.35 + rng.normal(0, height * 0.05)
+        theta -= np.arctan2(y - delta_y, x - delta_x)
+
+    # Perturbation lisse (bruit basse résolution agrandi)
+    noise = cv2.GaussianBlur(rng.normal(0, 1, (height // 16 + 1, width // 16 + 1)).astype(np.float32), (0, 0), 1)
+
+    return 0.5 * theta + 0.3 * cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+
+def synthetic_print(rng, size=None):
+    """! Génération d'une empreinte synthétique
+
+    Fonction pour générer une empreinte en filtrant plusieurs fois un bruit avec des filtres de Gabor orientés selon le champ d'orientation.
+
+    @param rng: Générateur aléatoire
+    @type rng: np.random.Generator
+
+    @param size: Taille de l'image (IMAGE_SIZE par défaut)
+    @type size: int
+
+    @return: Empreinte en niveau de gris (crêtes sombres sur fond clair)
+    @rtype: Tableau d'image
+
+    """
+
+    # Initialisation de variables
+    size = size or IMAGE_SIZE
+    theta = orientation_field(rng, size, size)
+
+    # Filtre de Gabor le plus proche de l'orientation de chaque pixel
+    orientation = np.mod(np.round(np.mod(theta, np.pi) / np.pi * GABOR_ORIENTATIONS), GABOR_ORIENTATIONS).astype(np.intp)
+    masks = [orientation == k for k in range(GABOR_ORIENTATIONS)]
+
+    # Filtrages successifs d'un bruit : les crêtes apparaissent le long du champ d'orientation
+    image = rng.normal(0, 1, (size, size)).astype(np.float32)
+    for _ in range(GABOR_ITERATIONS):
+        filtered = np.empty_like(image)
+        for kernel, mask in zip(GABOR_KERNELS, masks):
+            if mask.any():
+                filtered[mask] = cv2.filter2D(image, -1, kernel)[mask]
+        image = np.tanh(1.5 * filtered / (filtered.std() + 1e-6))
+
+    # Zone de contact du doigt (ellipse), fond blanc autour
+    y, x = np.mgrid[0:size, 0:size]
+    outside = ((x - size / 2) / (size * 0.42))**2 + ((y - size / 2) / (size * 0.48))**2 > 1
+    fingerprint = (128 + 100 * image).astype(np.uint8)
+    fingerprint[outside] = 255
+
+    return fingerprint
+
+def synthetic_probe(rng, fingerprint):
+    """! Nouvelle acquisition d'une empreinte synthétique
+
+    Fonction pour simuler une nouvelle acquisition d'une empreinte enrôlée (décalage de quelques pixels et bruit).
+
+    @param rng: Générateur aléatoire
+    @type rng: np.random.Generator
+
+    @param fingerprint: Empreinte enrôlée
+    @type fingerprint: Tableau d'image
+
+    @return: Empreinte à reconnaître
+    @rtype: Tableau d'image
+
+    """
+
+    shift = np.float32([[1, 0, rng.integers(-3, 4)], [0, 1, rng.integers(-3, 4)]])
+    probe = cv2.warpAffine(fingerprint, shift, fingerprint.shape[::-1], borderValue=255).astype(np.float32)
+
+    return np.clip(probe + rng.normal(0, 8, probe.shape), 0, 255).astype(np.uint8)
+
+def enroll(timer, key, folder, name, fingerprint):
+    """! Enrôlement d'une empreinte synthétique
+
+    @param timer: Chronométrage des étapes
+    @type timer: StageTimer
+
+    @param key: Clé de chiffrement de la BDD
+    @type key: String
+
+    @param folder: Dossier de la BDD
+    @type folder: String
+
+    @param name: Nom de l'image dans la BDD
+    @type name: String
+
+    @param fingerprint: Empreinte à enrôler
+    @type fingerprint: Tableau d'image
+
+    @return: Minuties de l'empreinte pour chaque méthode de binarisation
+    @rtype: Tableau de Tableau de Tuple
+
+    """
+
+    minutiae = []
+
+    for method in minutiae_store.METHODS:
+        with timer.stage("binarize"):
+            binarized = project.binarize_array(fingerprint, method)
+        with timer.stage("skeletonize"):
+            skeleton = project.skeletonize_image(binarized, SKELETONIZE_METHOD)
+        with timer.stage("crossing_number"):
+            minutiae.append(project.crossing_number(skeleton)[2])
+
+    with timer.stage("encode"):
+        image_data = cv2.imencode(".png", fingerprint)[1].tobytes()
+    with timer.stage("encrypt"):
+        encrypted_image = Fernet(base64.urlsafe_b64decode(key)).encrypt(image_data)
+    with timer.stage("write_image"):
+        with open(os.path.join(folder, name), 'wb') as encrypted_file:
+            encrypted_file.write(encrypted_image)
+
+    return minutiae
+
+def write_db(timer, folder, images, persons, minutiae):
+    """! Écriture des minuties de la BDD
+
+    @param timer: Chronométrage des étapes
+    @type timer: StageTimer
+
+    @param folder: Dossier de la BDD
+    @type folder: String
+
+    @param images: Noms des images
+    @type images: Tableau de String
+
+    @param persons: Personnes associées
+    @type persons: Tableau de String
+
+    @param minutiae: Minuties de chaque image pour chaque méthode
+    @type minutiae: Tableau de Tableau
+
+    """
+
+    with timer.stage("write_csv"):
+        with open(os.path.join(folder, "DB.csv"), 'w', newline='') as file:
+            writing = csv.writer(file, delimiter=';')
+            for image, person, image_minutiae in zip(images, persons, minutiae):
+                writing.writerow([image, person] + [str(m) for m in image_minutiae])
+
+    with timer.stage("write_store"):
+        minutiae_store.write_store(os.path.join(folder, minutiae_store.STORE_FOLDER), images, persons, minutiae)
+
+def run(sizes, workdir, probes=None, size=None, seed=0, search_radius=None, nb_minutiae=None):
+    """! Mesure des performances
+
+    Fonction pour enrôler des empreintes synthétiques jusqu'à chaque taille de BDD et mesurer chaque étape.
+
+    @param sizes: Tailles de la BDD
+    @type sizes: Tableau d'entiers
+
+    @param workdir: Dossier de travail (BDD, clés et cache)
+    @type workdir: String
+
+    @param probes: Nombre d'empreintes à reconnaître pour chaque taille (PROBES par défaut)
+    @type probes: int
+
+    @param size: Taille des images (IMAGE_SIZE par défaut)
+    @type size: int
+
+    @param seed: Graine du générateur aléatoire
+    @type seed: int
+
+    @param search_radius: Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+    @type search_radius: int
+
+    @param nb_minutiae: Nombre de minuties à retrouver (NB_MINUTIAE par défaut)
+    @type nb_minutiae: int
+
+    @return: Rapport des mesures
+    @rtype: Dictionnaire
+
+    """
+
+    # Initialisation de variables
+    probes = probes or PROBES
+    size = size or IMAGE_SIZE
+    search_radius = SEARCH_RADIUS if search_radius is None else search_radius
+    nb_minutiae = nb_minutiae or NB_MINUTIAE
+    rng = np.random.default_rng(seed)
+    folder = os.path.join(workdir, "DB")
+    key_file = os.path.join(workdir, "key.txt")
+    images, persons, minutiae, fingerprints = [], [], [], []
+
+    # BDD, clés et cache dans le dossier de travail
+    os.makedirs(folder, exist_ok=True)
+    cryptage.writeFile(key_file, cryptage.generateKey())
+    key = cryptage.readFile(key_file)
+    cache.CACHE_FOLDER = os.path.join(workdir, "cache")
+    cache.CACHE_KEY_FILE = os.path.join(workdir, "cache_key.txt")
+
+    report = {
+        "config": {"sizes": sorted(sizes), "probes": probes, "image_size": size, "seed": seed, "search_radius": search_radius, "nb_minutiae": nb_minutiae,
+                   "skeletonize_method": SKELETONIZE_METHOD, "pipeline_version": project.PIPELINE_VERSION},
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count(),
+                     "numpy": np.__version__, "opencv": cv2.__version__},
+        "results": [],
+    }
+
+    for target in sorted(sizes):
+        timer = StageTimer()
+        start = time.perf_counter()
+
+        # Enrôlement des empreintes manquantes
+        while len(images) < target:
+            with timer.stage("generate"):
+                fingerprint = synthetic_print(rng, size)
+            name = f"synth_{len(images):06d}.png"
+            minutiae.append(enroll(timer, key, folder, name, fingerprint))
+            images.append(name)
+            persons.append(f"Id{len(images)}")
+            fingerprints.append(fingerprint)
+
+        write_db(timer, folder, images, persons, minutiae)
+        enrollment_time = time.perf_counter() - start
+
+        # Décryptage de toute la BDD
+        for name in images:
+            with timer.stage("decrypt"):
+                cryptage.decryptionBuffer(key, os.path.join(folder, name))
+
+        # Chargement de la BDD sans puis avec le cache des squelettes
+        shutil.rmtree(cache.CACHE_FOLDER, ignore_errors=True)
+        for stage in ("db_load_cold", "db_load_warm"):
+            engine = project.RecognitionEngine(folder, "DB.csv", key_file)
+            with timer.stage(stage):
+                engine.database(minutiae_store.METHODS[0], SKELETONIZE_METHOD)
+
+        # Reconnaissance de nouvelles acquisitions d'empreintes enrôlées
+        hits = 0
+        for i in rng.choice(len(images), min(probes, len(images)), replace=False):
+            probe = synthetic_probe(rng, fingerprints[i])
+            with timer.stage("identify"):
+                result = engine.identify(probe, minutiae_store.METHODS[0], SKELETONIZE_METHOD, nb_minutiae, search_radius)
+            timer.durations.setdefault("matching", []).append(result.detection_time)
+            hits += persons[i] in result.persons()
+        del engine
+
+        report["results"].append({"size": target, "enrollment_time": enrollment_time, "stages": timer.report(),
+                                  "hit_rate": hits / min(probes, len(images))})
+        print(f"{target} empreintes : enrôlement {round(enrollment_time, 2)} s, reconnaissance {round(np.mean(timer.durations['identify']), 4)} s / empreinte")
+
+    return report
+
+# Initialisation de variables
+IMAGE_SIZE = 256                      # Taille des empreintes synthétiques (en pixels)
+GABOR_ORIENTATIONS = 16               # Nombre d'orientations des filtres de Gabor
+GABOR_ITERATIONS = 4                  # Nombre de filtrages successifs du bruit
+GABOR_KERNELS = [k - k.mean() for k in (cv2.getGaborKernel((21, 21), 4.0, i * np.pi / GABOR_ORIENTATIONS + np.pi / 2, 9.0, 1.0, 0, ktype=cv2.CV_32F)
+                                         for i in range(GABOR_ORIENTATIONS))]  # Filtres de Gabor (période des crêtes de 9 pixels, moyenne nulle)
+SKELETONIZE_METHOD = "Filtre Laplacien" # Méthode de squelettisation utilisée pour l'enrôlement et la reconnaissance
+PROBES = 5                            # Nombre d'empreintes reconnues pour chaque taille de BDD
+SEARCH_RADIUS = 10                    # Déplacement toléré d'une minutie en pixels (recherche sur toute l'image trop longue pour une grande BDD)
+NB_MINUTIAE = 12                      # Nombre de minuties à retrouver
+
+# Exécute la mesure des performances
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure des performances de la reconnaissance sur des BDD synthétiques.")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Tailles de la BDD séparées par des virgules")
+    parser.add_argument("--probes", type=int, default=PROBES, help="Nombre d'empreintes reconnues pour chaque taille")
+    parser.add_argument("--image-size", type=int, default=IMAGE_SIZE, help="Taille des empreintes synthétiques (en pixels)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur aléatoire")
+    parser.add_argument("--search-radius", type=int, default=SEARCH_RADIUS, help="Déplacement toléré d'une minutie en pixels")
+    parser.add_argument("--minutiae", type=int, default=NB_MINUTIAE, help="Nombre de minuties à retrouver")
+    parser.add_argument("--workdir", default=None, help="Dossier de travail (dossier temporaire supprimé à la fin par défaut)")
+    parser.add_argument("--output", default="benchmark_report.json", help="Fichier du rapport JSON")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        report = run([int(s) for s in args.sizes.split(",")], workdir, args.probes, args.image_size, args.seed, args.search_radius, args.minutiae)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Rapport écrit dans {args.output}")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file cache.py
+#
+# @brief Cache persistant des squelettes des images de la BDD.
+#
+# EXPLICATION :
+#   -- Les images de la BDD ne changent pas d'une reconnaissance à l'autre, leur prétraitement (binarisation + squelettisation) est donc calculé une seule fois puis conservé.
+#   -- Une entrée du cache est identifiée par (image, méthode de binarisation, méthode de squelettisation, version du prétraitement).
+#   -- L'empreinte SHA-256 de l'image source (décryptée) est stockée dans l'entrée : si l'image change, l'entrée est considérée comme invalide et recalculée.
+#   -- Les entrées sont cryptées avec la méthode de Fernet à l'aide d'une clé propre au cache (indépendante de key.txt qui est renouvelée régulièrement).
+#
+# @section Description
+# Cache des squelettes réalisé avec numpy et la librairie Fernet
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - Fernet extern library (https://cryptography.io/en/latest/fernet/)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - io standard library (https://docs.python.org/3/library/io.html)
+# - hashlib standard library (https://docs.python.org/3/library/hashlib.html)
+# - base64 standard library (https://docs.python.org/3/library/base64.html?highlight=base64#module-base64)
+# - threading standard library (https://docs.python.org/3/library/threading.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+from cryptography.fernet import Fernet, InvalidToken
+import os, io, hashlib, base64, threading
+
+# Import des autres fichiers
+import cryptage
+
+def source_digest(data):
+    """! Empreinte d'une image source
+
+    Fonction pour calculer l'empreinte SHA-256 des données d'une image.
+
+    @param data: Contenu (décrypté) de l'image
+    @type data: bytes
+
+    @return: Empreinte hexadécimale
+    @rtype: String
+
+    """
+
+    return hashlib.sha256(data).hexdigest()
+
+def entry_path(image, binarization_method, skeletonize_method, version, folder=None):
+    """! Chemin d'une entrée du cache
+
+    Fonction pour obtenir le fichier associé à une entrée du cache.
+
+    @param image: Nom de l'image de la BDD
+    @type image: String
+
+    @param binarization_method: Méthode de binarisation
+    @type binarization_method: String
+
+    @param skeletonize_method: Méthode de squelettisation
+    @type skeletonize_method: String
+
+    @param version: Version du prétraitement
+    @type version: int
+
+    @param folder: Dossier du cache (CACHE_FOLDER par défaut)
+    @type folder: String
+
+    @return: Chemin du fichier
+    @rtype: String
+
+    """
+
+    # Nom de fichier indépendant des caractères spéciaux des méthodes (accents, espaces, apostrophes)
+    name = hashlib.sha256(f"{image}|{binarization_method}|{skeletonize_method}|{version}".encode('utf-8')).hexdigest()
+
+    return os.path.join(folder or CACHE_FOLDER, f"{name}.skl")
+
+def read_key(file=None):
+    """! Lecture de la clé du cache
+
+    Fonction pour lire la clé de cryptage du cache, elle est générée lors de la première utilisation.
+
+    @param file: Fichier contenant la clé du cache (CACHE_KEY_FILE par défaut)
+    @type file: String
+
+    @return: Clé de chiffrement
+    @rtype: String
+
+    """
+
+    file = file or CACHE_KEY_FILE
+
+    # Génération de la clé lors de la première utilisation
+    if not os.path.isfile(file):
+        cryptage.writeFile(file, cryptage.generateKey())
+
+    return cryptage.readFile(file)
+
+def load_skeleton(key, image, binarization_method, skeletonize_method, version, digest, folder=None):
+    """! Lecture d'un squelette dans le cache
+
+    Fonction pour récupérer le squelette d'une image de la BDD s'il est présent et toujours valide.
+
+    @param key: Clé de chiffrement du cache
+    @type key: String
+
+    @param image: Nom de l'image de la BDD
+    @type image: String
+
+    @param binarization_method: Méthode de binarisation
+    @type binarization_method: String
+
+    @param skeletonize_method: Méthode de squelettisation
+    @type skeletonize_method: String
+
+    @param version: Version du prétraitement
+    @type version: int
+
+    @param digest: Empreinte de l'image source
+    @type digest: String
+
+    @param folder: Dossier du cache (CACHE_FOLDER par défaut)
+    @type folder: String
+
+    @return: Squelette de l'image ou None si l'entrée est absente ou invalide
+    @rtype: Tableau d'image
+
+    """
+
+    path = entry_path(image, binarization_method, skeletonize_method, version, folder)
+
+    try:
+        # Ouverture de l'entrée cryptée en mode de lecture binaire
+        with open(path, 'rb') as encrypted_file:
+            encrypted_entry = encrypted_file.read()
+
+        # Décryptage de l'entrée
+        entry = Fernet(base64.urlsafe_b64decode(key)).decrypt(encrypted_entry)
+    except (FileNotFoundError, InvalidToken):
+        return None
+
+    # L'image source a changé depuis la création de l'entrée
+    stored_digest, _, data = entry.partition(b"\n")
+    if stored_digest.decode('ascii') != digest:
+        return None
+
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+def save_skeleton(key, image, binarization_method, skeletonize_method, version, digest, skeleton, folder=None):
+    """! Écriture d'un squelette dans le cache
+
+    Fonction pour enregistrer le squelette d'une image de la BDD dans le cache.
+
+    @param key: Clé de chiffrement du cache
+    @type key: String
+
+    @param image: Nom de l'image de la BDD
+    @type image: String
+
+    @param binarization_method: Méthode de binarisation
+    @type binarization_method: String
+
+    @param skeletonize_method: Méthode de squelettisation
+    @type skeletonize_method: String
+
+    @param version: Version du prétraitement
+    @type version: int
+
+    @param digest: Empreinte de l'image source
+    @type digest: String
+
+    @param skeleton: Squelette de l'image
+    @type skeleton: Tableau d'image
+
+    @param folder: Dossier du cache (CACHE_FOLDER par défaut)
+    @type folder: String
+
+    """
+
+    path = entry_path(image, binarization_method, skeletonize_method, version, folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Sérialisation du squelette précédée de l'empreinte de l'image source
+    buffer = io.BytesIO()
+    buffer.write(digest.encode('ascii') + b"\n")
+    np.save(buffer, skeleton, allow_pickle=False)
+
+    # Cryptage de l'entrée
+    encrypted_entry = Fernet(base64.urlsafe_b64decode(key)).encrypt(buffer.getvalue())
+
+    # Écriture dans un fichier temporaire puis remplacement pour ne jamais laisser d'entrée partielle
+    # (fichier temporaire propre au processus et au thread : plusieurs threads d'un même processus peuvent calculer la même entrée)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as output_file:
+        output_file.write(encrypted_entry)
+    os.replace(tmp_path, path)
+
+# Initialisation de variables
+CACHE_FOLDER = "cache"            # Dossier contenant le cache des squelettes
+CACHE_KEY_FILE = "cache_key.txt"  # Fichier contenant la clé de cryptage du cache
+
+# Exécute la construction du cache
+if __name__ == "__main__":
+    import project
+
+    # Construction du cache pour les méthodes proposées par l'interface à partir des images originales
+    binarization_methods = ["Méthode d'Otsu", "Moyenne adaptative", "Gaussienne adaptative"]
+    project.build_skeleton_cache("DB_original", binarization_methods, ["Filtre Laplacien"])
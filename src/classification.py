@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file classification.py
+#
+# @brief Classification des empreintes (arc, arc en tente, boucle à gauche, boucle à droite, verticille) pour ne comparer une empreinte qu'aux empreintes de classes compatibles.
+#
+# EXPLICATION :
+#   -- L'orientation des crêtes est estimée par blocs de BLOCK x BLOCK pixels (tenseur de structure lissé) sur l'image binarisée.
+#   -- L'indice de Poincaré de chaque bloc (somme des variations d'orientation sur ses 8 voisins) vaut +1/2 sur un noyau, -1/2 sur un delta et +1 au centre d'un verticille.
+#   -- La classe découle du nombre de noyaux et de deltas : aucun noyau = arc, un noyau = boucle (à gauche ou à droite selon le côté vers lequel elle s'ouvre, arc en tente si elle s'ouvre vers le bas), deux noyaux = verticille.
+#   -- Les classes des empreintes de la BDD sont stockées dans <BDD>/classes/classes.csv (image;classe, sous-dossier non crypté comme le stockage des minuties).
+#   -- Une empreinte n'est comparée qu'aux empreintes de sa classe, des classes voisines (souvent confondues) et aux empreintes non classées (cf. candidate_classes).
+#
+# @section Description
+# Classification réalisée avec numpy et OpenCV
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - cv2 extern library (https://pypi.org/project/opencv-python/)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - csv standard library (https://docs.python.org/3/library/csv.html?highlight=csv#module-csv)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import cv2
+import os, csv, argparse
+
+def block_sum(image, rows, cols):
+    """! Somme par blocs
+
+    @param image: Image à découper en blocs de BLOCK x BLOCK pixels (les pixels au-delà du dernier bloc complet sont ignorés)
+    @type image: Tableau de réels
+
+    @param rows: Nombre de blocs sur la hauteur
+    @type rows: int
+
+    @param cols: Nombre de blocs sur la largeur
+    @type cols: int
+
+    @return: Somme de chaque bloc
+    @rtype: Tableau de réels (rows, cols)
+
+    """
+
+    return image[:rows * BLOCK, :cols * BLOCK].reshape(rows, BLOCK, cols, BLOCK).sum(axis=(1, 3))
+
+def orientation_field(binarized):
+    """! Orientation des crêtes par blocs
+
+    @param binarized: Image binarisée (crêtes noires sur fond blanc)
+    @type binarized: Tableau d'image
+
+    @return: Orientation des crêtes de chaque bloc (en radians, modulo pi) et blocs de l'empreinte
+    @rtype: Tuple (Tableau de réels, Tableau de bool)
+
+    """
+
+    rows, cols = binarized.shape[0] // BLOCK, binarized.shape[1] // BLOCK
+
+    # Tenseur de structure de chaque bloc
+    image = binarized.astype(np.float32)
+    gx = cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=3)
+    gxx, gyy, gxy = block_sum(gx * gx, rows, cols), block_sum(gy * gy, rows, cols), block_sum(gx * gy, rows, cols)
+
+    # Lissage de l'angle doublé (les orientations sont définies modulo pi), les crêtes sont perpendiculaires au gradient
+    cos2 = cv2.GaussianBlur(gxx - gyy, (0, 0), FIELD_SIGMA)
+    sin2 = cv2.GaussianBlur(2 * gxy, (0, 0), FIELD_SIGMA)
+    theta = 0.5 * np.arctan2(sin2, cos2) + np.pi / 2
+
+    # Blocs de l'empreinte : densité de crêtes suffisante autour du bloc
+    density = block_sum((binarized < 128).astype(np.float32), rows, cols) / (BLOCK * BLOCK)
+    mask = cv2.blur(density, (3, 3)) > MASK_DENSITY
+
+    return theta, mask
+
+def wrap(angle):
+    """! Différence d'orientations ramenée dans [-pi/2, pi/2)
+
+    @param angle: Différence de deux orientations
+    @type angle: Réel ou Tableau de réels
+
+    @return: Différence ramenée dans [-pi/2, pi/2)
+    @rtype: Réel ou Tableau de réels
+
+    """
+
+    return np.mod(angle + np.pi / 2, np.pi) - np.pi / 2
+
+def poincare_index(theta, mask):
+    """! Indice de Poincaré de chaque bloc
+
+    @param theta: Orientation des crêtes de chaque bloc
+    @type theta: Tableau de réels
+
+    @param mask: Blocs de l'empreinte
+    @type mask: Tableau de bool
+
+    @return: Indice de chaque bloc (+1/2 noyau, -1/2 delta, +1 verticille, 0 ailleurs et près du bord de l'empreinte)
+    @rtype: Tableau de réels
+
+    """
+
+    rows, cols = theta.shape
+    index = np.zeros((rows, cols))
+    if rows < 3 or cols < 3:
+        return index
+
+    # Somme des variations d'orientation en faisant le tour des 8 voisins de chaque bloc intérieur
+    ring = [theta[1 + di:rows - 1 + di, 1 + dj:cols - 1 + dj] for di, dj in RING]
+    total = sum(wrap(ring[(k + 1) % 8] - ring[k]) for k in range(8))
+    index[1:-1, 1:-1] = total / (2 * np.pi)
+
+    # Les orientations près du bord de l'empreinte ne sont pas fiables
+    inner = cv2.erode(mask.astype(np.uint8), np.ones((MASK_MARGIN, MASK_MARGIN), np.uint8), borderType=cv2.BORDER_CONSTANT, borderValue=0)
+    index[inner == 0] = 0
+
+    return index
+
+def singular_points(index, value):
+    """! Points singuliers d'un type
+
+    @param index: Indice de Poincaré de chaque bloc
+    @type index: Tableau de réels
+
+    @param value: Indice des points recherchés (+1/2, -1/2 ou +1)
+    @type value: float
+
+    @return: Centre (colonne, ligne) en blocs de chaque groupe de blocs voisins ayant cet indice
+    @rtype: Tableau de Tuple
+
+    """
+
+    count, _, _, centers = cv2.connectedComponentsWithStats((np.abs(index - value) < INDEX_TOLERANCE).astype(np.uint8))
+
+    return [(float(x), float(y)) for x, y in centers[1:count]]
+
+def core_direction(theta, core):
+    """! Direction d'ouverture d'une boucle
+
+    Fonction pour trouver la direction, vue depuis le noyau, dans laquelle les crêtes sont parallèles au rayon (les deux branches de la boucle).
+
+    EXPLICATION :
+    -- Autour d'un noyau, l'orientation vaut environ phi / 2 + theta0 où phi est l'angle polaire : 2 * theta - phi est constant et vaut la direction recherchée.
+
+    @param theta: Orientation des crêtes de chaque bloc
+    @type theta: Tableau de réels
+
+    @param core: Position (colonne, ligne) du noyau en blocs
+    @type core: Tuple
+
+    @return: Direction (en radians, axe des ordonnées vers le bas de l'image)
+    @rtype: float
+
+    """
+
+    rows, cols = theta.shape
+    x, y = int(round(core[0])), int(round(core[1]))
+    total = 0j
+
+    # Moyenne circulaire sur le carré de blocs à DIRECTION_RADIUS blocs du noyau
+    for dy in range(-DIRECTION_RADIUS, DIRECTION_RADIUS + 1):
+        for dx in range(-DIRECTION_RADIUS, DIRECTION_RADIUS + 1):
+            if max(abs(dx), abs(dy)) == DIRECTION_RADIUS and 0 <= y + dy < rows and 0 <= x + dx < cols:
+                total += np.exp(1j * (2 * theta[y + dy, x + dx] - np.arctan2(dy, dx)))
+
+    return float(np.angle(total))
+
+def classify(binarized):
+    """! Classe d'une empreinte
+
+    @param binarized: Image binarisée (crêtes noires sur fond blanc)
+    @type binarized: Tableau d'image
+
+    @return: Classe de l'empreinte (une des CLASSES)
+    @rtype: String
+
+    """
+
+    theta, mask = orientation_field(binarized)
+    index = poincare_index(theta, mask)
+
+    # Un verticille compte pour deux noyaux
+    whorls = singular_points(index, 1.0)
+    cores = singular_points(index, 0.5)
+    deltas = singular_points(index, -0.5)
+    core_count = len(cores) + 2 * len(whorls)
+
+    # Trop de points singuliers : orientations bruitées
+    if core_count > MAX_SINGULAR_POINTS or len(deltas) > MAX_SINGULAR_POINTS:
+        return UNKNOWN
+
+    if core_count == 0:
+        return ARCH if not deltas else UNKNOWN
+    if core_count >= 2 or len(deltas) == 2:
+        return WHORL
+
+    # Boucle : côté vers lequel elle s'ouvre (vers le bas = arc en tente)
+    direction = core_direction(theta, cores[0])
+    if abs(np.cos(direction)) < np.sin(TENTED_ANGLE):
+        return TENTED_ARCH
+
+    return LEFT_LOOP if np.cos(direction) < 0 else RIGHT_LOOP
+
+def candidate_classes(pattern_class):
+    """! Classes à rechercher
+
+    @param pattern_class: Classe de l'empreinte à traiter (None ou UNKNOWN si elle n'a pas pu être classée)
+    @type pattern_class: String
+
+    @return: Classes des empreintes de la BDD à comparer (None = toutes), les empreintes non classées étant toujours comparées
+    @rtype: Ensemble de String
+
+    """
+
+    if pattern_class is None or pattern_class not in NEIGHBOUR_CLASSES:
+        return None
+
+    return {pattern_class, UNKNOWN} | set(NEIGHBOUR_CLASSES[pattern_class])
+
+def class_path(folder_db):
+    """! Chemin du fichier des classes
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @return: Chemin de <BDD>/classes/classes.csv
+    @rtype: String
+
+    """
+
+    return os.path.join(folder_db, CLASS_FOLDER, CLASS_FILE)
+
+def read_classes(folder_db):
+    """! Lecture des classes des empreintes de la BDD
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @return: Classe de chaque image de la BDD (dictionnaire vide si les classes n'ont pas été calculées)
+    @rtype: Dictionnaire
+
+    """
+
+    try:
+        with open(class_path(folder_db), 'r', newline='', encoding='utf-8') as file:
+            return {elt[0]: elt[1] for elt in csv.reader(file, delimiter=';') if len(elt) >= 2}
+    except FileNotFoundError:
+        return {}
+
+def write_classes(folder_db, classes):
+    """! Écriture des classes des empreintes de la BDD
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param classes: Classe de chaque image de la BDD
+    @type classes: Dictionnaire
+
+    """
+
+    path = class_path(folder_db)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Écriture dans un fichier temporaire puis remplacement pour ne jamais laisser de fichier partiel
+    with open(path + ".tmp", 'w', newline='', encoding='utf-8') as file:
+        writing = csv.writer(file, delimiter=';')
+        for image in sorted(classes):
+            writing.writerow([image, classes[image]])
+    os.replace(path + ".tmp", path)
+
+# Initialisation de variables
+ARCH = "arch"                     # Arc
+TENTED_ARCH = "tented_arch"       # Arc en tente
+LEFT_LOOP = "left_loop"           # Boucle s'ouvrant vers la gauche
+RIGHT_LOOP = "right_loop"         # Boucle s'ouvrant vers la droite
+WHORL = "whorl"                   # Verticille
+UNKNOWN = "unknown"               # Empreinte non classée (toujours comparée)
+CLASSES = [ARCH, TENTED_ARCH, LEFT_LOOP, RIGHT_LOOP, WHORL, UNKNOWN] # Classes possibles
+NEIGHBOUR_CLASSES = {             # Classes souvent confondues avec chaque classe
+    ARCH: [TENTED_ARCH],
+    TENTED_ARCH: [ARCH, LEFT_LOOP, RIGHT_LOOP],
+    LEFT_LOOP: [TENTED_ARCH, WHORL],
+    RIGHT_LOOP: [TENTED_ARCH, WHORL],
+    WHORL: [LEFT_LOOP, RIGHT_LOOP],
+}
+BLOCK = 16                        # Taille des blocs du champ d'orientation (en pixels)
+FIELD_SIGMA = 1.0                 # Lissage du champ d'orientation (en blocs)
+MASK_DENSITY = 0.15               # Densité de crêtes minimale d'un bloc de l'empreinte
+MASK_MARGIN = 5                   # Taille de l'érosion du masque (en blocs) avant la recherche des points singuliers
+INDEX_TOLERANCE = 0.1             # Écart toléré sur l'indice de Poincaré
+MAX_SINGULAR_POINTS = 2           # Nombre maximal de noyaux ou de deltas d'une empreinte classée
+DIRECTION_RADIUS = 2              # Distance (en blocs) des orientations utilisées pour la direction d'une boucle
+TENTED_ANGLE = np.radians(12)     # Écart maximal à la verticale de la direction d'un arc en tente
+RING = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)] # Voisins d'un bloc dans l'ordre du parcours
+CLASS_FOLDER = "classes"          # Sous-dossier de la BDD contenant les classes (ignoré par le cryptage)
+CLASS_FILE = "classes.csv"        # Fichier des classes (image;classe)
+CLASS_BINARIZATION = "Méthode d'Otsu" # Méthode de binarisation des images de la BDD avant classification
+
+# Exécute la classification de la BDD
+if __name__ == "__main__":
+    import project
+
+    parser = argparse.ArgumentParser(description="Classification des empreintes de la BDD.")
+    parser.add_argument("--db", default="DB", help="Dossier de la BDD")
+    parser.add_argument("--key", default="key.txt", help="Fichier contenant la clé de cryptage")
+    args = parser.parse_args()
+
+    classes = project.build_classes(args.db, "DB.csv", args.key)
+    print(", ".join(f"{name} : {sum(value == name for value in classes.values())}" for name in CLASSES))
@@ -7,7 +7,13 @@
 #
 # EXPLICATION : 
 #   -- Les données sont encryptées pour assurer leur sécurité (données = empreintes digitales).
-#   -- Et dans l'optique d'assurer leur sécurité sur le temps, elles sont décrypées, puis réencryptées régulièrement avec newEncryption() (de façon fictive, mais il est imaginable qu'un programme pourrait effectuer cette démarche à une périodicité fixée) avec une nouvelle clé. 
+#   -- Et dans l'optique d'assurer leur sécurité sur le temps, la clé est renouvelée régulièrement avec newEncryption(). Cette tâche est planifiée par maintenance.py, en dehors des reconnaissances.
+#   -- Chaque image est cryptée avec sa propre clé de données. Les clés de données sont cryptées (enveloppées) par la clé maître de key.txt et stockées dans le manifeste DB/keys/manifest.json.
+#   -- Renouveler la clé maître revient donc à ré-envelopper les clés de données (quelques octets par image) sans réécrire les images. refreshDataKeys() recrypte progressivement les images avec de nouvelles clés de données.
+#   -- Les images cryptées directement avec la clé maître (BDD d'origine) sont ajoutées au manifeste lors du premier renouvellement : la clé maître devient leur clé de données.
+#   -- Les nouvelles images sont cryptées par blocs (AES-GCM, en-tête STREAM_MAGIC) : une image n'a jamais besoin d'être entièrement en mémoire pour être cryptée ou recryptée. Les images au format Fernet restent lisibles.
+#   -- Les traitements de tout un dossier (cryptage, recryptage, export décrypté) sont répartis sur plusieurs threads par BulkCrypto : la clé maître n'est lue qu'une fois et le nombre d'images en cours est borné.
+#   -- Toute modification des clés, du manifeste ou du journal d'une BDD se fait sous databaseLock(<BDD>), verrou partagé entre les threads et les processus (maintenance.py, enrôlements, interface) par le fichier <BDD>/keys/.lock.
 #   -- Ici l'initialisation est déjà faite, mais encryption() permet de mettre cela en place pour une nouvelle BDD.
 #
 # @section Description
@@ -20,8 +26,22 @@
 #
 # @section Libraries/Modules
 # - Fernet extern library (https://cryptography.io/en/latest/fernet/)
+# - AESGCM extern library (https://cryptography.io/en/latest/hazmat/primitives/aead/)
+# - HKDF extern library (https://cryptography.io/en/latest/hazmat/primitives/key-derivation-functions/#hkdf)
+# - cv2 extern library (https://pypi.org/project/opencv-python/)
+# - numpy extern library (https://numpy.org/)
 # - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
 # - base64 standard library (https://docs.python.org/3/library/base64.html?highlight=base64#module-base64)
+# - hashlib standard library (https://docs.python.org/3/library/hashlib.html)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+# - copy standard library (https://docs.python.org/3/library/copy.html)
+# - io standard library (https://docs.python.org/3/library/io.html)
+# - struct standard library (https://docs.python.org/3/library/struct.html)
+# - functools standard library (https://docs.python.org/3/library/functools.html)
+# - collections standard library (https://docs.python.org/3/library/collections.html)
+# - concurrent.futures standard library (https://docs.python.org/3/library/concurrent.futures.html)
+# - fcntl standard library, Unix uniquement (https://docs.python.org/3/library/fcntl.html)
 #
 # @section todo_doxygen_example TODO
 # - [...]
@@ -33,13 +53,48 @@
 # - SABADIE Laura
 ##
 
-from cryptography.fernet import Fernet
-import os, base64, shutil
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import cv2
+import numpy as np
+import os, base64, shutil, threading, hashlib, json, time, copy, io, struct, functools, collections
+import concurrent.futures
+
+# Verrou entre processus (absent sous Windows : les modifications ne sont alors protégées qu'au sein d'un processus)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Import des autres fichiers
+import tracing
+
+def writeAtomic(path, data):
+    """! Remplacement atomique d'un fichier
+
+    Fonction pour écrire un fichier dans un fichier temporaire synchronisé sur le disque, puis le remplacer : après un arrêt brutal, le fichier est soit l'ancien, soit le nouveau, jamais vide ou incomplet.
+
+    @param path: Chemin du fichier
+    @type path: String
+
+    @param data: Contenu du fichier
+    @type data: bytes
+
+    """
+
+    with open(f"{path}.tmp", 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
 
 def writeFile(path, key):
     """! Écriture dans un fichier
 
-    Fonction pour écrire dans un fichier.
+    Fonction pour écrire une clé dans un fichier (remplacé de façon atomique, cf. writeAtomic).
 
     @param path: Chemin du fichier
     @type path: String
@@ -49,9 +104,8 @@ def writeFile(path, key):
 
     """
 
-    # Ouverte du fichier en mode écriture s'il existe, sinon création, puis ouverture en écriture
-    with open(path, 'w') as f:
-        f.write(base64.urlsafe_b64encode(key).decode('utf-8')) # Transformation de la clé en string pour la stocker dans un fichier txt
+    # Transformation de la clé en string pour la stocker dans un fichier txt
+    writeAtomic(path, base64.urlsafe_b64encode(key))
 
 def readFile(path):
     """! Lecture dans un fichier
@@ -168,10 +222,87 @@ def decryptionImage(key, img_to_decrypt):
         # Sauvegarde de l'image décryptée
         output_file.write(decrypted_image)
 
-def encryption(folder, file):
+def decryptionBuffer(key, img_to_decrypt):
+    """! Décryptage d'une image en mémoire
+
+    Fonction pour décrypter une image à l'aide de la méthode de Fernet sans écrire l'image décryptée sur le disque.
+
+    @param key: Clé maître (ou clés maîtres valides, cf. readKeys)
+    @type key: String ou Tableau de String
+
+    @param img_to_decrypt: Chemin de l'image à décrypter
+    @type img_to_decrypt: String
+
+    @return: Contenu de l'image décryptée
+    @rtype: bytes
+
+    """
+
+    # Ouverture de l'image encryptée en mode de lecture binaire
+    with tracing.span("read_file"), open(img_to_decrypt, 'rb') as encrypted_file:
+        # Lecture de l'image cryptée
+        encrypted_image = encrypted_file.read()
+
+    folder = os.path.dirname(img_to_decrypt) or "."
+
+    for attempt in range(2):
+        # Clé de données de l'image enveloppée par la clé maître (cf. manifeste)
+        manifest = readManifest(folder)
+        entry = manifest["files"].get(os.path.basename(img_to_decrypt)) if manifest is not None else None
+
+        try:
+            with tracing.span("decrypt"):
+                # Un seul bloc pour les images au format Fernet et les petites images (pas de copie)
+                return b"".join(readChunks(masterSuite(key), entry, io.BytesIO(encrypted_image)))
+        except InvalidToken:
+            # Le manifeste a pu être remplacé sans que sa date de modification ne change : il est relu une fois
+            if attempt or manifest is None:
+                raise
+            MANIFEST_CACHE.pop(manifestPath(folder), None)
+
+def decodeImage(image_data, flags=cv2.IMREAD_GRAYSCALE):
+    """! Décodage d'une image en mémoire
+
+    Fonction pour décoder le contenu d'une image (ex : décryptée par decryptionBuffer) en matrice.
+
+    @param image_data: Contenu de l'image
+    @type image_data: bytes
+
+    @param flags: Mode de lecture OpenCV (niveau de gris par défaut)
+    @type flags: int
+
+    @return: Image décodée
+    @rtype: Tableau d'image
+
+    """
+
+    return cv2.imdecode(np.frombuffer(image_data, np.uint8), flags)
+
+def decryptionArray(key, img_to_decrypt, flags=cv2.IMREAD_GRAYSCALE):
+    """! Décryptage d'une image en matrice
+
+    Fonction pour décrypter une image et la décoder directement en mémoire.
+
+    @param key: Clé de chiffrement
+    @type key: String
+
+    @param img_to_decrypt: Chemin de l'image à décrypter
+    @type img_to_decrypt: String
+
+    @param flags: Mode de lecture OpenCV (niveau de gris par défaut)
+    @type flags: int
+
+    @return: Image décryptée
+    @rtype: Tableau d'image
+
+    """
+
+    return decodeImage(decryptionBuffer(key, img_to_decrypt), flags)
+
+def encryption(folder, file, workers=None):
     """! Encryptage des données
 
-    Fonction pour crypter une image à l'aide de la méthode de Fernet.
+    Fonction pour crypter les images d'un dossier, chacune avec sa propre clé de données.
 
     @param folder: Dossier contenant les images à crypter
     @type folder: String
@@ -179,6 +310,9 @@ def encryption(folder, file):
     @param file: Fichier contenant la clé de cryptage
     @type file: String
 
+    @param workers: Nombre de threads (BULK_WORKERS par défaut)
+    @type workers: int
+
     """
 
     # Initialisation de variables
@@ -186,38 +320,939 @@ def encryption(folder, file):
 
     # Sauvegarde de la nouvelle clé dans le fichier déterminé par file
     writeFile(file, key)
-    
-    for path, dirs, files in os.walk(folder):
-        # Pour chaque élément du dossier défini par folder, un décryptage et décryptage sera effectué
-        for filename in files:
-            if filename != "DB.csv":
-                # Encryptage des données
-                encryptionImage(readFile(file), f'{folder}/{filename}', True)
-
-def newEncryption():
+
+    # Images du dossier défini par folder (les sous-dossiers, ex : stockage des minuties, ne sont pas cryptés)
+    filenames = [filename for filename in sorted(os.listdir(folder)) if filename != "DB.csv" and os.path.isfile(f'{folder}/{filename}')]
+
+    # Encryptage des données avec une nouvelle clé de données par image
+    BulkCrypto(folder, file, workers).encryptFiles(filenames)
+
+def decryption(folder, file, output, workers=None):
+    """! Export des données décryptées
+
+    Fonction pour écrire une copie décryptée des images d'un dossier (ex : sauvegarde ou changement de système de cryptage).
+
+    @param folder: Dossier contenant les images cryptées
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage
+    @type file: String
+
+    @param output: Dossier dans lequel écrire les images décryptées
+    @type output: String
+
+    @param workers: Nombre de threads (BULK_WORKERS par défaut)
+    @type workers: int
+
+    """
+
+    filenames = [filename for filename in sorted(os.listdir(folder)) if filename != "DB.csv" and not filename.endswith(".tmp") and os.path.isfile(f'{folder}/{filename}')]
+
+    BulkCrypto(folder, file, workers).decryptFiles(filenames, output)
+
+def readKeys(file):
+    """! Lecture des clés de chiffrement valides
+
+    Fonction pour lire la clé courante ainsi que l'ancienne clé si un renouvellement est en cours (ou a été interrompu).
+
+    @param file: Fichier contenant la clé de cryptage
+    @type file: String
+
+    @return: Clés de chiffrement (la clé courante en premier)
+    @rtype: Tableau de String
+
+    """
+
+    keys = [readFile(file)]
+
+    # Ancienne clé conservée pendant le renouvellement du cryptage
+    if os.path.isfile(f"{file}.old"):
+        keys.append(readFile(f"{file}.old"))
+
+    return keys
+
+def masterSuite(keys):
+    """! Suite de chiffrement des clés maîtres
+
+    @param keys: Clé maître (key.txt) ou clés maîtres valides (cf. readKeys), la clé courante en premier
+    @type keys: String ou Tableau de String
+
+    @return: Suite de chiffrement (chiffre avec la première clé, déchiffre avec n'importe laquelle)
+    @rtype: MultiFernet
+
+    """
+
+    if not isinstance(keys, (list, tuple)):
+        keys = [keys]
+
+    return parseKeys(tuple(keys))
+
+@functools.lru_cache(maxsize=8)
+def parseKeys(keys):
+    """! Décodage des clés maîtres
+
+    Fonction appelée une seule fois par jeu de clés (les reconnaissances décryptent chaque image avec les mêmes clés).
+
+    @param keys: Clés maîtres, la clé courante en premier
+    @type keys: Tuple de String
+
+    @return: Suite de chiffrement des clés maîtres
+    @rtype: MultiFernet
+
+    """
+
+    return MultiFernet([Fernet(base64.urlsafe_b64decode(key)) for key in keys])
+
+def keyId(key):
+    """! Identifiant d'une clé maître
+
+    @param key: Clé maître
+    @type key: String
+
+    @return: Identifiant (début de l'empreinte SHA-256, ne permet pas de retrouver la clé)
+    @rtype: String
+
+    """
+
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def manifestPath(folder):
+    """! Chemin du manifeste des clés
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @return: Chemin du manifeste
+    @rtype: String
+
+    """
+
+    return os.path.join(folder, MANIFEST_FOLDER, MANIFEST_FILE)
+
+def lockPath(folder):
+    """! Chemin du fichier de verrou d'une BDD
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @return: Chemin du fichier de verrou
+    @rtype: String
+
+    """
+
+    return os.path.join(folder, MANIFEST_FOLDER, LOCK_FILE)
+
+class DatabaseLock:
+    """! Verrou d'une BDD
+
+    Classe pour empêcher deux modifications simultanées des clés, du manifeste ou du journal d'une BDD, entre threads d'un même processus comme entre processus.
+
+    EXPLICATION :
+    -- Les threads d'un processus sont départagés par un verrou réentrant, les processus par fcntl.flock sur le fichier de verrou (libéré par le système si le processus s'arrête).
+    -- Le verrou est réentrant : une fonction qui le détient peut appeler une autre fonction qui le prend (ex : newEncryption puis migrateEnvelope, enrôlement puis cryptage).
+
+    """
+
+    def __init__(self, path):
+        """! Création du verrou
+
+        @param path: Chemin du fichier de verrou
+        @type path: String
+
+        """
+
+        self.path = path                # Chemin du fichier de verrou
+        self.lock = threading.RLock()   # Verrou entre les threads du processus
+        self.depth = 0                  # Nombre de prises imbriquées par le thread détenteur
+        self.fd = None                  # Descripteur du fichier de verrou (pendant la détention)
+
+    def __enter__(self):
+        self.lock.acquire()
+
+        # Première prise : verrou du fichier (attente de la fin d'une modification par un autre processus)
+        if self.depth == 0 and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self.lock.release()
+                raise
+            self.fd = fd
+
+        self.depth += 1
+
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+
+        # Dernière libération : verrou du fichier rendu aux autres processus
+        if self.depth == 0 and self.fd is not None:
+            fd, self.fd = self.fd, None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+
+        self.lock.release()
+
+def databaseLock(folder):
+    """! Verrou d'une BDD
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @return: Verrou de la BDD (le même objet pour toutes les fonctions d'un processus)
+    @rtype: DatabaseLock
+
+    """
+
+    path = os.path.abspath(lockPath(folder))
+
+    with DATABASE_LOCKS_GUARD:
+        lock = DATABASE_LOCKS.get(path)
+        if lock is None:
+            lock = DATABASE_LOCKS[path] = DatabaseLock(path)
+
+    return lock
+
+def resetLocks():
+    """! Réinitialisation des verrous dans un processus créé par fork
+
+    Les verrous hérités peuvent être détenus par un thread qui n'existe pas dans le nouveau processus : ils sont recréés à la première utilisation.
+
+    """
+
+    global DATABASE_LOCKS_GUARD
+    DATABASE_LOCKS_GUARD = threading.Lock()
+    DATABASE_LOCKS.clear()
+
+def readManifest(folder, writable=False):
+    """! Lecture du manifeste des clés
+
+    Fonction pour lire les clés de données enveloppées des images d'un dossier. Le manifeste n'est relu que s'il a été modifié.
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param writable: Copie modifiable du manifeste (sinon le manifeste partagé par les lectures est renvoyé)
+    @type writable: bool
+
+    @return: Manifeste {"master_id", "files": {image: {"keys": [clés enveloppées], "created": date}}} ou None si la BDD n'utilise pas encore les clés de données
+    @rtype: Dictionnaire
+
+    """
+
+    path = manifestPath(folder)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    # Manifeste déjà lu et non modifié depuis (chaque écriture remplace le fichier, donc son inode)
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = MANIFEST_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        manifest = cached[1]
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        MANIFEST_CACHE[path] = (version, manifest)
+
+    return copy.deepcopy(manifest) if writable else manifest
+
+def writeManifest(folder, manifest):
+    """! Écriture du manifeste des clés
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param manifest: Manifeste à écrire
+    @type manifest: Dictionnaire
+
+    """
+
+    path = manifestPath(folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Écriture dans un fichier temporaire puis remplacement : le manifeste est toujours complet
+    writeAtomic(path, json.dumps(manifest).encode('utf-8'))
+
+def dataSuite(keys, entry):
+    """! Suite de chiffrement des données d'une image
+
+    @param keys: Clés maîtres valides
+    @type keys: String ou Tableau de String
+
+    @param entry: Entrée de l'image dans le manifeste
+    @type entry: Dictionnaire
+
+    @return: Suite de chiffrement avec les clés de données désenveloppées (plusieurs pendant un recryptage)
+    @rtype: MultiFernet
+
+    """
+
+    return MultiFernet([Fernet(data_key) for data_key in dataKeys(masterSuite(keys), entry)])
+
+def dataKeys(master, entry):
+    """! Clés de données d'une image
+
+    @param master: Suite de chiffrement des clés maîtres (cf. masterSuite)
+    @type master: MultiFernet
+
+    @param entry: Entrée de l'image dans le manifeste
+    @type entry: Dictionnaire
+
+    @return: Clés de données désenveloppées (la plus récente en premier)
+    @rtype: Tableau de bytes
+
+    """
+
+    return [master.decrypt(wrapped.encode('ascii')) for wrapped in entry["keys"]]
+
+def newEntry(master_key):
+    """! Nouvelle clé de données
+
+    @param master_key: Clé maître courante ou suite de chiffrement des clés maîtres (cf. masterSuite)
+    @type master_key: String ou MultiFernet
+
+    @return: Clé de données et entrée du manifeste associée (clé enveloppée par la clé maître)
+    @rtype: Tuple (bytes, Dictionnaire)
+
+    """
+
+    data_key = generateKey()
+    master = master_key if isinstance(master_key, MultiFernet) else masterSuite(master_key)
+
+    return data_key, {"keys": [master.encrypt(data_key).decode('ascii')], "created": time.time()}
+
+def encryptionBuffer(folder, filename, data, master_key):
+    """! Cryptage d'une nouvelle image
+
+    Fonction pour crypter une image avec une nouvelle clé de données et l'ajouter à la BDD.
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param filename: Nom de l'image dans la BDD
+    @type filename: String
+
+    @param data: Contenu de l'image non cryptée
+    @type data: bytes
+
+    @param master_key: Clé maître courante
+    @type master_key: String
+
+    """
+
+    data_key, entry = newEntry(master_key)
+
+    with databaseLock(folder):
+        # Clé de données enregistrée avant l'image : l'image n'est jamais illisible
+        manifest = readManifest(folder, True) or {"version": 1, "master_id": keyId(master_key), "files": {}}
+        manifest["files"][filename] = entry
+        writeManifest(folder, manifest)
+
+        path = f'{folder}/{filename}'
+        with open(f"{path}.tmp", 'wb') as encrypted_file:
+            encrypted_file.writelines(encryptChunks(data_key, [data]))
+        os.replace(f"{path}.tmp", path)
+
+def encryptionMaster(folder, filename, data, file):
+    """! Cryptage d'une image enrôlée
+
+    Fonction pour crypter une nouvelle image directement avec la clé maître courante (format de la BDD d'origine), sans modifier le manifeste.
+
+    EXPLICATION :
+    -- Contrairement à encryptionBuffer qui réécrit le manifeste de toute la BDD, le coût ne dépend pas de la taille de la BDD.
+    -- L'image est ajoutée au manifeste lors du prochain renouvellement de la clé maître (migrateEnvelope), puis recryptée avec sa propre clé de données par refreshDataKeys.
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param filename: Nom de l'image dans la BDD
+    @type filename: String
+
+    @param data: Contenu de l'image non cryptée
+    @type data: bytes
+
+    @param file: Fichier contenant la clé maître
+    @type file: String
+
+    """
+
+    # Pas de renouvellement de la clé entre sa lecture et l'écriture de l'image (ni de migrateEnvelope entre la liste des images et l'écriture de key.txt.old)
+    with databaseLock(folder):
+        encrypted_image = masterSuite(readKeys(file)).encrypt(data)
+
+        path = f'{folder}/{filename}'
+        with open(f"{path}.tmp", 'wb') as encrypted_file:
+            encrypted_file.write(encrypted_image)
+            encrypted_file.flush()
+            os.fsync(encrypted_file.fileno())
+        os.replace(f"{path}.tmp", path)
+
+def streamKey(data_key):
+    """! Clé AES d'une image
+
+    @param data_key: Clé de données de l'image (format Fernet)
+    @type data_key: bytes
+
+    @return: Clé AES-GCM dérivée de la clé de données (la clé de données n'est pas utilisée telle quelle par deux algorithmes)
+    @rtype: AESGCM
+
+    """
+
+    return AESGCM(HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=STREAM_INFO).derive(base64.urlsafe_b64decode(data_key)))
+
+def encryptChunks(data_key, chunks, chunk_size=None):
+    """! Cryptage par blocs
+
+    Fonction pour crypter des données au fur et à mesure de leur lecture.
+
+    EXPLICATION :
+    -- L'en-tête contient STREAM_MAGIC, la taille des blocs et le début (aléatoire) des nonces ; il est authentifié avec chaque bloc.
+    -- Le nonce de chaque bloc contient son numéro et indique s'il s'agit du dernier : un bloc supprimé, déplacé ou une image tronquée est détecté.
+
+    @param data_key: Clé de données de l'image
+    @type data_key: bytes
+
+    @param chunks: Données à crypter, en morceaux de taille quelconque
+    @type chunks: Itérable de bytes
+
+    @param chunk_size: Taille des blocs (STREAM_CHUNK par défaut)
+    @type chunk_size: int
+
+    @return: En-tête puis blocs cryptés
+    @rtype: Générateur de bytes
+
+    """
+
+    # Initialisation de variables
+    chunk_size = chunk_size or STREAM_CHUNK
+    aead = streamKey(data_key)
+    prefix = os.urandom(STREAM_PREFIX)
+    header = STREAM_MAGIC + struct.pack(">I", chunk_size) + prefix
+    buffer = bytearray()
+    counter = 0
+
+    yield header
+
+    for data in chunks:
+        buffer += data
+
+        # Un bloc n'est crypté que si d'autres données le suivent (le dernier bloc est marqué)
+        while len(buffer) > chunk_size:
+            yield aead.encrypt(prefix + struct.pack(">IB", counter, 0), bytes(buffer[:chunk_size]), header)
+            del buffer[:chunk_size]
+            counter += 1
+
+    yield aead.encrypt(prefix + struct.pack(">IB", counter, 1), bytes(buffer), header)
+
+def decryptChunks(data_keys, source, magic=b""):
+    """! Décryptage par blocs
+
+    Fonction pour décrypter une image cryptée par encryptChunks au fur et à mesure de sa lecture.
+
+    @param data_keys: Clés de données possibles de l'image (plusieurs pendant un recryptage)
+    @type data_keys: Tableau de bytes
+
+    @param source: Image cryptée
+    @type source: Fichier binaire
+
+    @param magic: Début de l'en-tête déjà lu dans source
+    @type magic: bytes
+
+    @return: Blocs décryptés
+    @rtype: Générateur de bytes
+
+    """
+
+    header = magic + source.read(STREAM_HEADER - len(magic))
+    if len(header) != STREAM_HEADER or not header.startswith(STREAM_MAGIC):
+        raise InvalidToken
+
+    # Taille des blocs cryptés (bornée : un en-tête corrompu ne doit pas provoquer une lecture démesurée)
+    chunk_size = struct.unpack(">I", header[len(STREAM_MAGIC):len(STREAM_MAGIC) + 4])[0]
+    if not 0 < chunk_size <= STREAM_MAX_CHUNK:
+        raise InvalidToken
+    prefix = header[len(STREAM_MAGIC) + 4:]
+
+    # Initialisation de variables
+    candidates = [streamKey(data_key) for data_key in data_keys]
+    block = source.read(chunk_size + STREAM_TAG)
+    counter = 0
+
+    while True:
+        # Le bloc est le dernier si rien ne le suit
+        following = source.read(chunk_size + STREAM_TAG)
+        nonce = prefix + struct.pack(">IB", counter, not following)
+
+        for aead in candidates:
+            try:
+                data = aead.decrypt(nonce, block, header)
+                break
+            except InvalidTag:
+                continue
+        else:
+            raise InvalidToken
+
+        # La clé de données de l'image est trouvée dès le premier bloc
+        candidates = [aead]
+        yield data
+
+        if not following:
+            return
+        block = following
+        counter += 1
+
+def readChunks(master, entry, source):
+    """! Décryptage d'une image (tous formats)
+
+    @param master: Suite de chiffrement des clés maîtres (cf. masterSuite)
+    @type master: MultiFernet
+
+    @param entry: Entrée de l'image dans le manifeste (None pour une image cryptée directement avec la clé maître)
+    @type entry: Dictionnaire
+
+    @param source: Image cryptée
+    @type source: Fichier binaire
+
+    @return: Blocs décryptés (un seul pour le format Fernet)
+    @rtype: Générateur de bytes
+
+    """
+
+    magic = source.read(len(STREAM_MAGIC))
+
+    if magic == STREAM_MAGIC:
+        # Le format par blocs n'est utilisé qu'avec une clé de données
+        if entry is None:
+            raise InvalidToken
+        yield from decryptChunks(dataKeys(master, entry), source, magic)
+    else:
+        # Format Fernet : avec la clé de données de l'image ou directement avec la clé maître (plusieurs clés sont acceptées pendant un renouvellement)
+        suite = MultiFernet([Fernet(data_key) for data_key in dataKeys(master, entry)]) if entry is not None else master
+        yield suite.decrypt(magic + source.read())
+
+class BulkCrypto:
+    """! Cryptage en masse
+
+    Classe pour crypter, recrypter ou décrypter de nombreuses images d'un dossier sur plusieurs threads (les primitives de cryptography libèrent le GIL).
+    Les clés maîtres sont lues une seule fois par appel (sous le verrou de la BDD pour un cryptage), chaque image est traitée par blocs et le nombre d'images en cours est borné par max_pending :
+    la mémoire utilisée ne dépend pas de la taille de la BDD.
+
+    """
+
+    def __init__(self, folder=None, file=None, workers=None, max_pending=None, chunk_size=None):
+        """! Création du moteur de cryptage
+
+        @param folder: Dossier contenant la BDD (FOLDER_PATH par défaut)
+        @type folder: String
+
+        @param file: Fichier contenant la clé maître (FILE par défaut)
+        @type file: String
+
+        @param workers: Nombre de threads (BULK_WORKERS par défaut)
+        @type workers: int
+
+        @param max_pending: Nombre maximal d'images en cours de traitement (2 par thread par défaut)
+        @type max_pending: int
+
+        @param chunk_size: Taille des blocs cryptés (STREAM_CHUNK par défaut)
+        @type chunk_size: int
+
+        """
+
+        self.folder = folder or FOLDER_PATH            # Dossier contenant la BDD
+        self.file = file or FILE                       # Fichier contenant la clé maître
+        self.workers = workers or BULK_WORKERS         # Nombre de threads
+        self.max_pending = max_pending or 2 * self.workers # Nombre maximal d'images en cours
+        self.chunk_size = chunk_size or STREAM_CHUNK   # Taille des blocs
+        self.reload()
+
+    def reload(self):
+        """! Lecture des clés maîtres (ex : après un renouvellement)"""
+
+        self.keys = readKeys(self.file)      # Clés maîtres valides
+        self.master = masterSuite(self.keys) # Suite de chiffrement des clés maîtres
+
+    def map(self, function, items):
+        """! Traitement parallèle
+
+        @param function: Traitement d'un élément
+        @type function: Fonction
+
+        @param items: Éléments à traiter
+        @type items: Itérable
+
+        @return: Résultats dans l'ordre des éléments (au plus max_pending éléments sont en cours)
+        @rtype: Générateur
+
+        """
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = collections.deque()
+
+            for item in items:
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(function, item))
+
+            while pending:
+                yield pending.popleft().result()
+
+    def write(self, filename, chunks):
+        """! Remplacement d'une image de la BDD
+
+        @param filename: Nom de l'image dans la BDD
+        @type filename: String
+
+        @param chunks: Contenu crypté de l'image
+        @type chunks: Itérable de bytes
+
+        @return: Nombre d'octets écrits
+        @rtype: int
+
+        """
+
+        path = f'{self.folder}/{filename}'
+        size = 0
+
+        # Écriture dans un fichier temporaire puis remplacement : l'image est toujours complète
+        with open(f"{path}.tmp", 'wb') as output_file:
+            for chunk in chunks:
+                output_file.write(chunk)
+                size += len(chunk)
+        os.replace(f"{path}.tmp", path)
+
+        return size
+
+    def encryptFiles(self, filenames, sources=None):
+        """! Cryptage d'images
+
+        Fonction pour crypter des images, chacune avec une nouvelle clé de données, et les ajouter au manifeste.
+
+        @param filenames: Noms des images dans la BDD
+        @type filenames: Tableau de String
+
+        @param sources: Chemins ou contenus des images non cryptées (par défaut les images de la BDD sont cryptées sur place)
+        @type sources: Dictionnaire {nom de l'image: chemin ou bytes}
+
+        @return: Nombre d'octets écrits
+        @rtype: int
+
+        """
+
+        sources = sources or {}
+        data_keys = {}
+
+        def encrypt(filename):
+            source = sources.get(filename, f'{self.folder}/{filename}')
+            if isinstance(source, bytes):
+                # Image déjà lue (ex : enrôlement, l'image n'est pas relue)
+                return self.write(filename, encryptChunks(data_keys[filename], [source], self.chunk_size))
+
+            with open(source, 'rb') as input_file:
+                return self.write(filename, encryptChunks(data_keys[filename], iter(lambda: input_file.read(self.chunk_size), b""), self.chunk_size))
+
+        with databaseLock(self.folder), tracing.span("bulk_encrypt", files=len(filenames)):
+            # Clés maîtres relues sous le verrou : un renouvellement (ex : par maintenance.py) a pu avoir lieu depuis le dernier appel
+            self.reload()
+
+            # Clés de données enregistrées avant les images (une seule écriture du manifeste)
+            manifest = readManifest(self.folder, True) or {"version": 1, "master_id": keyId(self.keys[0]), "files": {}}
+            for filename in filenames:
+                data_keys[filename], manifest["files"][filename] = newEntry(self.master)
+            writeManifest(self.folder, manifest)
+
+            size = sum(self.map(encrypt, filenames))
+
+        tracing.count("files_encrypted", len(filenames))
+
+        return size
+
+    def reencryptFiles(self, manifest, new_keys):
+        """! Recryptage d'images
+
+        Fonction pour recrypter des images de la BDD avec leur nouvelle clé de données (appelée par refreshDataKeys).
+
+        @param manifest: Manifeste contenant les anciennes et les nouvelles clés de données
+        @type manifest: Dictionnaire
+
+        @param new_keys: Nouvelle clé de données de chaque image
+        @type new_keys: Dictionnaire {nom de l'image: bytes}
+
+        @return: Nombre d'octets écrits
+        @rtype: int
+
+        """
+
+        def reencrypt(filename):
+            with open(f'{self.folder}/{filename}', 'rb') as encrypted_file:
+                return self.write(filename, encryptChunks(new_keys[filename], readChunks(self.master, manifest["files"][filename], encrypted_file), self.chunk_size))
+
+        return sum(self.map(reencrypt, list(new_keys)))
+
+    def decryptFiles(self, filenames, output):
+        """! Décryptage d'images
+
+        @param filenames: Noms des images dans la BDD
+        @type filenames: Tableau de String
+
+        @param output: Dossier dans lequel écrire les images décryptées
+        @type output: String
+
+        @return: Nombre d'octets écrits
+        @rtype: int
+
+        """
+
+        manifest = readManifest(self.folder)
+        os.makedirs(output, exist_ok=True)
+
+        def decrypt(filename):
+            entry = manifest["files"].get(filename) if manifest is not None else None
+            size = 0
+            with open(f'{self.folder}/{filename}', 'rb') as encrypted_file, open(f'{output}/{filename}', 'wb') as output_file:
+                for chunk in readChunks(self.master, entry, encrypted_file):
+                    output_file.write(chunk)
+                    size += len(chunk)
+            return size
+
+        with tracing.span("bulk_decrypt", files=len(filenames)):
+            return sum(self.map(decrypt, filenames))
+
+def migrateEnvelope(folder, file):
+    """! Passage aux clés de données
+
+    Fonction pour ajouter au manifeste les images cryptées directement avec la clé maître, sans les recrypter.
+
+    EXPLICATION :
+    -- Les clés maîtres valides deviennent les clés de données de ces images (enveloppées par la clé maître courante).
+    -- Après un renouvellement interrompu, une image peut être cryptée avec l'une ou l'autre des clés : les deux sont conservées jusqu'au recryptage de l'image (cf. refreshDataKeys).
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param file: Fichier contenant la clé maître
+    @type file: String
+
+    @return: Nombre d'images ajoutées au manifeste
+    @rtype: int
+
+    """
+
+    # Initialisation de variables
+    keys = readKeys(file)
+    master = masterSuite(keys[0])
+    manifest = readManifest(folder, True) or {"version": 1, "master_id": keyId(keys[0]), "files": {}}
+    wrapped = [master.encrypt(base64.urlsafe_b64decode(key)).decode('ascii') for key in keys]
+    added = 0
+
+    for filename in sorted(os.listdir(folder)):
+        if filename != "DB.csv" and not filename.endswith(".tmp") and os.path.isfile(f'{folder}/{filename}') and filename not in manifest["files"]:
+            # La clé maître utilisée pour crypter l'image devient sa clé de données
+            manifest["files"][filename] = {"keys": list(wrapped), "created": 0.0}
+            added += 1
+
+    if added:
+        writeManifest(folder, manifest)
+
+    return added
+
+def rewrapManifest(folder, new_key, keys):
+    """! Changement de la clé maître du manifeste
+
+    Fonction pour envelopper toutes les clés de données avec une nouvelle clé maître (aucune image n'est réécrite).
+
+    @param folder: Dossier contenant la BDD
+    @type folder: String
+
+    @param new_key: Nouvelle clé maître
+    @type new_key: String
+
+    @param keys: Clés maîtres permettant de désenvelopper les clés de données
+    @type keys: Tableau de String
+
+    """
+
+    # Chiffre avec la nouvelle clé, déchiffre avec n'importe quelle clé valide
+    master = masterSuite([new_key] + keys)
+    manifest = readManifest(folder, True)
+    if manifest is None:
+        return
+
+    with tracing.span("rewrap", files=len(manifest["files"])):
+        for entry in manifest["files"].values():
+            entry["keys"] = [master.rotate(wrapped.encode('ascii')).decode('ascii') for wrapped in entry["keys"]]
+        manifest["master_id"] = keyId(new_key)
+        writeManifest(folder, manifest)
+
+    tracing.count("keys_rewrapped", sum(len(entry["keys"]) for entry in manifest["files"].values()))
+
+def refreshDataKeys(folder=None, file=None, max_age=None, limit=None):
+    """! Recryptage progressif des images
+
+    Fonction pour recrypter les images dont la clé de données est la plus ancienne avec de nouvelles clés de données (tâche de fond, cf. maintenance.py).
+
+    EXPLICATION :
+    -- Les images sont traitées par groupes de REFRESH_CHUNK : la nouvelle clé de données est d'abord ajoutée au manifeste, puis l'image est recryptée et remplacée, enfin l'ancienne clé est retirée.
+    -- Une image reste donc lisible à chaque étape, même si le recryptage est interrompu (il est repris au prochain passage).
+
+    @param folder: Dossier contenant la BDD (FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file: Fichier contenant la clé maître (FILE par défaut)
+    @type file: String
+
+    @param max_age: Âge (en secondes) au-delà duquel une clé de données est renouvelée (0 = toutes)
+    @type max_age: float
+
+    @param limit: Nombre maximal d'images recryptées (None = toutes)
+    @type limit: int
+
+    @return: Nombre d'images recryptées
+    @rtype: int
+
+    """
+
+    # Initialisation de variables
+    folder = folder or FOLDER_PATH
+    file = file or FILE
+    max_age = max_age or 0
+    refreshed = 0
+    engine = BulkCrypto(folder, file)
+
+    with databaseLock(folder):
+        migrateEnvelope(folder, file)
+        manifest = readManifest(folder)
+        if manifest is None:
+            return 0
+
+        # Images à recrypter : recryptages interrompus (plusieurs clés) puis clés les plus anciennes
+        deadline = time.time() - max_age
+        candidates = sorted((filename for filename, entry in manifest["files"].items() if len(entry["keys"]) > 1 or entry["created"] <= deadline),
+                            key=lambda filename: (len(manifest["files"][filename]["keys"]) == 1, manifest["files"][filename]["created"]))
+
+    if limit is not None:
+        candidates = candidates[:limit]
+
+    for start in range(0, len(candidates), REFRESH_CHUNK):
+        # Un groupe à la fois : le renouvellement de la clé maître peut s'intercaler entre deux groupes
+        with databaseLock(folder), tracing.span("refresh_chunk"):
+            engine.reload()
+            manifest = readManifest(folder, True)
+            chunk = [filename for filename in candidates[start:start + REFRESH_CHUNK] if filename in manifest["files"] and os.path.isfile(f'{folder}/{filename}')]
+            new_keys = {}
+
+            # 1. Ajout de la nouvelle clé de données (l'ancienne reste valide)
+            for filename in chunk:
+                new_keys[filename] = generateKey()
+                manifest["files"][filename]["keys"].insert(0, engine.master.encrypt(new_keys[filename]).decode('ascii'))
+            writeManifest(folder, manifest)
+
+            # 2. Recryptage de chaque image avec sa nouvelle clé de données (en parallèle)
+            engine.reencryptFiles(manifest, new_keys)
+
+            # 3. Retrait des anciennes clés de données
+            for filename in chunk:
+                manifest["files"][filename]["keys"] = manifest["files"][filename]["keys"][:1]
+                manifest["files"][filename]["created"] = time.time()
+            writeManifest(folder, manifest)
+
+        refreshed += len(chunk)
+        tracing.count("files_reencrypted", len(chunk))
+
+    return refreshed
+
+def newEncryption(folder=None, file=None):
     """! Renouvellement de l'encryptage des données
 
     Fonction pour renouveler le cryptage d'un dossier d'images à l'aide de la méthode de Fernet.
 
+    EXPLICATION :
+    -- L'ancienne clé est conservée dans "<file>.old" pendant le renouvellement, les reconnaissances en cours peuvent donc toujours décrypter les images.
+    -- Si un renouvellement précédent a été interrompu, il est d'abord terminé avec la clé courante.
+
+    @param folder: Dossier contenant les images (FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage (FILE par défaut)
+    @type file: String
+
     """
 
     # Initialisation de variables
-    old_key = readFile(FILE) # Ancienne clé de cryptage
-    new_key = generateKey()  # Nouvelle clé de cryptage
-    
-    for path, dirs, files in os.walk(FOLDER_PATH):
-        # Pour chaque élément du dossier défini par FOLDER_PATH, un décryptage et décryptage sera effectué
-        for filename in files:
-            if filename != "DB.csv":
-                # Décryptage des données
-                decryptionImage(old_key, f'{FOLDER_PATH}/{filename}')
-
-                # Sauvegarde de la nouvelle clé dans le fichier déterminé par FILE
-                writeFile(FILE, new_key)
-
-                # Encryptage des données
-                encryptionImage(readFile(FILE), f'{FOLDER_PATH}/{filename}', True)
+    folder = folder or FOLDER_PATH
+    file = file or FILE
+
+    # Un seul renouvellement à la fois (menu de l'interface et tâche planifiée)
+    with databaseLock(folder):
+        renewKey(folder, file)
+
+def renewKey(folder, file):
+    """! Renouvellement de la clé
+
+    Fonction pour effectuer le renouvellement de la clé maître (appelée par newEncryption).
+
+    EXPLICATION :
+    -- Seules les clés de données du manifeste sont ré-enveloppées, les images ne sont pas réécrites.
+    -- Le manifeste est remplacé de façon atomique : il est enveloppé soit par l'ancienne clé (conservée dans "<file>.old"), soit par la nouvelle.
+
+    @param folder: Dossier contenant les images
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage
+    @type file: String
+
+    """
+
+    # Reprise d'un renouvellement interrompu
+    if os.path.isfile(f"{file}.old"):
+        migrateEnvelope(folder, file)
+        rewrapManifest(folder, readFile(file), readKeys(file))
+        os.remove(f"{file}.old")
+
+    # Images cryptées directement avec la clé maître
+    migrateEnvelope(folder, file)
+
+    # Conservation de l'ancienne clé puis sauvegarde de la nouvelle clé
+    old_key = readFile(file)
+    writeAtomic(f"{file}.old", old_key.encode('utf-8'))
+    writeFile(file, generateKey())
+
+    # Nouvel enveloppement des clés de données
+    rewrapManifest(folder, readFile(file), [old_key])
+
+    # Fin du renouvellement
+    os.remove(f"{file}.old")
 
 # Initialisation de variables
 FOLDER_PATH = "DB" # Dossier contenant la BDD
-FILE = 'key.txt'  # Fichier contenant la clé de cryptage
\ No newline at end of file
+FILE = 'key.txt'  # Fichier contenant la clé de cryptage
+LOCK_FILE = ".lock"               # Fichier de verrou de la BDD, dans le sous-dossier du manifeste (cf. databaseLock)
+DATABASE_LOCKS = {}               # Verrous des BDD du processus : chemin du fichier de verrou -> DatabaseLock
+DATABASE_LOCKS_GUARD = threading.Lock() # Verrou de la création des verrous des BDD
+MANIFEST_FOLDER = "keys"          # Sous-dossier de la BDD contenant le manifeste (ignoré par le cryptage)
+MANIFEST_FILE = "manifest.json"   # Manifeste des clés de données enveloppées
+MANIFEST_CACHE = {}               # Manifestes déjà lus : chemin -> ((inode, date de modification, taille), manifeste)
+REFRESH_CHUNK = 64                # Nombre d'images recryptées entre deux écritures du manifeste
+BULK_WORKERS = min(32, (os.cpu_count() or 1) + 4) # Nombre de threads par défaut du cryptage en masse (traitement limité par les lectures/écritures)
+STREAM_MAGIC = b"FPS\x01"          # Début des images cryptées par blocs (les images au format Fernet commencent par "gAAAAA")
+STREAM_INFO = b"fingerprint-recognition stream v1" # Contexte de la dérivation de la clé AES à partir de la clé de données
+STREAM_PREFIX = 7                 # Taille du début aléatoire des nonces (+ 4 octets de numéro de bloc + 1 octet de fin)
+STREAM_HEADER = len(STREAM_MAGIC) + 4 + STREAM_PREFIX # Taille de l'en-tête (STREAM_MAGIC, taille des blocs, début des nonces)
+STREAM_TAG = 16                   # Taille du code d'authentification de chaque bloc
+STREAM_CHUNK = 1 << 16            # Taille des blocs (64 Kio)
+STREAM_MAX_CHUNK = 1 << 24        # Taille maximale des blocs acceptée au décryptage (16 Mio)
+
+# Verrous recréés dans les processus créés par fork (ex : ProcessPoolExecutor)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=resetLocks)
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file descriptors.py
+#
+# @brief Descripteurs des minuties (codes cylindriques binaires) et comparaison par comptage de bits.
+#
+# EXPLICATION :
+#   -- Les minuties sont extraites du squelette d'un pixel d'épaisseur des crêtes (thinning.thin) : terminaisons (crossing number = 1) et bifurcations (crossing number = 3).
+#   -- Chaque minutie est décrite par sa position, l'orientation locale des crêtes (tenseur de structure, modulo pi) et son type.
+#   -- Son voisinage est codé par un cylindre (Minutia Cylinder-Code) : une grille de NS x NS cellules orientée selon la minutie, chaque cellule étant découpée en ND secteurs d'orientation.
+#      Un bit vaut 1 si des minuties voisines d'orientation relative proche du secteur se trouvent près de la cellule. Le cylindre est rangé dans WORDS entiers de 64 bits.
+#   -- Un second vecteur de bits indique les cellules valides (dans le cercle de rayon RADIUS et sur l'empreinte) : deux cylindres ne sont comparés que sur leurs cellules valides communes.
+#   -- La similarité de deux cylindres est 1 - |a xor b| / (|a| + |b|), où |.| est le nombre de bits à 1 (np.bitwise_count), calculée mot par mot sur toutes les paires de cylindres à la fois.
+#   -- Le score de deux empreintes est la moyenne des meilleures similarités (Local Similarity Sort) des paires de minuties mutuellement les plus similaires.
+#   -- Une empreinte est comparée à toute une BDD (Gallery) en une fois : les cylindres de la BDD sont rangés mot par mot dans des tableaux contigus, sans boucle Python par empreinte ni appel à OpenCV.
+#
+# @section Description
+# Descripteurs réalisés avec numpy et OpenCV
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - cv2 extern library (https://pypi.org/project/opencv-python/)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import cv2
+
+# Import des autres fichiers
+import thinning
+
+def popcount(words):
+    """! Nombre de bits à 1
+
+    @param words: Entiers de 64 bits
+    @type words: Tableau de uint64
+
+    @return: Nombre de bits à 1 de chaque entier
+    @rtype: Tableau d'entiers
+
+    """
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+
+    # numpy < 2.0 : table des 256 octets possibles
+    counts = POPCOUNT_TABLE[np.ascontiguousarray(words).view(np.uint8)]
+
+    return counts.reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+def foreground_mask(binarized):
+    """! Zone de l'empreinte
+
+    Fonction pour délimiter la zone de l'image couverte par des crêtes (les minuties en dehors ou au bord de cette zone sont des fins de crêtes artificielles).
+
+    @param binarized: Image binarisée (crêtes noires sur fond blanc)
+    @type binarized: Tableau d'image
+
+    @return: Masque de l'empreinte
+    @rtype: Tableau de bool
+
+    """
+
+    # Densité de crêtes autour de chaque pixel
+    density = cv2.blur((binarized < 128).astype(np.float32), (MASK_BLOCK, MASK_BLOCK), borderType=cv2.BORDER_CONSTANT)
+    mask = (density > MASK_DENSITY).astype(np.uint8)
+
+    # Retrait d'une marge au bord de l'empreinte
+    mask = cv2.erode(mask, np.ones((MASK_MARGIN, MASK_MARGIN), np.uint8), borderType=cv2.BORDER_CONSTANT, borderValue=0)
+
+    return mask.astype(bool)
+
+def orientation_field(binarized):
+    """! Orientation locale des crêtes
+
+    @param binarized: Image binarisée
+    @type binarized: Tableau d'image
+
+    @return: Orientation des crêtes en chaque pixel (en radians, dans [0, pi))
+    @rtype: Tableau de réels
+
+    """
+
+    # Tenseur de structure lissé (les gradients sont perpendiculaires aux crêtes)
+    image = binarized.astype(np.float32)
+    gx = cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=3)
+    gxx = cv2.GaussianBlur(gx * gx, (0, 0), ORIENTATION_SIGMA)
+    gyy = cv2.GaussianBlur(gy * gy, (0, 0), ORIENTATION_SIGMA)
+    gxy = cv2.GaussianBlur(gx * gy, (0, 0), ORIENTATION_SIGMA)
+
+    return np.mod(0.5 * np.arctan2(2 * gxy, gxx - gyy) + np.pi / 2, np.pi)
+
+def extract_minutiae(binarized, mask=None):
+    """! Extraction des minuties
+
+    @param binarized: Image binarisée (crêtes noires sur fond blanc)
+    @type binarized: Tableau d'image
+
+    @param mask: Zone de l'empreinte (foreground_mask par défaut)
+    @type mask: Tableau de bool
+
+    @return: Coordonnées x, y et type (ENDING ou BIFURCATION) des minuties
+    @rtype: Tuple (Tableau de int, Tableau de int, Tableau de uint8)
+
+    """
+
+    mask = foreground_mask(binarized) if mask is None else mask
+
+    # Squelette d'un pixel d'épaisseur et code du voisinage de chaque pixel (même codage que thinning)
+    ridges = np.pad(thinning.thin(binarized, SKELETON_METHOD) > 0, 1)
+    rows, cols = binarized.shape
+    codes = np.zeros((rows, cols), np.uint8)
+    for k, (di, dj) in enumerate(thinning.NEIGHBOURS):
+        codes |= ridges[1 + di:rows + 1 + di, 1 + dj:cols + 1 + dj].astype(np.uint8) << k
+
+    # Crossing number de chaque pixel du squelette
+    crossing = CROSSING_TABLE[codes]
+    ridges = ridges[1:-1, 1:-1] & mask
+    y, x = np.nonzero(ridges & ((crossing == 1) | (crossing == 3)))
+    kind = np.where(crossing[y, x] == 1, ENDING, BIFURCATION).astype(np.uint8)
+
+    # Suppression des minuties trop proches (petites branches, crêtes interrompues)
+    if len(x) > 1:
+        distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        np.fill_diagonal(distance, np.inf)
+        keep = distance.min(axis=1) >= MIN_DISTANCE
+        x, y, kind = x[keep], y[keep], kind[keep]
+
+    return x, y, kind
+
+def cell_centers():
+    """! Centres des cellules d'un cylindre
+
+    @return: Coordonnées des centres des NS x NS cellules relativement à la minutie (axe x selon son orientation)
+    @rtype: Tableau de réels (NS * NS, 2)
+
+    """
+
+    offsets = (np.arange(NS) - (NS - 1) / 2) * (2 * RADIUS / NS)
+    u, v = np.meshgrid(offsets, offsets)
+
+    return np.stack((u.ravel(), v.ravel()), axis=1)
+
+def angle_difference(a, b):
+    """! Différence de deux orientations
+
+    @return: Différence a - b ramenée dans [-pi/2, pi/2) (orientations modulo pi)
+    @rtype: Réel ou Tableau de réels
+
+    """
+
+    return np.mod(a - b + np.pi / 2, np.pi) - np.pi / 2
+
+def encode(x, y, angles, mask):
+    """! Codage des cylindres
+
+    @param x: Abscisses des minuties
+    @type x: Tableau de int
+
+    @param y: Ordonnées des minuties
+    @type y: Tableau de int
+
+    @param angles: Orientations des minuties (modulo pi)
+    @type angles: Tableau de réels
+
+    @param mask: Zone de l'empreinte
+    @type mask: Tableau de bool
+
+    @return: Bits des cylindres, bits des (cellule, secteur) valides (WORDS entiers de 64 bits par minutie), bits des cellules valides (CELL_WORDS entiers de 64 bits par minutie) et cylindres exploitables
+    @rtype: Tuple (Tableau de uint64, Tableau de uint64, Tableau de uint64, Tableau de bool)
+
+    """
+
+    n = len(x)
+    rows, cols = mask.shape
+    positions = np.stack((x, y), axis=1).astype(np.float32)
+
+    # Centres des cellules de chaque cylindre, orientés selon la minutie (n, NS * NS, 2)
+    cos, sin = np.cos(angles).astype(np.float32), np.sin(angles).astype(np.float32)
+    rotation = np.stack((np.stack((cos, -sin), axis=1), np.stack((sin, cos), axis=1)), axis=1)
+    centers = positions[:, None, :] + CELLS @ rotation.transpose(0, 2, 1)
+
+    # Cellules valides : dans le cercle du cylindre et sur l'empreinte
+    cx = np.clip(np.rint(centers[..., 0]).astype(int), 0, cols - 1)
+    cy = np.clip(np.rint(centers[..., 1]).astype(int), 0, rows - 1)
+    inside = (centers[..., 0] >= 0) & (centers[..., 0] < cols) & (centers[..., 1] >= 0) & (centers[..., 1] < rows)
+    valid = CELL_IN_CIRCLE[None, :] & inside & mask[cy, cx]
+
+    # Minuties voisines de chaque minutie (seules à contribuer à son cylindre), complétées par des voisines fictives sans contribution (n, k)
+    neighbours = ((positions[:, None, :] - positions[None, :, :]) ** 2).sum(axis=-1) <= (RADIUS + 3 * SIGMA_S) ** 2
+    np.fill_diagonal(neighbours, False)
+    counts = neighbours.sum(axis=1)
+    k = max(1, int(counts.max(initial=0)))
+    index = np.argsort(~neighbours, axis=1, kind='stable')[:, :k]
+    present = np.take_along_axis(neighbours, index, axis=1)
+
+    # Contribution spatiale de chaque voisine à chaque cellule (densité gaussienne, n, NS * NS, k)
+    dx = centers[:, :, None, 0] - positions[index, 0][:, None, :]
+    dy = centers[:, :, None, 1] - positions[index, 1][:, None, :]
+    spatial = np.exp((dx * dx + dy * dy) * np.float32(-1 / (2 * SIGMA_S ** 2))) * np.float32(1 / (SIGMA_S * np.sqrt(2 * np.pi)))
+
+    # Contribution de l'orientation relative de chaque voisine à chaque secteur (aire de la gaussienne sur le secteur, n, k, ND)
+    relative = angle_difference(angles[index], angles[:, None])
+    deviation = angle_difference(relative[:, :, None], SECTORS[None, None, :])
+    directional = np.exp(deviation ** 2 / np.float32(-2 * SIGMA_D ** 2)) * np.float32(np.pi / ND / (SIGMA_D * np.sqrt(2 * np.pi)))
+    directional *= present[:, :, None]
+
+    # Valeur de chaque (cellule, secteur) puis seuillage (n, NS * NS, ND)
+    values = np.matmul(spatial, directional)
+    bits = (values >= BIT_THRESHOLD) & valid[:, :, None]
+
+    # Cylindres exploitables : assez de cellules valides et de minuties voisines
+    usable = (valid.sum(axis=1) >= MIN_VALID_CELLS * CELL_IN_CIRCLE.sum()) & (counts >= MIN_NEIGHBOURS)
+
+    return pack(bits.reshape(n, -1)), pack(np.repeat(valid, ND, axis=1)), pack(valid), usable
+
+def pack(bits):
+    """! Rangement de bits dans des entiers de 64 bits
+
+    @param bits: Bits de chaque ligne (nombre de bits multiple de 64)
+    @type bits: Tableau de bool (n, k * 64)
+
+    @return: Bits rangés
+    @rtype: Tableau de uint64 (n, k)
+
+    """
+
+    return np.ascontiguousarray(np.packbits(bits, axis=1, bitorder='little')).view(np.uint64).reshape(len(bits), -1)
+
+def template(binarized):
+    """! Descripteurs d'une empreinte
+
+    @param binarized: Image binarisée (crêtes noires sur fond blanc)
+    @type binarized: Tableau d'image
+
+    @return: Une ligne par minutie (x, y, angle, kind, bits, valid, cells)
+    @rtype: Tableau structuré (TEMPLATE_DTYPE)
+
+    """
+
+    mask = foreground_mask(binarized)
+    x, y, kind = extract_minutiae(binarized, mask)
+    angles = orientation_field(binarized)[y, x].astype(np.float32)
+    bits, valid, cells, usable = encode(x, y, angles, mask)
+
+    result = np.zeros(int(usable.sum()), TEMPLATE_DTYPE)
+    result["x"], result["y"], result["angle"], result["kind"] = x[usable], y[usable], angles[usable], kind[usable]
+    result["bits"], result["valid"], result["cells"] = bits[usable], valid[usable], cells[usable]
+
+    return result
+
+def similarities(probe, bits, valid, cells, angles):
+    """! Similarités des cylindres
+
+    @param probe: Descripteurs de l'empreinte à traiter
+    @type probe: Tableau structuré (TEMPLATE_DTYPE)
+
+    @param bits: Bits des cylindres comparés (un mot de 64 bits par ligne)
+    @type bits: Tableau de uint64 (WORDS, m)
+
+    @param valid: Bits des (cellule, secteur) valides des cylindres comparés
+    @type valid: Tableau de uint64 (WORDS, m)
+
+    @param cells: Bits des cellules valides des cylindres comparés
+    @type cells: Tableau de uint64 (CELL_WORDS, m)
+
+    @param angles: Orientations des minuties comparées
+    @type angles: Tableau de réels (m,)
+
+    @return: Similarité de chaque cylindre de l'empreinte avec chaque cylindre comparé (0 si non comparables)
+    @rtype: Tableau de réels (n, m)
+
+    """
+
+    shape = (len(probe), len(angles))
+
+    # Paires comparables : orientations proches et assez de cellules valides communes
+    common = np.zeros(shape, np.uint16)
+    for word in range(CELL_WORDS):
+        common += popcount(probe["cells"][:, word, None] & cells[None, word, :])
+    comparable = (common >= MIN_COMMON_CELLS * CELL_IN_CIRCLE.sum()) & (np.abs(angle_difference(probe["angle"][:, None], angles[None, :])) <= MAX_ANGLE)
+
+    # Sur les cellules valides communes, 1 - |a ^ b| / (|a| + |b|) = 2 |a & b| / (|a| + |b|) : les bits d'un cylindre étant nuls hors de ses cellules valides, seuls les bits de l'un sont à restreindre aux cellules valides de l'autre
+    shared = np.zeros(shape, np.uint16)
+    norms = np.zeros(shape, np.uint16)
+    for word in range(WORDS):
+        a, b = probe["bits"][:, word, None], bits[None, word, :]
+        shared += popcount(a & b)
+        norms += popcount(a & valid[None, word, :])
+        norms += popcount(b & probe["valid"][:, word, None])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(comparable & (norms > 0), 2 * shared / norms, 0.0)
+
+def pairs_number(n, m):
+    """! Nombre de similarités moyennées (Local Similarity Sort)
+
+    @return: Nombre de meilleures similarités retenues pour des empreintes de n et m minuties
+    @rtype: Tableau de int
+
+    """
+
+    sigmoid = 1 / (1 + np.exp(-LSS_TAU * (np.minimum(n, m) - LSS_MU)))
+
+    return np.minimum(LSS_MIN + np.rint(sigmoid * (LSS_MAX - LSS_MIN)).astype(int), np.minimum(n, m))
+
+def score(probe, reference):
+    """! Score de deux empreintes
+
+    @param probe: Descripteurs de l'empreinte à traiter
+    @type probe: Tableau structuré (TEMPLATE_DTYPE)
+
+    @param reference: Descripteurs de l'empreinte de référence
+    @type reference: Tableau structuré (TEMPLATE_DTYPE)
+
+    @return: Score entre 0 et 1
+    @rtype: float
+
+    """
+
+    gallery = Gallery([reference])
+
+    return float(gallery.scores(probe)[0])
+
+class Gallery:
+    """! Descripteurs d'une BDD
+
+    Classe regroupant les cylindres de toutes les empreintes de la BDD dans des tableaux contigus, pour comparer une empreinte à toute la BDD en une fois.
+
+    """
+
+    def __init__(self, templates):
+        """! Création de la BDD de descripteurs
+
+        @param templates: Descripteurs de chaque empreinte de la BDD
+        @type templates: Tableau de Tableau structuré (TEMPLATE_DTYPE)
+
+        """
+
+        counts = np.array([len(t) for t in templates], np.int64)
+        joined = np.concatenate(templates) if len(templates) else np.zeros(0, TEMPLATE_DTYPE)
+
+        self.size = len(templates)                                  # Nombre d'empreintes
+        self.counts = counts                                        # Nombre de minuties de chaque empreinte
+        self.offsets = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(counts) else counts # Premier cylindre de chaque empreinte
+        self.owners = np.repeat(np.arange(self.size), counts)       # Empreinte de chaque cylindre
+        self.bits = np.ascontiguousarray(joined["bits"].T)          # Bits des cylindres (un mot de 64 bits par ligne, contigus pour tous les cylindres)
+        self.valid = np.ascontiguousarray(joined["valid"].T)        # Bits des (cellule, secteur) valides
+        self.cells = np.ascontiguousarray(joined["cells"].T)        # Bits des cellules valides
+        self.angles = np.ascontiguousarray(joined["angle"])         # Orientations des minuties
+
+    def chunks(self, n):
+        """! Découpage de la BDD en blocs d'empreintes entières
+
+        @param n: Nombre de minuties de l'empreinte à traiter
+        @type n: int
+
+        @return: Indices de la première et (exclu) de la dernière empreinte de chaque bloc (environ GALLERY_CHUNK paires de cylindres par bloc)
+        @rtype: Générateur de Tuple (int, int)
+
+        """
+
+        ends = self.offsets + self.counts
+        first = 0
+        while first < self.size:
+            last = max(first + 1, int(np.searchsorted(ends, self.offsets[first] + max(1, GALLERY_CHUNK // n), side="right")))
+            yield first, last
+            first = last
+
+    def scores(self, probe):
+        """! Comparaison d'une empreinte à toute la BDD
+
+        @param probe: Descripteurs de l'empreinte à traiter
+        @type probe: Tableau structuré (TEMPLATE_DTYPE)
+
+        @return: Score de chaque empreinte de la BDD (entre 0 et 1)
+        @rtype: Tableau de réels
+
+        """
+
+        result = np.zeros(self.size)
+        if len(probe) == 0 or len(self.angles) == 0:
+            return result
+
+        # Similarité de chaque minutie de l'empreinte avec sa minutie associée dans chaque empreinte de la BDD
+        best = np.zeros((len(probe), self.size))
+        for first, last in self.chunks(len(probe)):
+            start, stop = self.offsets[first], self.offsets[last - 1] + self.counts[last - 1]
+            if start == stop:
+                continue
+            local = similarities(probe, self.bits[:, start:stop], self.valid[:, start:stop], self.cells[:, start:stop], self.angles[start:stop])
+
+            # Cylindres consécutifs de chaque empreinte du bloc (empreintes sans minutie exclues)
+            owners = self.owners[start:stop]
+            segments = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            columns = np.repeat(np.arange(len(segments)), np.diff(np.r_[segments, len(owners)]))
+
+            # Seules les paires dont chaque minutie est la plus similaire à l'autre sont associées (une minutie ne compte qu'une fois)
+            rows = np.maximum.reduceat(local, segments, axis=1)
+            mutual = (local > 0) & (local == rows[:, columns]) & (local == local.max(axis=0))
+            best[:, owners[segments]] = np.maximum.reduceat(np.where(mutual, local, 0), segments, axis=1)
+
+        # Moyenne des meilleures similarités de chaque empreinte (empreintes sans minutie : score nul)
+        ranked = -np.sort(-best, axis=0)
+        cumulated = np.cumsum(ranked, axis=0)
+        pairs = pairs_number(len(probe), self.counts)
+        filled = pairs > 0
+        result[filled] = cumulated[pairs[filled] - 1, np.flatnonzero(filled)] / pairs[filled]
+
+        return result
+
+# Initialisation de variables
+SKELETON_METHOD = "zhang_suen" # Squelettisation utilisée pour extraire les minuties
+ENDING = 1                     # Type des terminaisons
+BIFURCATION = 3                # Type des bifurcations
+MASK_BLOCK = 31                # Taille de la fenêtre de densité de crêtes (en pixels)
+MASK_DENSITY = 0.15            # Densité de crêtes minimale de l'empreinte
+MASK_MARGIN = 25               # Marge retirée au bord de l'empreinte (en pixels)
+ORIENTATION_SIGMA = 7.0        # Lissage du tenseur de structure (en pixels)
+MIN_DISTANCE = 6               # Distance minimale entre deux minuties (en pixels)
+RADIUS = 70                    # Rayon des cylindres (en pixels, empreintes à 500 dpi)
+NS = 16                        # Nombre de cellules du cylindre sur chaque axe
+ND = 6                         # Nombre de secteurs d'orientation de chaque cellule
+SIGMA_S = 28 / 3               # Écart-type de la contribution spatiale (en pixels)
+SIGMA_D = np.pi / 9            # Écart-type de la contribution de l'orientation (en radians)
+BIT_THRESHOLD = 0.01           # Valeur minimale d'un (cellule, secteur) pour que son bit vaille 1
+MIN_VALID_CELLS = 0.75         # Proportion minimale de cellules valides d'un cylindre exploitable
+MIN_NEIGHBOURS = 2             # Nombre minimal de minuties voisines d'un cylindre exploitable
+MIN_COMMON_CELLS = 0.6         # Proportion minimale de cellules valides communes de deux cylindres comparables
+MAX_ANGLE = np.pi / 4          # Différence d'orientation maximale de deux minuties comparables
+LSS_MIN, LSS_MAX = 4, 12       # Nombre minimal et maximal de similarités moyennées
+LSS_MU, LSS_TAU = 20, 0.4      # Paramètres de la sigmoïde donnant le nombre de similarités moyennées
+GALLERY_CHUNK = 1 << 16        # Nombre de paires de cylindres comparées à la fois
+WORDS = NS * NS * ND // 64     # Nombre d'entiers de 64 bits par cylindre
+CELL_WORDS = NS * NS // 64     # Nombre d'entiers de 64 bits des cellules valides d'un cylindre
+CELLS = cell_centers().astype(np.float32)                                        # Centres des cellules relativement à la minutie
+CELL_IN_CIRCLE = np.hypot(CELLS[:, 0], CELLS[:, 1]) <= RADIUS                     # Cellules dans le cercle du cylindre
+SECTORS = (-np.pi / 2 + (np.arange(ND) + 0.5) * np.pi / ND).astype(np.float32)    # Orientation relative au centre de chaque secteur
+CROSSING_TABLE = np.array([sum(((code >> k) & 1) != ((code >> ((k + 1) % 8)) & 1) for k in range(8)) // 2 for code in range(256)], np.uint8) # Crossing number de chaque code de voisinage
+POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], np.uint8) # Nombre de bits à 1 de chaque octet
+TEMPLATE_DTYPE = np.dtype([("x", np.int16), ("y", np.int16), ("angle", np.float32), ("kind", np.uint8), ("bits", np.uint64, (WORDS,)), ("valid", np.uint64, (WORDS,)), ("cells", np.uint64, (CELL_WORDS,))]) # Descripteurs d'une minutie
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file enrollment.py
+#
+# @brief Journal des enrôlements et des suppressions de la BDD.
+#
+# EXPLICATION :
+#   -- Enrôler ou supprimer une personne ne réécrit ni DB.csv, ni le stockage binaire des minuties, ni les autres images : une ligne JSON est ajoutée à la fin du journal <BDD>/journal/journal.jsonl.
+#   -- Une ligne "add" contient l'image, la personne et ses minuties pour chaque méthode de binarisation, une ligne "delete" (tombstone) masque une image ou toutes les images d'une personne.
+#   -- Un enrôlement en masse (cf. project.enroll_batch) est écrit en une seule ligne "batch" : il est visible en entier ou pas du tout.
+#   -- Chaque ligne est écrite en une seule fois puis synchronisée sur le disque : après un arrêt brutal, seule la dernière ligne peut être incomplète, elle est ignorée à la lecture et retirée avant l'ajout suivant.
+#   -- La BDD lue par la reconnaissance (cf. project.db_entries) est la BDD de base (stockage binaire ou DB.csv) sans les entrées masquées, suivie des entrées ajoutées par le journal.
+#   -- La compaction (cf. compact, planifiée par maintenance.py) intègre le journal à la BDD de base, supprime les images des entrées supprimées puis vide le journal.
+#   -- Relire le journal sur la BDD compactée donne le même résultat : une compaction interrompue est simplement refaite au passage suivant.
+#   -- Les ajouts au journal et la compaction se font sous le verrou de la BDD (cryptage.databaseLock), partagé avec le cryptage et le renouvellement de la clé : aucune ligne ne peut être ajoutée entre la lecture du journal par la compaction et son remplacement, même depuis un autre processus.
+#   -- Exécuté en ligne de commande, ce programme enrôle en masse les images listées par des fichiers CSV (chemin de l'image;personne[;nom dans la BDD]).
+#
+# @section Description
+# Journal réalisé avec les librairies json et os
+#
+# @section Libraries/Modules
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - csv standard library (https://docs.python.org/3/library/csv.html?highlight=csv#module-csv)
+# - ast standard library (https://docs.python.org/3/library/ast.html?highlight=ast#module-ast)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import os, csv, ast, json, argparse
+
+# Import des autres fichiers
+import cryptage
+import minutiae_store
+import classification
+import tracing
+
+class Journal:
+    """! Journal relu
+
+    Classe regroupant l'effet des lignes du journal sur la BDD de base.
+
+    """
+
+    def __init__(self, lines):
+        """! Relecture du journal
+
+        @param lines: Lignes complètes du journal (dans l'ordre d'écriture)
+        @type lines: Tableau de bytes
+
+        """
+
+        self.records = 0              # Nombre de lignes valides
+        self.added = {}               # Entrées ajoutées encore présentes : image -> (personne, minuties de chaque méthode), dans l'ordre d'enrôlement
+        self.enrolled = set()         # Images ajoutées par le journal (même supprimées depuis)
+        self.deleted_images = set()   # Images de la BDD de base masquées
+        self.deleted_persons = set()  # Personnes dont les images de la BDD de base sont masquées
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+
+            # Un lot est appliqué opération par opération
+            for operation in record["records"] if record.get("op") == "batch" else [record]:
+                self.apply(operation)
+
+    def apply(self, record):
+        """! Application d'une opération du journal
+
+        @param record: Opération (add ou delete)
+        @type record: Dictionnaire
+
+        """
+
+        self.records += 1
+
+        if record.get("op") == "add":
+            self.added.pop(record["image"], None)
+            self.added[record["image"]] = (record["person"], record["minutiae"])
+            self.enrolled.add(record["image"])
+        elif record.get("op") == "delete" and record.get("image") is not None:
+            self.added.pop(record["image"], None)
+            self.deleted_images.add(record["image"])
+        elif record.get("op") == "delete" and record.get("person") is not None:
+            for image in [image for image, (person, _) in self.added.items() if person == record["person"]]:
+                del self.added[image]
+            self.deleted_persons.add(record["person"])
+
+    def hides(self, image, person):
+        """! Entrée de la BDD de base masquée
+
+        @param image: Nom de l'image
+        @type image: String
+
+        @param person: Personne associée
+        @type person: String
+
+        @return: Vrai si l'entrée a été supprimée ou remplacée par une entrée du journal
+        @rtype: bool
+
+        """
+
+        return image in self.added or image in self.deleted_images or person in self.deleted_persons
+
+    def entries(self, method):
+        """! Entrées ajoutées par le journal
+
+        @param method: Méthode de binarisation
+        @type method: String
+
+        @return: Itérateur sur (image, personne, minuties)
+        @rtype: Générateur
+
+        """
+
+        m = minutiae_store.METHODS.index(method)
+
+        for image, (person, minutiae) in self.added.items():
+            yield image, person, [tuple(point) for point in minutiae[m]]
+
+def journal_path(folder_db):
+    """! Chemin du journal
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @return: Chemin de <BDD>/journal/journal.jsonl
+    @rtype: String
+
+    """
+
+    return os.path.join(folder_db, JOURNAL_FOLDER, JOURNAL_FILE)
+
+def read_journal(folder_db):
+    """! Lecture du journal
+
+    Fonction pour relire le journal. Il n'est relu que s'il a été modifié depuis la dernière lecture.
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @return: Journal relu (vide s'il n'existe pas)
+    @rtype: Journal
+
+    """
+
+    path = journal_path(folder_db)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return EMPTY_JOURNAL
+
+    # Journal déjà lu et non modifié depuis (une compaction remplace le fichier, donc son inode)
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = JOURNAL_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # La dernière ligne est ignorée si elle est incomplète (arrêt pendant son écriture)
+    journal = Journal(data.split(b"\n")[:-1])
+    JOURNAL_CACHE[path] = (version, journal)
+
+    return journal
+
+def append_record(folder_db, record):
+    """! Ajout d'une ligne au journal
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param record: Ligne à ajouter
+    @type record: Dictionnaire
+
+    """
+
+    path = journal_path(folder_db)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+    # Journal ouvert sous le verrou : une compaction ne peut pas le remplacer entre l'ouverture et l'écriture
+    with cryptage.databaseLock(folder_db):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            # Retrait d'une dernière ligne incomplète (sinon la nouvelle ligne lui serait accolée)
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                with open(path, 'rb') as f:
+                    os.ftruncate(fd, f.read().rfind(b"\n") + 1)
+
+            # Ligne écrite en entier (une seule écriture sauf pour un très grand lot), synchronisée avant de rendre la main
+            view = memoryview(line)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    tracing.count("journal_records")
+
+def record_enrollment(folder_db, image, person, minutiae):
+    """! Enrôlement d'une image
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param image: Nom de l'image (déjà cryptée dans la BDD)
+    @type image: String
+
+    @param person: Personne associée
+    @type person: String
+
+    @param minutiae: Minuties de l'image pour chaque méthode de binarisation (ordre de minutiae_store.METHODS)
+    @type minutiae: Tableau de Tableau de coordonnées (x, y)
+
+    """
+
+    append_record(folder_db, add_record(image, person, minutiae))
+
+def record_enrollments(folder_db, entries):
+    """! Enrôlement d'un lot d'images
+
+    Fonction pour ajouter un lot d'enrôlements au journal en une seule ligne (le lot est visible en entier ou pas du tout).
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param entries: Image (déjà cryptée dans la BDD), personne et minuties de chaque méthode de binarisation
+    @type entries: Tableau de Tuple
+
+    """
+
+    if entries:
+        append_record(folder_db, {"op": "batch", "records": [add_record(image, person, minutiae) for image, person, minutiae in entries]})
+
+def add_record(image, person, minutiae):
+    """! Opération d'enrôlement
+
+    @param image: Nom de l'image
+    @type image: String
+
+    @param person: Personne associée
+    @type person: String
+
+    @param minutiae: Minuties de l'image pour chaque méthode de binarisation (ordre de minutiae_store.METHODS)
+    @type minutiae: Tableau de Tableau de coordonnées (x, y)
+
+    @return: Ligne "add" du journal
+    @rtype: Dictionnaire
+
+    """
+
+    return {"op": "add", "image": image, "person": person, "minutiae": [[[int(x), int(y)] for x, y in points] for points in minutiae]}
+
+def record_removal(folder_db, person=None, image=None):
+    """! Suppression d'une personne ou d'une image
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param person: Personne dont toutes les images sont supprimées
+    @type person: String
+
+    @param image: Image supprimée (si person n'est pas donnée)
+    @type image: String
+
+    """
+
+    if person is None and image is None:
+        raise ValueError("Personne ou image à supprimer absente.")
+
+    append_record(folder_db, {"op": "delete", "person": person} if person is not None else {"op": "delete", "image": image})
+
+def compact(folder_db, file_db):
+    """! Compaction du journal
+
+    Fonction pour intégrer le journal à la BDD de base (tâche de fond, cf. maintenance.py).
+
+    EXPLICATION :
+    -- La BDD de base (DB.csv et stockage binaire s'il existe) est réécrite avant que le journal ne soit vidé, puis les images supprimées (et leurs clés de données) sont retirées.
+    -- Les lignes de DB.csv conservées sont recopiées telles quelles, sans analyse des minuties.
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param file_db: Fichier CSV de la BDD
+    @type file_db: String
+
+    @return: Nombre de lignes du journal intégrées et nombre d'images supprimées
+    @rtype: Tuple (int, int)
+
+    """
+
+    with cryptage.databaseLock(folder_db), tracing.span("compact"):
+        journal = read_journal(folder_db)
+        if not journal.records:
+            return 0, 0
+
+        # BDD de base : image, personne et minuties de chaque méthode (texte de DB.csv ou coordonnées du stockage binaire)
+        csv_path = os.path.join(folder_db, file_db)
+        store = minutiae_store.open_store(os.path.join(folder_db, minutiae_store.STORE_FOLDER))
+        if store is not None:
+            base = [(store.images[i], store.persons[i], [store.minutiae(i, method) for method in minutiae_store.METHODS]) for i in range(len(store))]
+        else:
+            with open(csv_path, 'r', newline='') as file:
+                base = [(elt[0], elt[1], elt[2:2 + len(minutiae_store.METHODS)]) for elt in csv.reader(file, delimiter=';') if elt]
+
+        # BDD compactée
+        rows = [row for row in base if not journal.hides(row[0], row[1])]
+        rows += [(image, person, minutiae) for image, (person, minutiae) in journal.added.items()]
+        kept = {row[0] for row in rows}
+        removed = sorted(({row[0] for row in base} | journal.enrolled) - kept)
+
+        # 1. Réécriture de la BDD de base (fichier temporaire puis remplacement)
+        with open(csv_path + ".tmp", 'w', newline='') as file:
+            writing = csv.writer(file, delimiter=';')
+            for image, person, minutiae in rows:
+                writing.writerow([image, person] + [points if isinstance(points, str) else str([(int(x), int(y)) for x, y in points]) for points in minutiae])
+        os.replace(csv_path + ".tmp", csv_path)
+
+        if store is not None:
+            minutiae_store.write_store(os.path.join(folder_db, minutiae_store.STORE_FOLDER), [row[0] for row in rows], [row[1] for row in rows],
+                                       [[ast.literal_eval(points) if isinstance(points, str) else points for points in row[2]] for row in rows])
+
+        # 2. Retrait des images supprimées (toujours masquées par le journal en cas d'interruption)
+        remove_images(folder_db, removed)
+
+        # 3. Journal vidé
+        path = journal_path(folder_db)
+        open(path + ".tmp", 'wb').close()
+        os.replace(path + ".tmp", path)
+
+    tracing.count("journal_compacted", journal.records)
+
+    return journal.records, len(removed)
+
+def remove_images(folder_db, images):
+    """! Retrait d'images de la BDD
+
+    Fonction pour supprimer des images cryptées ainsi que leurs clés de données et leurs classes.
+
+    @param folder_db: Dossier de la BDD
+    @type folder_db: String
+
+    @param images: Noms des images
+    @type images: Tableau de String
+
+    """
+
+    if not images:
+        return
+
+    with cryptage.databaseLock(folder_db):
+        manifest = cryptage.readManifest(folder_db, True)
+        if manifest is not None and any(image in manifest["files"] for image in images):
+            for image in images:
+                manifest["files"].pop(image, None)
+            cryptage.writeManifest(folder_db, manifest)
+
+        for image in images:
+            try:
+                os.remove(os.path.join(folder_db, image))
+            except FileNotFoundError:
+                pass
+
+    classes = classification.read_classes(folder_db)
+    if any(image in classes for image in images):
+        classification.write_classes(folder_db, {image: value for image, value in classes.items() if image not in images})
+
+# Initialisation de variables
+JOURNAL_FOLDER = "journal"        # Sous-dossier de la BDD contenant le journal (ignoré par le cryptage)
+JOURNAL_FILE = "journal.jsonl"    # Journal des enrôlements et des suppressions (une ligne JSON par opération)
+JOURNAL_CACHE = {}                # Journaux déjà lus : chemin -> ((inode, date de modification, taille), Journal)
+EMPTY_JOURNAL = Journal([])       # Journal d'une BDD sans enrôlement
+
+# Exécute l'enrôlement en masse
+if __name__ == "__main__":
+    import project
+
+    parser = argparse.ArgumentParser(description="Enrôlement en masse d'empreintes dans la BDD.")
+    parser.add_argument("manifests", nargs="+", help="Fichiers CSV des images à enrôler (chemin de l'image;personne[;nom dans la BDD], chemins relatifs au fichier)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument("--db", default="DB", help="Dossier de la BDD")
+    parser.add_argument("--key", default="key.txt", help="Fichier contenant la clé de cryptage")
+    parser.add_argument("--compact", action="store_true", help="Intègre aussitôt le journal à DB.csv")
+    args = parser.parse_args()
+
+    # Images à enrôler (les lignes vides et les commentaires sont ignorés)
+    items = []
+    for manifest in args.manifests:
+        with open(manifest, 'r', newline='', encoding='utf-8') as file:
+            for elt in csv.reader(file, delimiter=';'):
+                if elt and not elt[0].startswith("#"):
+                    items.append((os.path.join(os.path.dirname(manifest), elt[0]), elt[1], elt[2] if len(elt) > 2 and elt[2] else None))
+
+    enrolled, unreadable = project.enroll_batch(items, args.db, args.key, args.workers)
+    print(f"{len(enrolled)} images enrôlées, {len(unreadable)} images illisibles ignorées")
+    for path in unreadable:
+        print(f"  {path}")
+
+    if args.compact:
+        records, removed = compact(args.db, "DB.csv")
+        print(f"{records} opérations du journal intégrées ({removed} images supprimées)")
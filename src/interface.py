@@ -12,7 +12,8 @@
 # - tkinter extern library (https://docs.python.org/fr/3/library/tkinter.html)
 # - PIL extern library (https://he-arc.github.io/livre-python/pillow/index.html)
 # - matplotlib.pyplot extern library (https://matplotlib.org/stable/)
-# - numpy extern library (https://numpy.org/)
+# - threading standard library (https://docs.python.org/3/library/threading.html)
+# - queue standard library (https://docs.python.org/3/library/queue.html)
 #
 # @section todo_doxygen_example TODO
 # - [...]
@@ -28,16 +29,18 @@ import tkinter as tk
 from tkinter import Menu, ttk, filedialog, messagebox
 from PIL import Image, ImageTk
 import matplotlib.pyplot as plt
-import numpy as np
+import threading, queue
 
 # Import des autres fichiers
 import project
 import cryptage
 
 # Définition de variables globales
-file_path = None # Chemin de l'image à traiter
+file_path = None      # Chemin de l'image à traiter
+original_image = None # Image à traiter décodée (réutilisée pour l'affichage, la reconnaissance et l'analyse)
 image_tk = None 
-result = None    # Personne détectée
+result = None         # Résultat de la reconnaissance (project.RecognitionResult)
+worker = None         # Reconnaissance en cours : (thread, file des messages, évènement d'annulation, personnes déjà reconnues)
 
 def showRoot():
     """! Affichage de l'interface
@@ -133,6 +136,8 @@ def showRoot():
             download_button.configure(bg=buttonActivated_color)
             reset_button.configure(bg=button_color)
             data_button.configure(bg=button_color)
+            cancel_button.configure(bg=button_color)
+            status_label.configure(bg=rightCol_color, foreground=text_color)
 
     def on_shortcut_click(event):
         """! Actions du menu
@@ -163,13 +168,14 @@ def showRoot():
         """
 
         # Déclaration de variables globales pour stocker le chemin de l'image à traiter
-        global file_path, image_tk
+        global file_path, image_tk, original_image
 
         # Choix de l'image à traiter
         file_path = filedialog.askopenfilename()
 
-        # Ouverture de l'image
-        image_pil = Image.open(file_path)
+        # Lecture et décodage de l'image (une seule fois, elle n'est plus relue ensuite)
+        original_image = project.load_image(file_path)
+        image_pil = Image.fromarray(original_image)
 
         # Convertion de l'image PIL en PhotoImage (format Tkinter)
         image_tk = ImageTk.PhotoImage(image_pil)
@@ -210,22 +216,114 @@ def showRoot():
     def recognition():
         """! Reconnaissance d'empreinte digitale
 
-        Fonction pour appeler le code afin d'effectuer la reconnaissance d'empreinte digitale à partir des méthodes du fichier project.py
+        Fonction pour lancer la reconnaissance d'empreinte digitale (méthodes du fichier project.py) dans un thread, sans bloquer l'interface.
+
+        EXPLICATION :
+        -- Le thread de reconnaissance ne modifie pas l'interface : il dépose sa progression et son résultat dans une file lue par poll_recognition.
+        -- Le bouton Annuler arrête la recherche entre deux empreintes de la BDD, les personnes déjà reconnues sont conservées.
 
         """
 
-        global result
+        global result, worker
+
+        # Une seule reconnaissance à la fois
+        if worker is not None:
+            return
+
+        # Initialisation de variables
+        messages = queue.Queue()  # Messages du thread de reconnaissance
+        cancel = threading.Event() # Annulation de la recherche
+        params = (original_image, binarisation_combobox.get(), skeletonize_combobox.get(), minutiae_slider.get())
+
+        def run():
+            # Reconnaissance avec la progression transmise à l'interface
+            try:
+                messages.put(("done", project.recognize(*params, progress=lambda *args: messages.put(("progress", args)), cancel=cancel)))
+            except Exception as e:
+                messages.put(("error", e))
+
+        # Mise à jour des éléments de l'interface
+        result = None
+        button_filter.config(state="disabled")
+        data_button.config(state="disabled")
+        cancel_button.config(state="normal")
+        progress_bar.config(value=0, maximum=1)
+        status_var.set("Prétraitement de l'empreinte...")
+
+        worker = (threading.Thread(target=run, name="reconnaissance", daemon=True), messages, cancel, [])
+        worker[0].start()
+        root.after(POLL_INTERVAL, poll_recognition, worker)
+
+    def poll_recognition(current):
+        """! Suivi de la reconnaissance
+
+        Fonction appelée périodiquement par l'interface pour afficher la progression et les personnes déjà reconnues.
+
+        @param current: Reconnaissance suivie
+        @type current: Tuple
+
+        """
+
+        global result, worker
+
+        # La reconnaissance a été abandonnée (réinitialisation de l'interface)
+        if worker is not current:
+            return
+
+        _, messages, _, persons = current
 
-        # Appel de la fonction pour effectuer la reconnaissance d'empreintes
-        result = project.main(file_path, binarisation_combobox.get(), skeletonize_combobox.get(), minutiae_slider.get())
+        try:
+            while True:
+                kind, content = messages.get_nowait()
 
-        # Activation du bouton pour analyser les résultats
-        data_button.config(state="normal")
+                if kind == "progress":
+                    # Progression et résultats partiels
+                    done, total, person, image = content
+                    progress_bar.config(value=done, maximum=total or 1)
+                    if image is not None:
+                        persons.append(person)
+                    status_var.set(f"Empreintes comparées : {done}/{total}" + (f"\nPersonnes reconnues : {', '.join(persons)}" if persons else ""))
+                else:
+                    # Fin de la reconnaissance
+                    worker = None
+                    cancel_button.config(state="disabled")
+                    button_filter.config(state="normal")
 
-        if not result:
-            messagebox.showinfo("Avertissement", "Aucun résultat n'a aboutit avec la reconnaissance.")
-        else:
-            messagebox.showinfo("Avertissement", "Une reconnaissance a été trouvée. Allez voir dans 'Analyse'")
+                    if kind == "error":
+                        result = None
+                        status_var.set("")
+                        messagebox.showerror("Erreur", f"Une erreur s'est produite : {content}")
+                        return
+
+                    result = content
+                    status_var.set(("Reconnaissance annulée. " if result.cancelled else "") + (f"Personnes reconnues : {', '.join(result.persons())}" if result.candidates else "Aucune personne reconnue."))
+
+                    # Activation du bouton pour analyser les résultats
+                    data_button.config(state="normal")
+
+                    if result.cancelled:
+                        messagebox.showinfo("Avertissement", "La reconnaissance a été annulée.")
+                    elif not result.candidates:
+                        messagebox.showinfo("Avertissement", "Aucun résultat n'a aboutit avec la reconnaissance.")
+                    else:
+                        messagebox.showinfo("Avertissement", "Une reconnaissance a été trouvée. Allez voir dans 'Analyse'")
+                    return
+        except queue.Empty:
+            pass
+
+        root.after(POLL_INTERVAL, poll_recognition, current)
+
+    def cancel_recognition():
+        """! Annulation de la reconnaissance
+
+        Fonction pour arrêter la recherche en cours entre deux empreintes de la BDD.
+
+        """
+
+        if worker is not None:
+            worker[2].set()
+            cancel_button.config(state="disabled")
+            status_var.set(status_var.get() + "\nAnnulation...")
 
     def data_recognition():
         """! Affichage des données concernant la reconnaissance
@@ -236,31 +334,23 @@ def showRoot():
 
         global result
 
-        if not result:
-            # Tableau d'images
-            images_data = [
-                {"title": "Image originale", "text": "", "data": np.array(Image.open(file_path))},
-                {"title": "Image binarisée", "text": f"Temps d'exécution : {project.binarized_time}", "data": project.binarized_image},
-                {"title": "Image squelettisée", "text": f"Temps d'exécution : {project.skeleton_time}", "data": project.skeleton_image},
-                {"title": "Minuties de l'empreinte", "text": f"Temps d'exécution : {project.minutiae_time}\nNombre de minuties détectées : {project.minutiae_number}\nNombre de bifurcations : {project.bifurcation_number}", "data": project.minutiae_image}
-            ]
-
-            # Initialisation de variables
-            num_rows = 1 # Nombre de lignes
-            num_cols = 4 # Nombre de colonnes
-        else:
-            # Tableau d'images
-            images_data = [
-                {"title": "Image originale", "text": "", "data": np.array(Image.open(file_path))},
-                {"title": "Image binarisée", "text": f"Temps d'exécution : {project.binarized_time}", "data": project.binarized_image},
-                {"title": "Image squelettisée", "text": f"Temps d'exécution : {project.skeleton_time}", "data": project.skeleton_image},
-                {"title": "Minuties de l'empreinte", "text": f"Temps d'exécution : {project.minutiae_time}\nNombre de minuties détectées : {project.minutiae_number}\nNombre de bifurcations : {project.bifurcation_number}", "data": project.minutiae_image},
-                {"title": "Empreinte détectée", "text": f"Temps d'exécution : {project.detection_time}\nPersonne détectée : {result[0]}", "data": result[1]}
-            ]
-
-            # Initialisation de variables
-            num_rows = 1 # Nombre de lignes
-            num_cols = 5 # Nombre de colonnes
+        # Tableau d'images
+        images_data = [
+            {"title": "Image originale", "text": "", "data": result.original_image},
+            {"title": "Image binarisée", "text": f"Temps d'exécution : {round(result.binarized_time, 4)}", "data": result.binarized_image},
+            {"title": "Image squelettisée", "text": f"Temps d'exécution : {round(result.skeleton_time, 4)}", "data": result.skeleton_image},
+            {"title": "Minuties de l'empreinte", "text": f"Temps d'exécution : {round(result.minutiae_time, 4)}\nNombre de minuties détectées : {result.minutiae_number}\nNombre de bifurcations : {result.bifurcation_number}", "data": result.minutiae_image}
+        ]
+
+        # Initialisation de variables
+        num_rows = 1 # Nombre de lignes
+        num_cols = 4 # Nombre de colonnes
+
+        if result.candidates:
+            # Ajout de la première personne reconnue
+            person, detection_image = result.candidates[0]
+            images_data.append({"title": "Empreinte détectée", "text": f"Temps d'exécution : {round(result.detection_time, 4)}\nPersonne détectée : {person}", "data": detection_image})
+            num_cols = 5
 
         # Création du subplot avec son titre
         fig, axes = plt.subplots(num_rows, num_cols, figsize=(15, 5))
@@ -292,15 +382,16 @@ def showRoot():
 
         """
 
-        # Mise à jour des variables globales du fichier project.py
-        project.binarized_image = None # Image binarisée
-        project.skeleton_image = None # Image squeletisée
-        project.minutiae_image = None # Minuties sur l'image squeletisée
-        project.binarized_time = None # Temps d'exéciton pour la binarisation
-        project.skeleton_time = None # Temps d'exéciton pour la squelettisation
-        project.minutiae_time = None # Temps d'exéciton pour la recherche des minuties
-        project.minutiae_number = None # Nombre de minuties détectées
-        project.bifurcation_number = None # Nombre de minuties de type bifurcation
+        global result, worker
+
+        # Arrêt de la reconnaissance en cours puis suppression du résultat de la reconnaissance précédente
+        if worker is not None:
+            worker[2].set()
+            worker = None
+        result = None
+        status_var.set("")
+        progress_bar.config(value=0)
+        cancel_button.config(state="disabled")
 
         # Mise à jour des éléments de l'interface
         canvas.delete("all")
@@ -414,7 +505,7 @@ def showRoot():
     skeletonize_label.grid(row=0, column=0, columnspan=1, pady=(0, 0), sticky="w")
 
     # Création de la boîte de sélection (combobox)
-    options_skeletonize = ["Filtre Laplacien"]
+    options_skeletonize = ["Filtre Laplacien", "zhang_suen", "guo_hall"]
     selected_option_skeletonize = tk.StringVar()
     skeletonize_combobox = ttk.Combobox(skeletonize_frame, textvariable=selected_option_skeletonize, values=options_skeletonize, state="disabled")
     skeletonize_combobox.grid(row=1, column=0, columnspan=2, pady=(0, 10), sticky="ew")
@@ -494,12 +585,26 @@ def showRoot():
     data_button = tk.Button(button_frame, text="Analyse", command=data_recognition, cursor="hand2", state=tk.DISABLED)
     data_button.grid(row=1, column=2, pady=(0, 10), padx=(10, 0), sticky="s")
 
+    cancel_button = tk.Button(button_frame, text="Annuler", command=cancel_recognition, cursor="hand2", state=tk.DISABLED)
+    cancel_button.grid(row=1, column=3, pady=(0, 10), padx=(10, 0), sticky="s")
+
+    # Barre de progression et personnes reconnues pendant la reconnaissance
+    progress_bar = ttk.Progressbar(button_frame, orient=tk.HORIZONTAL, mode="determinate", length=300)
+    progress_bar.grid(row=2, column=0, columnspan=4, pady=(0, 5), sticky="ew")
+
+    status_var = tk.StringVar()
+    status_label = tk.Label(button_frame, textvariable=status_var, justify=tk.CENTER)
+    status_label.grid(row=3, column=0, columnspan=4, sticky="ew")
+
     # Configuration des colonnes pour le centrage
     tab1.columnconfigure(0, weight=1)
     tab1.columnconfigure(1, weight=1)
 
     root.mainloop()
 
+# Initialisation de variables
+POLL_INTERVAL = 100 # Intervalle de lecture de la progression de la reconnaissance (en millisecondes)
+
 # Exécute la fonction main
 if __name__ == "__main__":
     showRoot()
\ No newline at end of file
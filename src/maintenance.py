@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file maintenance.py
+#
+# @brief Tâches de maintenance planifiées de la BDD.
+#
+# EXPLICATION :
+#   -- Le renouvellement de la clé maître (cryptage.newEncryption) ré-enveloppe les clés de données de la BDD, il n'est pas effectué pendant les reconnaissances.
+#   -- Il est exécuté périodiquement par ce programme (ou depuis une autre application avec start_rotation), la reconnaissance se contentant de lire la BDD.
+#   -- Avec --refresh-age, les images dont la clé de données est plus ancienne sont aussi recryptées progressivement (au plus --refresh-limit images par passage, cf. cryptage.refreshDataKeys).
+#   -- Le journal des enrôlements et des suppressions est intégré à la BDD toutes les --compact-interval secondes (cf. enrollment.compact).
+#
+# @section Description
+# Planification réalisée avec la librairie threading
+#
+# @section Libraries/Modules
+# - threading standard library (https://docs.python.org/3/library/threading.html)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import threading, argparse, time
+
+# Import des autres fichiers
+import cryptage
+import enrollment
+
+def rotate_keys(folder=None, file=None):
+    """! Renouvellement de la clé de cryptage
+
+    Fonction pour renouveler la clé de cryptage de la BDD.
+
+    @param folder: Dossier contenant la BDD (cryptage.FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage (cryptage.FILE par défaut)
+    @type file: String
+
+    @return: Temps d'exécution du renouvellement
+    @rtype: float
+
+    """
+
+    start = time.perf_counter()
+    cryptage.newEncryption(folder, file)
+
+    return time.perf_counter() - start
+
+def refresh_data_keys(max_age=None, limit=None, folder=None, file=None):
+    """! Recryptage progressif de la BDD
+
+    Fonction pour recrypter les images dont la clé de données est la plus ancienne.
+
+    @param max_age: Âge (en secondes) au-delà duquel une clé de données est renouvelée (REFRESH_AGE par défaut)
+    @type max_age: float
+
+    @param limit: Nombre maximal d'images recryptées (REFRESH_LIMIT par défaut)
+    @type limit: int
+
+    @param folder: Dossier contenant la BDD (cryptage.FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage (cryptage.FILE par défaut)
+    @type file: String
+
+    @return: Nombre d'images recryptées et temps d'exécution
+    @rtype: Tuple (int, float)
+
+    """
+
+    start = time.perf_counter()
+    refreshed = cryptage.refreshDataKeys(folder, file, REFRESH_AGE if max_age is None else max_age, limit or REFRESH_LIMIT)
+
+    return refreshed, time.perf_counter() - start
+
+def compact_journal(folder=None, file_db=None):
+    """! Compaction du journal des enrôlements
+
+    @param folder: Dossier contenant la BDD (cryptage.FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file_db: Fichier CSV de la BDD (FILE_DB par défaut)
+    @type file_db: String
+
+    @return: Nombre de lignes du journal intégrées, nombre d'images supprimées et temps d'exécution
+    @rtype: Tuple (int, int, float)
+
+    """
+
+    start = time.perf_counter()
+    records, removed = enrollment.compact(folder or cryptage.FOLDER_PATH, file_db or FILE_DB)
+
+    return records, removed, time.perf_counter() - start
+
+def start_compaction(interval=None, folder=None, file_db=None):
+    """! Planification de la compaction du journal
+
+    Fonction pour lancer la compaction périodique du journal des enrôlements dans un thread en arrière-plan.
+
+    @param interval: Intervalle entre deux compactions en secondes (COMPACTION_INTERVAL par défaut)
+    @type interval: float
+
+    @param folder: Dossier contenant la BDD (cryptage.FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file_db: Fichier CSV de la BDD (FILE_DB par défaut)
+    @type file_db: String
+
+    @return: Évènement permettant d'arrêter la planification
+    @rtype: threading.Event
+
+    """
+
+    # Initialisation de variables
+    interval = interval or COMPACTION_INTERVAL
+    stop = threading.Event()
+
+    def run():
+        # Compaction à chaque intervalle jusqu'à l'arrêt de la planification (sans effet si le journal est vide)
+        while not stop.wait(interval):
+            try:
+                compact_journal(folder, file_db)
+            except Exception as e:
+                print(f"Une erreur s'est produite lors de la compaction du journal : {e}")
+
+    threading.Thread(target=run, name="compaction-journal", daemon=True).start()
+
+    return stop
+
+def start_rotation(interval=None, folder=None, file=None, refresh_age=None, refresh_limit=None):
+    """! Planification du renouvellement du cryptage
+
+    Fonction pour lancer le renouvellement périodique de la clé de cryptage dans un thread en arrière-plan.
+
+    @param interval: Intervalle entre deux renouvellements en secondes (ROTATION_INTERVAL par défaut)
+    @type interval: float
+
+    @param folder: Dossier contenant la BDD (cryptage.FOLDER_PATH par défaut)
+    @type folder: String
+
+    @param file: Fichier contenant la clé de cryptage (cryptage.FILE par défaut)
+    @type file: String
+
+    @param refresh_age: Âge (en secondes) au-delà duquel les images sont recryptées après chaque renouvellement (None = pas de recryptage)
+    @type refresh_age: float
+
+    @param refresh_limit: Nombre maximal d'images recryptées à chaque passage (REFRESH_LIMIT par défaut)
+    @type refresh_limit: int
+
+    @return: Évènement permettant d'arrêter la planification
+    @rtype: threading.Event
+
+    """
+
+    # Initialisation de variables
+    interval = interval or ROTATION_INTERVAL
+    stop = threading.Event()
+
+    def run():
+        # Renouvellement à chaque intervalle jusqu'à l'arrêt de la planification
+        while not stop.wait(interval):
+            try:
+                rotate_keys(folder, file)
+                if refresh_age is not None:
+                    refresh_data_keys(refresh_age, refresh_limit, folder, file)
+            except Exception as e:
+                print(f"Une erreur s'est produite lors du renouvellement du cryptage : {e}")
+
+    threading.Thread(target=run, name="rotation-cle", daemon=True).start()
+
+    return stop
+
+# Initialisation de variables
+ROTATION_INTERVAL = 24 * 60 * 60 # Intervalle par défaut entre deux renouvellements de clé (en secondes)
+REFRESH_AGE = 90 * 24 * 60 * 60  # Âge par défaut au-delà duquel une clé de données est renouvelée (en secondes)
+REFRESH_LIMIT = 1000             # Nombre maximal d'images recryptées par passage
+COMPACTION_INTERVAL = 60 * 60    # Intervalle par défaut entre deux compactions du journal des enrôlements (en secondes)
+FILE_DB = "DB.csv"               # Fichier CSV de la BDD
+
+# Exécute la tâche de maintenance
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renouvellement périodique de la clé de cryptage de la BDD.")
+    parser.add_argument("--interval", type=float, default=ROTATION_INTERVAL, help="Intervalle entre deux renouvellements (en secondes)")
+    parser.add_argument("--once", action="store_true", help="Effectue un seul renouvellement puis s'arrête")
+    parser.add_argument("--refresh-age", type=float, default=None, help="Recrypte aussi les images dont la clé de données a plus de ce nombre de jours")
+    parser.add_argument("--refresh-limit", type=int, default=REFRESH_LIMIT, help="Nombre maximal d'images recryptées par passage")
+    parser.add_argument("--compact-interval", type=float, default=COMPACTION_INTERVAL, help="Intervalle entre deux compactions du journal des enrôlements (en secondes)")
+    args = parser.parse_args()
+
+    # Âge des clés de données en secondes
+    refresh_age = None if args.refresh_age is None else args.refresh_age * 24 * 60 * 60
+
+    if args.once:
+        print(f"Renouvellement effectué en {round(rotate_keys(), 4)} s")
+        if refresh_age is not None:
+            refreshed, duration = refresh_data_keys(refresh_age, args.refresh_limit)
+            print(f"{refreshed} images recryptées en {round(duration, 4)} s")
+        records, removed, duration = compact_journal()
+        print(f"{records} opérations du journal intégrées ({removed} images supprimées) en {round(duration, 4)} s")
+    else:
+        # Renouvellement et compaction périodiques jusqu'à l'interruption du programme
+        stop = start_rotation(args.interval, refresh_age=refresh_age, refresh_limit=args.refresh_limit)
+        stop_compaction = start_compaction(args.compact_interval)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stop.set()
+            stop_compaction.set()
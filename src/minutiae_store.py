@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file minutiae_store.py
+#
+# @brief Stockage binaire des minuties de la BDD.
+#
+# EXPLICATION :
+#   -- DB.csv stocke les minuties sous forme de texte (liste Python) qu'il faut analyser avec ast.literal_eval à chaque reconnaissance.
+#   -- Ici, les coordonnées de toutes les minuties sont stockées à la suite dans un fichier binaire d'entiers 16 bits (minutiae.<génération>.bin), ouvert avec np.memmap : aucune analyse de texte ni copie n'est nécessaire.
+#   -- Un index (minutiae_index.<génération>.npy) donne pour chaque (image, méthode de binarisation) la position et le nombre de minuties dans ce fichier.
+#   -- Les noms des images et des personnes sont stockés dans minutiae_meta.json. Chaque écriture crée de nouveaux fichiers de coordonnées et d'index, référencés par minutiae_meta.json qui est remplacé en dernier : une reconnaissance en cours ne voit jamais un stockage à moitié écrit.
+#   -- Les commandes import et export permettent de passer de DB.csv au stockage binaire et inversement.
+#
+# @section Description
+# Stockage réalisé avec numpy (np.memmap)
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - csv standard library (https://docs.python.org/3/library/csv.html?highlight=csv#module-csv)
+# - ast standard library (https://docs.python.org/3/library/ast.html?highlight=ast#module-ast)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import os, csv, ast, json, argparse, time
+
+class MinutiaeStore:
+    """! Stockage binaire des minuties
+
+    Classe permettant de lire les minuties de la BDD à partir du stockage binaire.
+
+    """
+
+    def __init__(self, folder):
+        """! Ouverture du stockage
+
+        @param folder: Dossier contenant le stockage binaire
+        @type folder: String
+
+        """
+
+        # Lecture des noms des images, des personnes et des méthodes
+        with open(os.path.join(folder, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self.methods = meta["methods"] # Méthodes de binarisation (ordre des colonnes de DB.csv)
+        self.images = meta["images"]   # Noms des images
+        self.persons = meta["persons"] # Personnes associées
+
+        # Ouverture de l'index et des coordonnées sans les charger en mémoire
+        self.index = np.load(os.path.join(folder, meta["index_file"]), mmap_mode='r')
+        if meta["count"] > 0:
+            self.coordinates = np.memmap(os.path.join(folder, meta["data_file"]), dtype=np.int16, mode='r', shape=(meta["count"], 2))
+        else:
+            self.coordinates = np.empty((0, 2), np.int16)
+
+    def __len__(self):
+        return len(self.images)
+
+    def method_index(self, method):
+        """! Colonne d'une méthode de binarisation
+
+        @param method: Méthode de binarisation
+        @type method: String
+
+        @return: Indice de la méthode dans le stockage
+        @rtype: int
+
+        """
+
+        if method not in self.methods:
+            raise ValueError("Méthode de binarisation non reconnue.")
+
+        return self.methods.index(method)
+
+    def minutiae(self, i, method):
+        """! Minuties d'une image
+
+        @param i: Indice de l'image
+        @type i: int
+
+        @param method: Méthode de binarisation
+        @type method: String
+
+        @return: Coordonnées (x, y) des minuties (vue sur le fichier, sans copie)
+        @rtype: Tableau d'entiers de dimension (n, 2)
+
+        """
+
+        offset, count = self.index[i, self.method_index(method)]
+
+        return self.coordinates[offset:offset + count]
+
+    def entries(self, method):
+        """! Parcours de la BDD
+
+        @param method: Méthode de binarisation
+        @type method: String
+
+        @return: Itérateur sur (image, personne, minuties)
+        @rtype: Générateur
+
+        """
+
+        m = self.method_index(method)
+
+        for i in range(len(self.images)):
+            offset, count = self.index[i, m]
+            yield self.images[i], self.persons[i], self.coordinates[offset:offset + count]
+
+def open_store(folder):
+    """! Ouverture du stockage s'il existe
+
+    @param folder: Dossier contenant le stockage binaire
+    @type folder: String
+
+    @return: Stockage ou None s'il n'a pas été créé (utilisation de DB.csv)
+    @rtype: MinutiaeStore
+
+    """
+
+    if not os.path.isfile(os.path.join(folder, META_FILE)):
+        return None
+
+    return MinutiaeStore(folder)
+
+def write_store(folder, images, persons, minutiae, methods=None):
+    """! Écriture du stockage
+
+    Fonction pour écrire le stockage binaire des minuties.
+
+    @param folder: Dossier du stockage
+    @type folder: String
+
+    @param images: Noms des images
+    @type images: Tableau de String
+
+    @param persons: Personnes associées
+    @type persons: Tableau de String
+
+    @param minutiae: Minuties de chaque image pour chaque méthode (minutiae[i][m] = tableau de coordonnées (x, y))
+    @type minutiae: Tableau de Tableau
+
+    @param methods: Méthodes de binarisation (METHODS par défaut)
+    @type methods: Tableau de String
+
+    """
+
+    # Initialisation de variables
+    methods = methods or METHODS
+    index = np.zeros((len(images), len(methods), 2), np.int64) # Position et nombre de minuties de chaque (image, méthode)
+    chunks = []                                                 # Coordonnées à écrire
+    offset = 0                                                  # Position courante dans le fichier de coordonnées
+
+    for i, image_minutiae in enumerate(minutiae):
+        for m in range(len(methods)):
+            coordinates = np.asarray(image_minutiae[m] if m < len(image_minutiae) else [], dtype=np.int16).reshape(-1, 2)
+            index[i, m] = (offset, len(coordinates))
+            chunks.append(coordinates)
+            offset += len(coordinates)
+
+    # Nouveaux fichiers de coordonnées et d'index (les anciens restent lisibles jusqu'au remplacement de la méta-donnée)
+    generation = time.time_ns()
+    meta = {"version": 1, "methods": list(methods), "images": list(images), "persons": list(persons), "count": offset,
+            "data_file": f"minutiae.{generation}.bin", "index_file": f"minutiae_index.{generation}.npy"}
+
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, meta["data_file"]), 'wb') as f:
+        for coordinates in chunks:
+            f.write(coordinates.tobytes())
+    with open(os.path.join(folder, meta["index_file"]), 'wb') as f:
+        np.save(f, index)
+
+    # Écriture dans un fichier temporaire puis remplacement de la méta-donnée (valide l'ensemble)
+    with open(os.path.join(folder, META_FILE + ".tmp"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(os.path.join(folder, META_FILE + ".tmp"), os.path.join(folder, META_FILE))
+
+    # Suppression des anciennes générations
+    for filename in os.listdir(folder):
+        if filename.startswith("minutiae") and filename not in (META_FILE, meta["data_file"], meta["index_file"]):
+            try:
+                os.remove(os.path.join(folder, filename))
+            except OSError:
+                # Fichier encore ouvert par une reconnaissance (Windows), il sera supprimé à la prochaine écriture
+                pass
+
+def import_csv(csv_path, folder):
+    """! Import de DB.csv
+
+    Fonction pour créer le stockage binaire à partir du fichier DB.csv.
+
+    @param csv_path: Fichier CSV (image;personne;minuties Otsu;minuties moyenne;minuties gaussienne)
+    @type csv_path: String
+
+    @param folder: Dossier du stockage
+    @type folder: String
+
+    @return: Nombre d'images importées
+    @rtype: int
+
+    """
+
+    # Initialisation de variables
+    images, persons, minutiae = [], [], []
+
+    with open(csv_path, 'r', newline='') as file:
+        for elt in csv.reader(file, delimiter=';'):
+            if elt:
+                images.append(elt[0])
+                persons.append(elt[1])
+                minutiae.append([ast.literal_eval(column) for column in elt[2:2 + len(METHODS)]])
+
+    write_store(folder, images, persons, minutiae)
+
+    return len(images)
+
+def export_csv(folder, csv_path):
+    """! Export vers DB.csv
+
+    Fonction pour recréer le fichier DB.csv à partir du stockage binaire.
+
+    @param folder: Dossier du stockage
+    @type folder: String
+
+    @param csv_path: Fichier CSV à écrire
+    @type csv_path: String
+
+    @return: Nombre d'images exportées
+    @rtype: int
+
+    """
+
+    store = MinutiaeStore(folder)
+
+    with open(csv_path, 'w', newline='') as file:
+        writing = csv.writer(file, delimiter=';')
+        for i in range(len(store)):
+            writing.writerow([store.images[i], store.persons[i]] + [str([(int(x), int(y)) for x, y in store.minutiae(i, method)]) for method in store.methods])
+
+    return len(store)
+
+# Initialisation de variables
+METHODS = ["Méthode d'Otsu", "Moyenne adaptative", "Gaussienne adaptative"] # Méthodes de binarisation (ordre des colonnes de DB.csv)
+META_FILE = "minutiae_meta.json"    # Noms des images, des personnes et des méthodes
+STORE_FOLDER = "minutiae"           # Sous-dossier de la BDD contenant le stockage binaire (ignoré par le cryptage)
+
+# Exécute l'import ou l'export
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion entre DB.csv et le stockage binaire des minuties.")
+    parser.add_argument("command", choices=["import", "export"], help="import : DB.csv -> stockage binaire, export : stockage binaire -> DB.csv")
+    parser.add_argument("--db", default="DB", help="Dossier de la BDD")
+    parser.add_argument("--csv", default=None, help="Fichier CSV (<db>/DB.csv par défaut)")
+    args = parser.parse_args()
+
+    # Initialisation de variables
+    folder = os.path.join(args.db, STORE_FOLDER)            # Dossier du stockage binaire
+    csv_path = args.csv or os.path.join(args.db, "DB.csv")  # Fichier CSV
+
+    if args.command == "import":
+        print(f"{import_csv(csv_path, folder)} images importées dans {folder}")
+    else:
+        print(f"{export_csv(folder, csv_path)} images exportées dans {csv_path}")
@@ -18,6 +18,14 @@
 # Cryptage/Décryptage réalisé avec la librairie Fernet
 #
 ##
+# @file cache.py
+#
+# @brief Cache persistant et crypté des squelettes des images de la BDD.
+#
+# @section Description
+# Cache des squelettes réalisé avec numpy et la librairie Fernet
+#
+##
 # @file interface.py
 #
 # @brief Interface pour effectuer la reconnaissance d'une empreinte digitale
@@ -28,7 +36,6 @@
 # @section Libraries/Modules
 # - cv2 extern library (https://pypi.org/project/opencv-python/)
 # - numpy extern library (https://numpy.org/)
-# - signal standard library (https://docs.python.org/3/library/signal.html#module-signal)
 # - imageio extern library (https://pypi.org/project/imageio/)
 # - time standard library (https://docs.python.org/3/library/time.html)
 # - Fernet extern library (https://cryptography.io/en/latest/fernet/)
@@ -54,98 +61,200 @@
 # Import des bibliothèques nécessaires
 import cv2
 import numpy as np
-from scipy import signal
 import imageio
-import time, os, csv, ast, base64, shutil
+import time, os, csv, ast, base64, threading, itertools
+import concurrent.futures, multiprocessing
+from dataclasses import dataclass, field
 from matplotlib import pyplot as plt
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 
 # Import des autres fichiers
 import cryptage
 import interface
+import cache
+import minutiae_store
+import tracing
+import thinning
+import descriptors
+import classification
+import enrollment
+import segmentation
+
+# Méthodes de correspondance disponibles pour match_template
+TEMPLATE_METHODS = {
+    'cv2.TM_CCOEFF': cv2.TM_CCOEFF,
+    'cv2.TM_CCOEFF_NORMED': cv2.TM_CCOEFF_NORMED,
+    'cv2.TM_CCORR_NORMED': cv2.TM_CCORR_NORMED,
+    'cv2.TM_SQDIFF': cv2.TM_SQDIFF,
+    'cv2.TM_SQDIFF_NORMED': cv2.TM_SQDIFF_NORMED,
+}
+MATCH_METHODS = list(TEMPLATE_METHODS) # Méthodes utilisées par défaut (toutes)
+SEARCH_RADIUS = None                   # Déplacement toléré d'une minutie en pixels (None = recherche sur toute l'image)
+MATCH_THRESHOLD = 0.05                 # Écart maximal entre une minutie de la BDD et la zone trouvée lors d'une recherche dans une fenêtre ou avec une partie des méthodes (cf. match_scores)
+WORKERS = 1                            # Nombre de processus utilisés pour comparer l'empreinte à la BDD (1 = en série)
+MAX_MATCHES = None                     # Nombre de personnes reconnues au-delà duquel la recherche s'arrête (None = toute la BDD)
+PREFILTER = None                       # Nombre d'empreintes de la BDD retenues par le premier étage de la recherche (None = toutes)
+PREFILTER_GRID = 4                     # Nombre de cases sur chaque axe de l'histogramme spatial des minuties
+BINNING = False                        # Comparaison aux seules empreintes de la BDD de classes compatibles avec celle de l'empreinte à traiter (cf. classification.py)
+SEGMENTATION = False                   # Extraction et comparaison des minuties limitées à la zone de l'empreinte à traiter (cf. segmentation.py)
+ENROLL_SKELETONIZATION = "Filtre Laplacien"  # Méthode de squelettisation utilisée pour extraire les minuties enregistrées lors d'un enrôlement
+ENROLL_CHUNK = 256                     # Nombre d'images lues, analysées et cryptées ensemble lors d'un enrôlement en masse
+POOL_CHUNKS = 4                        # Nombre de groupes d'empreintes de la BDD envoyés à chaque processus de reconnaissance par reconnaissance
+BROADCAST_TIMEOUT = 60                 # Attente maximale (en secondes) des autres processus lors de la diffusion des paramètres d'une reconnaissance
+WORKER_STATES = 16                     # Nombre de reconnaissances dont les paramètres sont conservés par un processus de reconnaissance
+recognition_pool = None                # Processus de reconnaissance réutilisés d'une reconnaissance à l'autre (cf. worker_pool)
+recognition_pool_size = 0              # Nombre de processus de recognition_pool
+recognition_pool_lock = threading.RLock()  # Verrou pour la création de recognition_pool et la diffusion des paramètres
+recognition_queries = itertools.count()    # Identifiants des reconnaissances réparties
+worker_barrier = None                  # Barrière de diffusion dans un processus de reconnaissance (cf. init_worker)
+worker_states = {}                     # Paramètres des dernières reconnaissances dans un processus de reconnaissance (cf. worker_load)
+worker_buffers = {}                    # Images de travail du prétraitement dans un processus de reconnaissance (cf. worker_load)
+
+# Version du prétraitement (à incrémenter à chaque modification de binarize_image ou skeletonize_image pour invalider le cache)
+PIPELINE_VERSION = 2
+
+# Décalage (ligne, colonne) des voisins p1 à p8 d'un pixel pour le calcul du crossing number
+CROSSING_NEIGHBOURS = [(0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1)]
+
+# Reconnaissance par descripteurs de minuties (cf. descriptors.py)
+DESCRIPTOR_METHOD = "descriptors" # Nom des descripteurs dans le cache (à la place de la méthode de squelettisation)
+DESCRIPTOR_VERSION = 1            # Version des descripteurs (à incrémenter à chaque modification de descriptors.py pour invalider le cache)
+DESCRIPTOR_THRESHOLD = 0.7        # Score minimal d'une empreinte de la BDD reconnue
+
+def load_image(image, flags=cv2.IMREAD_GRAYSCALE):
+    """! Chargement d'une image
+
+    Fonction pour obtenir une image en mémoire quelle que soit sa provenance : fichier, contenu encodé (ex : image décryptée par cryptage.decryptionBuffer, reçue par le réseau ou une file) ou image déjà décodée.
+
+    @param image: Image à charger
+    @type image: String (Adresse de l'image), bytes (contenu tif, png, ...) ou Tableau d'image
+
+    @param flags: Mode de lecture OpenCV (niveau de gris par défaut)
+    @type flags: int
+
+    @return: Image décodée (un tableau d'image en niveau de gris est renvoyé tel quel, sans copie)
+    @rtype: Tableau d'image
+
+    """
+
+    if isinstance(image, np.ndarray):
+        # Image couleur (BGR ou BGRA) convertie en niveau de gris
+        if flags == cv2.IMREAD_GRAYSCALE and image.ndim == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if image.shape[2] == 3 else cv2.COLOR_BGRA2GRAY)
+        return image
 
-# Définition de variables globales
-binarized_image = None # Image binarisée
-skeleton_image = None # Image squeletisée
-minutiae_image = None # Minuties sur l'image squeletisée
-detection_image = None # Empreinte détectée lors de la reconnaissance
-binarized_time = None # Temps d'exécution pour la binarisation
-skeleton_time = None # Temps d'exécution pour la squelettisation
-minutiae_time = None # Temps d'exécution pour la recherche des minuties
-detection_time = None # Temps d'exécution pour la reconnaissance
-minutiae_number = None # Nombre de minuties détectées
-bifurcation_number = None # Nombre de minuties de type bifurcation
-
-def binarize_image(image, method):
+    # Décodage depuis la mémoire ou lecture du fichier
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        decoded = cryptage.decodeImage(image, flags)
+    else:
+        decoded = cv2.imread(os.fspath(image), flags)
+
+    if decoded is None:
+        raise ValueError("Image illisible.")
+
+    return decoded
+
+def binarize_image(image, method, out=None):
     """! Binarisation d'image
 
     Fonction pour binariser une image en noir et blanc en utilisant une méthode spécifiée.
 
     @param image: Image à binariser
-    @type image: String (Adresse de l'image)
+    @type image: String (Adresse de l'image), bytes (contenu encodé) ou Tableau d'image (cf. load_image)
 
     @param method: Méthode de binarisation (otsu, adaptive_mean ou adaptive_gaussian)
     @type method: String
 
+    @param out: Image (uint8, de même taille) dans laquelle écrire le résultat, None pour en allouer une nouvelle
+    @type out: Tableau d'image
+
     @return: Image binarisée
     @rtype: Image
 
     """
     
-    # Chargement de l'image en niveau de gris
-    original_image = cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+    # Chargement de l'image en niveau de gris (sans lecture ni décodage si elle est déjà en mémoire)
+    original_image = load_image(image)
     
+    # Retourne l'image binarisée
+    return binarize_array(original_image, method, out)
+
+def binarize_array(original_image, method, out=None):
+    """! Binarisation d'une image en mémoire
+
+    Fonction pour binariser une image déjà chargée en niveau de gris (ex : image décryptée en mémoire).
+
+    @param original_image: Image en niveau de gris à binariser
+    @type original_image: Tableau d'image
+
+    @param method: Méthode de binarisation (otsu, adaptive_mean ou adaptive_gaussian)
+    @type method: String
+
+    @param out: Image (uint8, de même taille) dans laquelle écrire le résultat, None pour en allouer une nouvelle
+    @type out: Tableau d'image
+
+    @return: Image binarisée
+    @rtype: Image
+
+    """
+
     # Application de la méthode de binarisation spécifiée (Correspond à un seuillage)
     if method == "Méthode d'Otsu":
-        _, binary_image = cv2.threshold(original_image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        _, binary_image = cv2.threshold(original_image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
     elif method == "Moyenne adaptative":
-        binary_image = cv2.adaptiveThreshold(original_image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 11, 2)
+        binary_image = cv2.adaptiveThreshold(original_image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 11, 2, dst=out)
     elif method == "Gaussienne adaptative":
-        binary_image = cv2.adaptiveThreshold(original_image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        binary_image = cv2.adaptiveThreshold(original_image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=out)
     else:
         raise ValueError("Méthode de binarisation non reconnue.")
     
     # Retourne l'image binarisée
     return binary_image
 
-def skeletonize_image(image, method):
+def skeletonize_image(image, method, out=None):
     """! Squeletisation d'image
 
     Fonction pour squelettiser une image selon une méthode spécifiée
 
+    EXPLICATION :
+    -- Pour les filtres, le produit de convolution, le bornage entre 0 et 255 et l'inversement des couleurs sont effectués en une seule passe par cv2.filter2D :
+       le noyau est opposé (-M) et décalé de 255, puis le résultat est saturé en uint8 (aucune image intermédiaire en float64).
+    -- cv2.filter2D calcule une corrélation : le noyau est retourné pour obtenir le même résultat que le produit de convolution (bord complété par des 0).
+
     @param image: Image binarisée à squelettiser
-    @type image: Image
+    @type image: Tableau d'image, bytes (contenu encodé) ou String (Adresse de l'image), cf. load_image
 
-    @param method: Méthode de squelettisation (zhang_suen, guo_hall ou morphology)
+    @param method: Méthode de squelettisation (Filtre Laplacien, Filtre Sobel, zhang_suen, guo_hall ou morphology)
     @type method: String
 
-    @return: Image squelettisation
+    @param out: Image (uint8, de même taille) dans laquelle écrire le résultat, None pour en allouer une nouvelle
+    @type out: Tableau d'image
+
+    @return: Image squelettisation (uint8)
     @rtype: Image
 
     """
+
+    # Image binarisée en mémoire
+    image = load_image(image)
     
     # Choix de la méthode de squelettisation
-    if method == "Filtre Laplacien":
-        # Motif de convolution avec le filtre Laplacien
-        M = np.array([[0,-1,0],[-1,4,-1],[0,-1,0]])
-        # M = np.array([[-1,-1,-1],[-1,8,-1],[-1,-2,-1]])
-        # M = np.array([[1,-2,1],[-2,4,-2],[1,-2,1]])
-
-        # Produit de convolution A*M (mode='same' permet d'obtenir un r\'esultat de m\^eme taille que A).
-        skeleton = signal.convolve2d(image, M, mode='same')
-    elif method == "Filtre Sobel": 
-        # Motif de convolution avec le filtre de Sobel
-        M = np.array([[-1,0,1],[-2,0,2],[-1,0,1]])/4
-        M = np.transpose(M)
-
-        # Produit de convolution A*M (mode='same' permet d'obtenir un résultat de mêeme taille que A).
-        skeleton = signal.convolve2d(image, M, mode='same')
-    elif method == "zhang_suen":
-        # Application de la squelettisation Zhang-Suen
-        skeleton = cv2.ximgproc.thinning(image, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN)
-    elif method == "guo_hall":
-        # Application de la squelettisation Guo-Hall
-        skeleton = cv2.ximgproc.thinning(image, thinningType=cv2.ximgproc.THINNING_GUOHALL)
+    if method == "Filtre Laplacien" or method == "Filtre Sobel":
+        if method == "Filtre Laplacien":
+            # Motif de convolution avec le filtre Laplacien
+            M = np.array([[0,-1,0],[-1,4,-1],[0,-1,0]], np.float32)
+            # M = np.array([[-1,-1,-1],[-1,8,-1],[-1,-2,-1]])
+            # M = np.array([[1,-2,1],[-2,4,-2],[1,-2,1]])
+        else:
+            # Motif de convolution avec le filtre de Sobel
+            M = np.array([[-1,0,1],[-2,0,2],[-1,0,1]], np.float32)/4
+            M = np.transpose(M)
+
+        # 255 - A*M borné entre 0 et 255 (contours noirs sur fond blanc), de même taille que A
+        return cv2.filter2D(image, cv2.CV_8U, -np.flip(M), dst=out, delta=255, borderType=cv2.BORDER_CONSTANT)
+    elif method == "zhang_suen" or method == "guo_hall":
+        # Application de la squelettisation Zhang-Suen ou Guo-Hall (squelette des crêtes d'un pixel d'épaisseur, sans opencv-contrib)
+        skeleton = thinning.thin(image, method)
     elif method == "morphology":
         # Application d'une opération de fermeture suivie d'une soustraction pour simuler la squelettisation
         skeleton = cv2.morphologyEx(image, cv2.MORPH_CLOSE, np.ones((3,3), np.uint8))
@@ -153,16 +262,9 @@ def skeletonize_image(image, method):
     else:
         # Lever une exception si la méthode spécifiée n'est pas reconnue
         raise ValueError("Méthode de squelettisation non reconnue.")
-    
-    # On ramène les valeurs entre 0 et 255 (ici les images sont codées sur 8 bits)
-    skeleton[skeleton > 255] = 255
-    skeleton[skeleton < 0] = 0
 
-    # Inversement des couleurs pour avoir des contours noirs sur fond blanc
-    skeleton = 255 - skeleton
-    
-    # Retourne l'image squeletisée
-    return skeleton
+    # Inversement des couleurs pour avoir des contours noirs sur fond blanc (les valeurs sont déjà entre 0 et 255 en uint8)
+    return cv2.bitwise_not(skeleton, dst=out)
 
 def add_minutiae(file_path, image, minutiaes):
     """! Ajout des minuties dans un fichier
@@ -210,10 +312,154 @@ def add_minutiae(file_path, image, minutiaes):
     except Exception as e:
         print(f"Une erreur s'est produite : {e}")
 
-def crossing_number(image):
+def crossing_map(image, row_start, row_end, col_start, col_end):
+    """! Calcul du crossing number d'une zone de l'image
+
+    Fonction pour calculer en une seule fois le crossing number de tous les pixels d'une zone rectangulaire de l'image.
+
+    EXPLICATION :
+    -- Les 8 voisins de chaque pixel sont obtenus par décalage de l'image (un tableau par voisin) au lieu d'une boucle sur les pixels.
+    -- La zone (et sa bordure d'un pixel) est divisée par 255 une seule fois : les voisins sont des vues de cette image, sans nouvelle division ni copie.
+    -- Les différences sont cumulées dans le même tableau (un seul tableau temporaire au lieu d'un par opération).
+    -- Les opérations (division par 255, différences, somme de gauche à droite) sont effectuées dans le même ordre que dans crossing_number_reference, les résultats sont donc identiques au bit près.
+
+    @param image: Image squelettisée
+    @type image: Tableau d'image
+
+    @param row_start: Première ligne de la zone
+    @type row_start: int
+
+    @param row_end: Ligne de fin de la zone (exclue)
+    @type row_end: int
+
+    @param col_start: Première colonne de la zone
+    @type col_start: int
+
+    @param col_end: Colonne de fin de la zone (exclue)
+    @type col_end: int
+
+    @return: Crossing number de chaque pixel de la zone
+    @rtype: Tableau de réels
+
+    """
+
+    # Zone et sa bordure d'un pixel, divisées par 255 une seule fois
+    scaled = image[row_start - 1:row_end + 1, col_start - 1:col_end + 1] / 255
+    rows, cols = row_end - row_start, col_end - col_start
+
+    # Voisins de chaque pixel (même numérotation que dans crossing_number_reference : p1 à p8)
+    neighbours = [scaled[1 + di:1 + di + rows, 1 + dj:1 + dj + cols] for di, dj in CROSSING_NEIGHBOURS]
+
+    # Somme des différences entre voisins consécutifs, de p1 - p2 à p7 - p8
+    crossing = np.abs(neighbours[0] - neighbours[1])
+    difference = np.empty_like(crossing)
+    for p, q in zip(neighbours[1:-1], neighbours[2:]):
+        np.subtract(p, q, out=difference)
+        np.abs(difference, out=difference)
+        crossing += difference
+    crossing *= 0.5
+
+    return crossing
+
+def crossing_number(image, mask=None):
     """! Calcul du crossing number d'un pixel
 
     Fonction pour calculer le nombre de croisements pour un contour donné dans une image binaire.
+
+    EXPLICATION :
+    -- Version vectorisée de crossing_number_reference (même bordure de 5 pixels, même espacement entre les minuties et même résultat).
+    -- Le crossing number de toute l'image est calculé en une fois avec crossing_map, puis les minuties sont sélectionnées ligne par ligne : après une minutie, la recherche reprend 4 colonnes plus loin et, si la ligne contient une minutie, 4 lignes plus bas.
+    -- Comme dans la version de référence, un rectangle est dessiné sur l'image autour de chaque bifurcation au fur et à mesure. Le crossing number est donc recalculé autour du rectangle car il modifie les pixels qui restent à parcourir.
+    -- Avec mask, le crossing number n'est calculé que dans le rectangle englobant de l'empreinte et seules les minuties du masque sont retenues (le fond et le bord de l'empreinte sont ignorés).
+
+    @param image: Image squelettisée (un tableau d'image est modifié : les bifurcations y sont encadrées)
+    @type image: Tableau d'image, bytes (contenu encodé) ou String (Adresse de l'image), cf. load_image
+
+    @param mask: Zone de l'empreinte (cf. segmentation.segment), None pour parcourir toute l'image
+    @type mask: Tableau de bool
+
+    @return: Nombre de minuties, nombre de bifurcations et tableau des coordonnées (x, y) des bifurcations
+    @rtype: Tuple (int, int, Tableau de Tuple)
+
+    """
+
+    # Image squelettisée en mémoire
+    image = load_image(image)
+
+    # Initialisation de variable
+    rows, cols = image.shape # Nombre de lignes et de colonnes de l'image
+    cpt_minutiae = 0         # Compteur du nombre de minuties
+    cpt_bifurcation = 0      # Compteur du nombre de minuties de type bifurcation
+    tab_minutiae = []        # Tableau contenant les minuties
+
+    # Image trop petite pour contenir une minutie en dehors de la bordure
+    if rows <= 10 or cols <= 10:
+        return cpt_minutiae, cpt_bifurcation, tab_minutiae
+
+    # Zone parcourue : toute l'image en dehors de la bordure de 5 pixels, limitée au rectangle englobant de l'empreinte
+    row_start, row_end, col_start, col_end = 5, rows - 5, 5, cols - 5
+    if mask is not None:
+        x, y, w, h = segmentation.bounding_box(mask)
+        row_start, row_end = max(y, row_start), min(y + h, row_end)
+        col_start, col_end = max(x, col_start), min(x + w, col_end)
+
+    # Crossing number de la zone parcourue
+    crossing = np.full(image.shape, np.nan)
+    if row_start < row_end and col_start < col_end:
+        crossing[row_start:row_end, col_start:col_end] = crossing_map(image, row_start, row_end, col_start, col_end)
+
+    # Pixels candidats : terminaisons (crossing = 1) et bifurcations (crossing = 3) de l'empreinte
+    candidates = (crossing == 1) | (crossing == 3)
+    if mask is not None:
+        candidates &= mask
+    row_has_candidate = candidates.any(axis=1)
+
+    # Parcours des lignes contenant au moins un candidat
+    i = 5
+    while i < rows - 5:
+        # Recherche de la prochaine ligne contenant un candidat
+        next_rows = np.flatnonzero(row_has_candidate[i:rows - 5])
+        if len(next_rows) == 0:
+            break
+        i += next_rows[0]
+
+        # Sélection des minuties de la ligne en respectant l'espacement de 4 colonnes
+        j = 5
+        while j < cols - 5:
+            next_cols = np.flatnonzero(candidates[i, j:cols - 5])
+            if len(next_cols) == 0:
+                break
+            j += next_cols[0]
+
+            if crossing[i, j] == 3:
+                tab_minutiae.append((int(j), int(i)))
+                cv2.rectangle(image, (int(j)-5,int(i)-5), (int(j)+5,int(i)+5), (0, 0, 255), 2)
+                cpt_bifurcation += 1 # Compteur du nombre de minuties de type bifurcation
+
+                # Mise à jour du crossing number autour du rectangle dessiné
+                r0, r1 = max(i - 8, 5), min(i + 9, rows - 5)
+                c0, c1 = max(j - 8, 5), min(j + 9, cols - 5)
+                crossing[r0:r1, c0:c1] = crossing_map(image, r0, r1, c0, c1)
+                candidates[r0:r1, c0:c1] = (crossing[r0:r1, c0:c1] == 1) | (crossing[r0:r1, c0:c1] == 3)
+                if mask is not None:
+                    candidates[r0:r1, c0:c1] &= mask[r0:r1, c0:c1]
+                row_has_candidate[r0:r1] = candidates[r0:r1].any(axis=1)
+
+            # Mise à jour de variables
+            cpt_minutiae += 1 # Compteur du nombre de minuties
+            j += 4            # Indice de colonne
+
+        # La ligne contient au moins une minutie
+        i += 4
+
+    # Retourne le nombre de minuties
+    return cpt_minutiae, cpt_bifurcation, tab_minutiae
+
+def crossing_number_reference(image):
+    """! Calcul du crossing number d'un pixel (version de référence)
+
+    Fonction pour calculer le nombre de croisements pour un contour donné dans une image binaire, pixel par pixel.
+    Implémentation d'origine conservée pour vérifier les résultats de crossing_number (cf. tests/test_crossing_number.py).
     
     EXPLICATION : 
     -- L'image est traitée en considérant une bordure de 5 pixels sur chacun de ses côtés pour éviter de traiter des minuties coupées par la dimension de l'image.
@@ -303,7 +549,39 @@ def variance_calculation(data):
 
     return variance
 
-def match_template(image, template):
+def search_window(image, template, center=None, radius=None):
+    """! Fenêtre de recherche d'une template
+
+    Fonction pour limiter la recherche d'une template à une fenêtre autour de la position attendue de la minutie.
+
+    @param image: Image sur laquelle on recherche la minutie
+    @type image: Matrice d'une image
+
+    @param template: Minutie à retrouver
+    @type template: Matrice d'une image
+
+    @param center: Position (x, y) attendue de la minutie (None = toute l'image)
+    @type center: Tuple
+
+    @param radius: Déplacement toléré autour de la position attendue (en pixels, None = toute l'image)
+    @type radius: int
+
+    @return: Fenêtre de l'image (toute l'image si la fenêtre ne peut pas contenir la template)
+    @rtype: Matrice d'une image
+
+    """
+
+    if center is None or radius is None:
+        return image
+
+    h, w = template.shape
+    x, y = center
+    window = image[max(y - h // 2 - radius, 0):y + h - h // 2 + radius, max(x - w // 2 - radius, 0):x + w - w // 2 + radius]
+
+    # La fenêtre doit pouvoir contenir la template
+    return window if window.shape[0] >= h and window.shape[1] >= w else image
+
+def match_template(image, template, methods=None, center=None, radius=None):
     """! Reherche de la présence d'une template dans une image
 
     Fonction pour rechercher la présence d'une template dans une image.
@@ -313,6 +591,7 @@ def match_template(image, template):
     -- L'idée est de combiner les méthodes pour obtenir différents résultats et les comparer.
     -- Etant donné que la minutie appartienne ou non à l'image, la fonction renverra une matrice comme résultat. 
     -- Nous allons récupérer ces résultats et calculer pour chacun la valeur moyenne des pixels de l'image de retour pour par la suite en calculer la variance afin de connaître la variabilité du résultat car lorsque la template appartient à l'image, le retour sera très proche du noir. À l'inverse, il sera proche du blanc lorsqu'il ne sera pas correcte.
+    -- Lorsque center et radius sont renseignés, la recherche est limitée à une fenêtre autour de la position attendue de la minutie (déplacement toléré de radius pixels) au lieu de toute l'image.
 
     @param image: Image sur laquelle on recherche la minutie
     @type image: Matrice d'une image
@@ -320,23 +599,39 @@ def match_template(image, template):
     @param template: Minutie à retrouver
     @type template: Matrice d'une image
 
+    @param methods: Méthodes de correspondance à utiliser (MATCH_METHODS par défaut)
+    @type methods: Tableau de String
+
+    @param center: Position (x, y) attendue de la minutie
+    @type center: Tuple
+
+    @param radius: Déplacement toléré autour de la position attendue (en pixels)
+    @type radius: int
+
     @return: tabMoy
     @rtype: Tableau contenant la valeur moyenne des pixels de l'image retournée par matchTemplate pour chaque méthode
 
     """
 
     # Initialisation de variables
-    w, h = template.shape[::-1]                                                                                         # Dimensions de la template
-    methods = ['cv2.TM_CCOEFF', 'cv2.TM_CCOEFF_NORMED', 'cv2.TM_CCORR_NORMED', 'cv2.TM_SQDIFF', 'cv2.TM_SQDIFF_NORMED'] # Méthodes à utiliser
-    tabMoy = []                                                                                                         # Tableau de la couleur moyennes de chaque pixel
+    w, h = template.shape[::-1]     # Dimensions de la template
+    methods = methods or MATCH_METHODS # Méthodes à utiliser
+    tabMoy = []                     # Tableau de la couleur moyennes de chaque pixel
+
+    # Restriction de la recherche à une fenêtre autour de la position attendue
+    image = search_window(image, template, center, radius)
+
+    # Nombre de modèles évalués
+    tracing.count("templates_evaluated", len(methods))
 
     # Boucle sur les méthodes de correspondance
     for meth in methods:
         # Conversion de la méthode de correspondance en une fonction OpenCV
-        method = eval(meth)
+        method = TEMPLATE_METHODS[meth]
         
         # Application de la correspondance de modèle en utilisant la méthode actuelle
-        result = cv2.matchTemplate(image,template,method)
+        with tracing.span("match_template"):
+            result = cv2.matchTemplate(image,template,method)
 
         # Recherche des valeurs minimales et maximales dans le résultat de la correspondance
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
@@ -350,8 +645,6 @@ def match_template(image, template):
         # Calcul de la position du coin inférieur droit du rectangle délimitant la correspondance 
         bottom_right = (top_left[0] + w, top_left[1] + h)
 
-        np.set_printoptions(threshold=np.inf)
-        
         # Dessin d'un rectangle autour de la zone de correspondance dans l'image
         # cv2.rectangle(image, top_left, bottom_right, (0, 0, 255), 2)
 
@@ -362,13 +655,211 @@ def match_template(image, template):
 
     return tabMoy
 
-def fingerprint_recognition(skeleton_image, binarization_methods, skeletonize_methods, nb_minutiae):
-    """! Comparaison d'empreinte digitale
+def match_scores(image, template, methods=None, center=None, radius=None):
+    """! Scores de correspondance d'une template
 
-    Fonction pour effectuer la comparaison de l'empreinte digitale à traiter avec celles de la BDD.
+    Fonction pour mesurer l'écart entre une template et les zones de l'image trouvées par chaque méthode de correspondance.
 
-    @param image_path: Squelette de l'image à traiter
-    @type image_path: Matrice binaire
+    EXPLICATION :
+    -- Chaque méthode donne la position de la meilleure correspondance (comme dans match_template).
+    -- L'écart entre la zone trouvée et la template est mesuré par la différence quadratique normalisée (cv2.TM_SQDIFF_NORMED) : 0 si la zone est identique à la template.
+    -- Contrairement à l'égalité des moyennes de match_template, ce score ne dépend ni de la taille de la zone de recherche ni du nombre de méthodes (cf. compare_entry).
+
+    @param image: Image sur laquelle on recherche la minutie
+    @type image: Matrice d'une image
+
+    @param template: Minutie à retrouver
+    @type template: Matrice d'une image
+
+    @param methods: Méthodes de correspondance à utiliser (MATCH_METHODS par défaut)
+    @type methods: Tableau de String
+
+    @param center: Position (x, y) attendue de la minutie
+    @type center: Tuple
+
+    @param radius: Déplacement toléré autour de la position attendue (en pixels)
+    @type radius: int
+
+    @return: Écart entre la template et la zone trouvée par chaque méthode (entre 0 et 1)
+    @rtype: Tableau de réels
+
+    """
+
+    # Initialisation de variables
+    w, h = template.shape[::-1]        # Dimensions de la template
+    methods = methods or MATCH_METHODS # Méthodes à utiliser
+    scores = []                        # Écart de chaque méthode
+
+    # Restriction de la recherche à une fenêtre autour de la position attendue
+    image = search_window(image, template, center, radius)
+
+    # Nombre de modèles évalués
+    tracing.count("templates_evaluated", len(methods))
+
+    for meth in methods:
+        method = TEMPLATE_METHODS[meth]
+
+        with tracing.span("match_template"):
+            result = cv2.matchTemplate(image, template, method)
+
+        # Position de la meilleure correspondance (minimum pour TM_SQDIFF et TM_SQDIFF_NORMED, maximum sinon)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        x, y = min_loc if method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED] else max_loc
+
+        # Écart entre la zone trouvée et la template
+        scores.append(float(cv2.matchTemplate(image[y:y + h, x:x + w], template, cv2.TM_SQDIFF_NORMED)[0, 0]))
+
+    return scores
+
+def work_buffer(buffers, name, shape):
+    """! Image de travail réutilisable
+
+    Fonction pour réutiliser une image de travail d'un prétraitement à l'autre au lieu d'en allouer une nouvelle à chaque image.
+
+    @param buffers: Images de travail déjà allouées (None pour ne pas en réutiliser)
+    @type buffers: Dictionnaire
+
+    @param name: Nom de l'image de travail (ex : "skeleton")
+    @type name: String
+
+    @param shape: Taille de l'image
+    @type shape: Tuple
+
+    @return: Image uint8 de la taille demandée (réallouée seulement si la taille change), None si buffers est None
+    @rtype: Tableau d'image
+
+    """
+
+    if buffers is None:
+        return None
+
+    buffer = buffers.get(name)
+    if buffer is None or buffer.shape != shape:
+        buffer = buffers[name] = np.empty(shape, np.uint8)
+
+    return buffer
+
+def load_stack(images, out=None):
+    """! Chargement d'un lot d'images
+
+    Fonction pour réunir des images de même taille en une seule pile N x H x W.
+
+    @param images: Images à charger
+    @type images: Tableau de String, de bytes ou de Tableau d'image (cf. load_image)
+
+    @param out: Pile (uint8, N x H x W) dans laquelle écrire les images, None pour en allouer une nouvelle
+    @type out: Tableau d'image à 3 dimensions
+
+    @return: Pile des images en niveau de gris
+    @rtype: Tableau d'image à 3 dimensions (uint8)
+
+    """
+
+    for k, image in enumerate(images):
+        image = load_image(image)
+
+        # Allocation de la pile à la taille de la première image
+        if out is None:
+            out = np.empty((len(images),) + image.shape, np.uint8)
+        if image.shape != out.shape[1:]:
+            raise ValueError("Les images du lot n'ont pas toutes la même taille.")
+
+        out[k] = image
+
+    return out
+
+def binarize_stack(stack, method, out=None):
+    """! Binarisation d'un lot d'images
+
+    Fonction pour binariser une pile d'images en niveau de gris avec une même méthode.
+
+    EXPLICATION :
+    -- Chaque image est binarisée par binarize_array directement dans sa tranche de la pile de sortie (aucune image intermédiaire allouée).
+    -- Le seuil d'Otsu étant propre à chaque image, le seuillage n'est pas appliqué à la pile en une fois : les appels OpenCV image par image sont plus rapides que les variantes vectorisées sur toute la pile (histogrammes numpy, pile réorganisée en canaux), et leurs résultats identiques à ceux de binarize_image.
+
+    @param stack: Pile d'images en niveau de gris (cf. load_stack)
+    @type stack: Tableau d'image à 3 dimensions (uint8)
+
+    @param method: Méthode de binarisation (cf. binarize_array)
+    @type method: String
+
+    @param out: Pile (uint8, de même taille) dans laquelle écrire le résultat, None pour en allouer une nouvelle
+    @type out: Tableau d'image à 3 dimensions
+
+    @return: Pile des images binarisées
+    @rtype: Tableau d'image à 3 dimensions (uint8)
+
+    """
+
+    if out is None:
+        out = np.empty(stack.shape, np.uint8)
+
+    for image, binarized in zip(stack, out):
+        binarize_array(image, method, binarized)
+
+    return out
+
+def skeletonize_stack(stack, method, out=None):
+    """! Squelettisation d'un lot d'images
+
+    Fonction pour squelettiser une pile d'images binarisées avec une même méthode.
+
+    EXPLICATION :
+    -- Chaque image est squelettisée par skeletonize_image directement dans sa tranche de la pile de sortie (résultats identiques image par image).
+
+    @param stack: Pile d'images binarisées (cf. binarize_stack)
+    @type stack: Tableau d'image à 3 dimensions (uint8)
+
+    @param method: Méthode de squelettisation (cf. skeletonize_image)
+    @type method: String
+
+    @param out: Pile (uint8, de même taille) dans laquelle écrire le résultat, None pour en allouer une nouvelle
+    @type out: Tableau d'image à 3 dimensions
+
+    @return: Pile des squelettes
+    @rtype: Tableau d'image à 3 dimensions (uint8)
+
+    """
+
+    if out is None:
+        out = np.empty(stack.shape, np.uint8)
+
+    for image, skeleton in zip(stack, out):
+        skeletonize_image(image, method, skeleton)
+
+    return out
+
+def crossing_number_stack(stack, masks=None):
+    """! Minuties d'un lot d'images
+
+    Fonction pour extraire les minuties de chaque squelette d'une pile.
+
+    @param stack: Pile de squelettes (modifiée : les bifurcations y sont encadrées, cf. crossing_number)
+    @type stack: Tableau d'image à 3 dimensions (uint8)
+
+    @param masks: Zone de l'empreinte de chaque image (cf. segmentation.segment), None pour parcourir toutes les images en entier
+    @type masks: Tableau de Tableau de bool
+
+    @return: Nombre de minuties, nombre de bifurcations et coordonnées des bifurcations de chaque image
+    @rtype: Tableau de Tuple (int, int, Tableau de Tuple)
+
+    """
+
+    masks = [None] * len(stack) if masks is None else masks
+
+    return [crossing_number(image, mask) for image, mask in zip(stack, masks)]
+
+def preprocess_stack(stack, binarization_methods, skeletonize_methods, buffers=None):
+    """! Prétraitement d'un lot d'images
+
+    Fonction pour binariser, squelettiser et extraire les minuties d'une pile d'images avec les mêmes méthodes.
+
+    EXPLICATION :
+    -- Les piles binarisées, squelettisées et des minuties sont allouées une seule fois pour tout le lot, ou réutilisées d'un lot à l'autre avec buffers (cf. work_buffer).
+    -- Les résultats sont identiques à ceux de preprocess_probe pour chaque image.
+
+    @param stack: Pile d'images en niveau de gris (cf. load_stack)
+    @type stack: Tableau d'image à 3 dimensions (uint8)
 
     @param binarization_methods : Méthode de binarisaiton
     @type binarization_methods : String
@@ -376,126 +867,43 @@ def fingerprint_recognition(skeleton_image, binarization_methods, skeletonize_me
     @param skeletonize_methods : Méthode de squelettisation
     @type skeletonize_methods : String
 
-    @param nb_minutiae : Nombre de minuties à prélever
-    @type nb_minutiae : int
-
-    """
+    @param buffers: Piles de travail réutilisées d'un lot à l'autre (les piles renvoyées sont alors écrasées par l'appel suivant), None pour en allouer de nouvelles
+    @type buffers: Dictionnaire
 
-    # global detection_image
+    @return: Piles binarisée, squelettisée et des minuties (squelettes où les bifurcations sont encadrées), puis minuties de chaque image (cf. crossing_number)
+    @rtype: Tuple (Tableau d'image à 3 dimensions, Tableau d'image à 3 dimensions, Tableau d'image à 3 dimensions, Tableau de Tuple)
 
-    # Initialisation de variables
-    folder_db = "DB"                            # Dossier contenant la BDD des empreintes cryptées
-    file_db = "DB.csv"                          # Fichier contenant la BDD des informations des empreintes (Image (= empreinte), Personne associée et minuties de l'empreinte)
-    file = 'key.txt'                            # Fichier contenant la clé de cryptage
-    old_key = cryptage.readFile(file)           # Ancienne clé de cryptage
-    skeleton_image_copy = skeleton_image.copy() # Copie de l'image squeletisée à traiter
-    result = []                                 # Tableau contenant les personnes reconnues par le traitement
+    """
 
-    # Lecture d'un dossier
-    files_in_folder = os.listdir(folder_db)
+    with tracing.span("preprocess_stack", images=len(stack)):
+        with tracing.span("binarize"):
+            binarized = binarize_stack(stack, binarization_methods, work_buffer(buffers, "binarized_stack", stack.shape))
 
-    # Filtrer pour ne conserver que les fichiers (pas les sous-dossiers)
-    files = [f for f in files_in_folder if os.path.isfile(os.path.join(folder_db, f))]
+        with tracing.span("skeletonize"):
+            skeletons = skeletonize_stack(binarized, skeletonize_methods, work_buffer(buffers, "skeleton_stack", stack.shape))
 
-    # Parcours de chaque fichier dans le dossier
-    for filename in files:
-        if filename != file_db:
-            # Décryptage des données
-            cryptage.decryptionImage(old_key, f'{folder_db}/{filename}')
-    
-    try:
-        # Ouverture de fichier CSV en mode lecture
-        with open(f"{folder_db}/{file_db}", 'r', newline='') as file:
-            reading = csv.reader(file, delimiter=';')
-            data = list(reading)
+            # Copie des squelettes sur laquelle les bifurcations sont encadrées
+            minutiae_images = work_buffer(buffers, "minutiae_stack", stack.shape)
+            if minutiae_images is None:
+                minutiae_images = skeletons.copy()
+            else:
+                np.copyto(minutiae_images, skeletons)
 
-            # Recherche de la ligne correspondante à l'image
-            for elt in data:
-                # Affectation de variables
-                img = elt[0]    # Non de l'image
-                person = elt[1] # Nom de la personne
-                # Association des minuties en fonction de la méthode de binarisation utilisée
-                if binarization_methods == "Méthode d'Otsu":
-                    minuties = elt[2] # Minuties associées
-                elif binarization_methods == "Moyenne adaptative":
-                    minuties = elt[3] # Minuties associées
-                elif binarization_methods == "Gaussienne adaptative":
-                    minuties = elt[4] # Minuties associées
+        with tracing.span("crossing_number"):
+            minutiae = crossing_number_stack(minutiae_images)
 
-                # Transformation du tableau de minuties récupéré en string en un tableau de points de coordonnées
-                minuties = ast.literal_eval(minuties)
-
-                # Image de la BDD à comparer avec celle à traiter
-                imageDB = f'{folder_db}/{img}'
-
-                # Prétraitement de l'image de la BDD
-                binarized_image_bdd = binarize_image(imageDB, binarization_methods)
-                skeleton_image_bdd = skeletonize_image(binarized_image_bdd, skeletonize_methods)
-                skeleton_image_bdd = cv2.convertScaleAbs(skeleton_image_bdd)
-
-                # Initialisation de variables
-                cpt = 0 # Compteur du nombre de correspondance entre l'image de la BDD et celle à traiter
-                i = 0   # Indice de boucle
-
-                # Tant que le nombre de match de minuties à chercher n'est pas trouvé et qu'il y a des minuties à tester
-                while cpt < nb_minutiae and i < len(minuties):
-                    # Récupération des points de coordonnées de la minutie
-                    minutiae = minuties[i]
-                    
-                    # Extraction de la minutie (11 x 11 autour de ses coordonnées) sur chacune des images
-                    minutiae_image_bdd = skeleton_image_bdd[minutiae[1]-5:minutiae[1]+6, minutiae[0]-5:minutiae[0]+6]
-                    minutiae_image = skeleton_image[minutiae[1]-5:minutiae[1]+6, minutiae[0]-5:minutiae[0]+6]
-
-                    # Recherche d'une correspondance entre l'image à traiter et la minutie extraite sur l'image de la bdd et sur l'image à traiter
-                    match_minutiae_bdd = match_template(skeleton_image,minutiae_image_bdd)
-                    match_minutiae = match_template(skeleton_image,minutiae_image)
-
-                    # Calcul de la variance sur chacun de ses matchs
-                    variance_minutiae_bdd = variance_calculation(match_minutiae_bdd)
-                    variance_minutiae = variance_calculation(match_minutiae)
-
-                    # Si les variances sont nulles, alors la correspondance est bonne
-                    if(variance_minutiae_bdd == 0 and variance_minutiae == 0): # Ici la variance vaut 0, mais sur une applicaiton plus importante, il faudrait que la variance soit comparée à un intervalle de confiance
-                        # Incrémentation d'un compteur
-                        cpt += 1
-
-                        # Dessin d'un rectangle autour de la zone de correspondance dans l'image
-                        cv2.rectangle(skeleton_image, (minutiae[0]-5,minutiae[1]-5), (minutiae[0]+5,minutiae[1]+5), (0, 0, 255), 2)
-                        cv2.rectangle(skeleton_image_bdd, (minutiae[0]-5,minutiae[1]-5), (minutiae[0]+5,minutiae[1]+5), (0, 0, 255), 2)
-
-                    # Incrémentation de l'indice de boucle
-                    i += 1
-                
-                # Si le nombre de minuties à rechercher a été trouvé, alors on conserve le nom de la personne
-                if cpt >= nb_minutiae:
-                    detection_image = cv2.imread(imageDB, cv2.IMREAD_GRAYSCALE)
-                    result.append(person)
-                    result.append(detection_image)
-
-                # Réinitialisation de la valeur de l'image à traiter car des rectangles ont été dessinés dessus
-                skeleton_image = skeleton_image_copy.copy()
-                
-    # Gestion des erreurs
-    except FileNotFoundError:
-        print(f"Le fichier {file_path} n'a pas été trouvé.")
-    except Exception as e:
-        print(f"Une erreur s'est produite : {e}")
+    return binarized, skeletons, minutiae_images, minutiae
 
-    # Parcours de chaque fichier dans le dossier
-    for filename in files:
-        if filename != file_db:
-            # Encryptage des données
-            cryptage.encryptionImage("", f'{folder_db}/{filename}', False)
+def preprocess_db_image(image_data, image, binarization_methods, skeletonize_methods, cache_key, buffers=None):
+    """! Prétraitement d'une image de la BDD
 
-    return result
+    Fonction pour récupérer le squelette d'une image de la BDD depuis le cache, ou le calculer puis l'ajouter au cache.
 
-def main(image_path, binarization_methods, skeletonize_methods, nb_minutiae):
-    """! Reconnaissance d'empreinte digitale
+    @param image_data: Contenu de l'image décryptée
+    @type image_data: bytes
 
-    Fonction principale pour effectuer toutes les étapes de reconnaissance d'empreintes digitales.
-    
-    @param image_path: Image à traiter
-    @type image_path: String
+    @param image: Nom de l'image dans la BDD
+    @type image: String
 
     @param binarization_methods : Méthode de binarisaiton
     @type binarization_methods : String
@@ -503,77 +911,1794 @@ def main(image_path, binarization_methods, skeletonize_methods, nb_minutiae):
     @param skeletonize_methods : Méthode de squelettisation
     @type skeletonize_methods : String
 
-    @param nb_minutiae : Nombre de minuties à prélever
-    @type nb_minutiae : int
+    @param cache_key: Clé de chiffrement du cache
+    @type cache_key: String
+
+    @param buffers: Images de travail réutilisées d'une image à l'autre (le squelette renvoyé est alors écrasé par l'appel suivant), None pour allouer un nouveau squelette
+    @type buffers: Dictionnaire
+
+    @return: Squelette de l'image
+    @rtype: Tableau d'image
 
     """
 
-    # Déclaration de variables globales pour stocker les résultats du traitement
-    global binarized_image, skeleton_image, minutiae_image
-    global binarized_time, skeleton_time, minutiae_time, detection_time
-    global minutiae_number, bifurcation_number
-    
-    # Enregistrement du temps de début du traitement
-    start = time.time() 
-    
-    # Binarisation de l'image à traiter et sauvagarde de l'image binarisée
-    binarized_image = binarize_image(image_path, binarization_methods)
-    
-    # Enregistrement du temps de fin du traitement
-    end = time.time()
+    with tracing.span("preprocess_entry", image=image):
+        # Empreinte de l'image source pour vérifier la validité du cache
+        digest = cache.source_digest(image_data)
 
-    # Calcul du temps pris par la binarisation
-    binarized_time = str(round(float(end - start), 4))
+        # Recherche du squelette dans le cache
+        with tracing.span("cache_load"):
+            skeleton = cache.load_skeleton(cache_key, image, binarization_methods, skeletonize_methods, PIPELINE_VERSION, digest)
 
-    # Réinitialisation du compteur de temps
-    start = time.time()
-    
-    # Squelettisation de l'image à traiter et sauvagarde de l'image squelettisée
-    skeleton_image = skeletonize_image(binarized_image, skeletonize_methods)
-    skeleton_image = cv2.convertScaleAbs(skeleton_image)
-    minutiae_image = cv2.convertScaleAbs(skeleton_image)
-    
-    # Enregistrement du temps de fin du traitement
-    end = time.time() 
+        if skeleton is None:
+            tracing.count("cache_misses")
 
-    # Calcul du temps pris par la squelettisation
-    skeleton_time = str(round(float(end-start),4))
+            # Prétraitement de l'image puis sauvegarde dans le cache
+            decoded = cryptage.decodeImage(image_data)
+            binarized = binarize_array(decoded, binarization_methods, work_buffer(buffers, "binarized", decoded.shape))
+            skeleton = skeletonize_image(binarized, skeletonize_methods, work_buffer(buffers, "skeleton", decoded.shape))
+            with tracing.span("cache_save"):
+                cache.save_skeleton(cache_key, image, binarization_methods, skeletonize_methods, PIPELINE_VERSION, digest, skeleton)
+        else:
+            tracing.count("cache_hits")
 
-    # Réinitialisation du compteur de temps
-    start = time.time() 
-    
-    # Appel de la fonction pour calculer le nombre de minuties, puis affichage et sauvegarde de l'image avec les minuties
-    minutiae_number, bifurcation_number, tab_minutiae = crossing_number(minutiae_image)
+    return skeleton
 
-    # Enregistrement du temps de fin du traitement
-    end = time.time() 
+def preprocess_db_template(image_data, image, binarization_methods, cache_key):
+    """! Descripteurs d'une image de la BDD
 
-    # Calcul du temps pris par la recherche des minuties
-    minutiae_time = str(round(float(end-start),4))
+    Fonction pour récupérer les descripteurs des minuties d'une image de la BDD depuis le cache, ou les calculer puis les ajouter au cache.
 
-    # Réinitialisation du compteur de temps
-    start = time.time() 
-    
-    # Reconnaissance de l'image à tester parmi les empreintes digitales de la BDD
-    result = fingerprint_recognition(skeleton_image, binarization_methods, skeletonize_methods, nb_minutiae)
+    @param image_data: Contenu de l'image décryptée
+    @type image_data: bytes
 
-    # Enregistrement du temps de fin du traitement
-    end = time.time() 
+    @param image: Nom de l'image dans la BDD
+    @type image: String
 
-    # Calcul du temps pris par la recherche des minuties
-    detection_time = str(round(float(end-start),4))
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
 
-    try:
-        shutil.rmtree("DB")
-        shutil.copytree("DB_original", "DB")
-        cryptage.encryption("DB", "key.txt")
-        cryptage.newEncryption()
-    except FileNotFoundError:
-        print(f"Le dossier n'existe pas.")
-    except Exception as e:
-        print(f"--Une erreur s'est produite : {e}")
+    @param cache_key: Clé de chiffrement du cache
+    @type cache_key: String
 
-    return result
+    @return: Descripteurs de l'image
+    @rtype: Tableau structuré (descriptors.TEMPLATE_DTYPE)
+
+    """
+
+    with tracing.span("preprocess_entry", image=image):
+        # Empreinte de l'image source pour vérifier la validité du cache
+        digest = cache.source_digest(image_data)
+
+        # Recherche des descripteurs dans le cache
+        with tracing.span("cache_load"):
+            template = cache.load_skeleton(cache_key, image, binarization_methods, DESCRIPTOR_METHOD, DESCRIPTOR_VERSION, digest)
+
+        if template is None or template.dtype != descriptors.TEMPLATE_DTYPE:
+            tracing.count("cache_misses")
+
+            # Extraction des descripteurs puis sauvegarde dans le cache
+            binarized = binarize_array(cryptage.decodeImage(image_data), binarization_methods)
+            template = descriptors.template(binarized)
+            with tracing.span("cache_save"):
+                cache.save_skeleton(cache_key, image, binarization_methods, DESCRIPTOR_METHOD, DESCRIPTOR_VERSION, digest, template)
+        else:
+            tracing.count("cache_hits")
+
+    return template
+
+def build_skeleton_cache(folder, binarization_methods, skeletonize_methods):
+    """! Construction du cache des squelettes
+
+    Fonction pour construire le cache des squelettes lors de l'enrôlement à partir des images non cryptées (ex : DB_original).
+
+    @param folder: Dossier contenant les images non cryptées
+    @type folder: String
+
+    @param binarization_methods : Méthodes de binarisaiton
+    @type binarization_methods : Tableau de String
+
+    @param skeletonize_methods : Méthodes de squelettisation
+    @type skeletonize_methods : Tableau de String
+
+    """
+
+    # Initialisation de variables
+    cache_key = cache.read_key() # Clé de cryptage du cache
+    buffers = {}                 # Images de travail réutilisées d'une image à l'autre
+
+    # Parcours de chaque image du dossier
+    for filename in sorted(os.listdir(folder)):
+        if filename != "DB.csv" and os.path.isfile(os.path.join(folder, filename)):
+            # Lecture de l'image non cryptée (une seule fois pour toutes les méthodes)
+            with open(f'{folder}/{filename}', 'rb') as input_file:
+                image_data = input_file.read()
+
+            for binarization_method in binarization_methods:
+                for skeletonize_method in skeletonize_methods:
+                    preprocess_db_image(image_data, filename, binarization_method, skeletonize_method, cache_key, buffers)
+
+def db_entries(folder_db, file_db, binarization_methods):
+    """! Parcours des empreintes de la BDD
+
+    Fonction pour parcourir les images de la BDD avec la personne et les minuties associées à la méthode de binarisation.
+
+    EXPLICATION :
+    -- Les entrées de la BDD de base (cf. base_entries) supprimées ou remplacées par le journal des enrôlements (enrollment.py) sont ignorées.
+    -- Les entrées ajoutées par le journal sont parcourues à la suite, dans l'ordre d'enrôlement.
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param file_db: Fichier CSV de la BDD
+    @type file_db: String
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @return: Itérateur sur (image, personne, minuties)
+    @rtype: Générateur
+
+    """
+
+    # Journal lu avant la BDD de base : une compaction en cours remplace la BDD de base avant de vider le journal
+    journal = enrollment.read_journal(folder_db)
+
+    for entry in base_entries(folder_db, file_db, binarization_methods):
+        if not journal.hides(entry[0], entry[1]):
+            yield entry
+
+    for entry in journal.entries(binarization_methods):
+        tracing.count("entries_read")
+        yield entry
+
+def base_entries(folder_db, file_db, binarization_methods):
+    """! Parcours des empreintes de la BDD de base
+
+    Fonction pour parcourir les images de la BDD de base (sans le journal des enrôlements) avec la personne et les minuties associées à la méthode de binarisation.
+
+    EXPLICATION :
+    -- Les minuties sont lues depuis le stockage binaire (minutiae_store) s'il a été créé, sans analyse de texte.
+    -- Sinon, elles sont lues depuis DB.csv.
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param file_db: Fichier CSV de la BDD
+    @type file_db: String
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @return: Itérateur sur (image, personne, minuties)
+    @rtype: Générateur
+
+    """
+
+    # Stockage binaire des minuties
+    store = minutiae_store.open_store(os.path.join(folder_db, minutiae_store.STORE_FOLDER))
+    if store is not None:
+        for entry in store.entries(binarization_methods):
+            tracing.count("entries_read")
+            yield entry
+        return
+
+    # Colonne des minuties associées à la méthode de binarisation utilisée
+    if binarization_methods not in minutiae_store.METHODS:
+        raise ValueError("Méthode de binarisation non reconnue.")
+    column = 2 + minutiae_store.METHODS.index(binarization_methods)
+
+    # Ouverture de fichier CSV en mode lecture
+    with open(f"{folder_db}/{file_db}", 'r', newline='') as file:
+        for elt in csv.reader(file, delimiter=';'):
+            if elt:
+                # Transformation du tableau de minuties récupéré en string en un tableau de points de coordonnées
+                with tracing.span("csv_parse"):
+                    minuties = ast.literal_eval(elt[column])
+                tracing.count("entries_read")
+                yield elt[0], elt[1], minuties
+
+def db_size(folder_db, file_db):
+    """! Nombre d'empreintes de la BDD
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param file_db: Fichier CSV de la BDD
+    @type file_db: String
+
+    @return: Nombre d'empreintes
+    @rtype: int
+
+    """
+
+    # Initialisation de variables
+    journal = enrollment.read_journal(folder_db) # Journal des enrôlements
+    store = minutiae_store.open_store(os.path.join(folder_db, minutiae_store.STORE_FOLDER))
+
+    # Image et personne de chaque entrée de la BDD de base (stockage binaire ou lignes non vides de DB.csv)
+    if store is not None:
+        if not journal.records:
+            return len(store)
+        base = zip(store.images, store.persons)
+    else:
+        with open(f"{folder_db}/{file_db}", 'r', newline='') as file:
+            base = [(elt[0], elt[1]) for elt in csv.reader(file, delimiter=';') if elt]
+
+    # Entrées de la BDD de base non supprimées, puis entrées ajoutées par le journal
+    return sum(1 for image, person in base if not journal.hides(image, person)) + len(journal.added)
+
+def build_classes(folder_db, file_db, key_file):
+    """! Classification de la BDD
+
+    Fonction pour classer chaque empreinte de la BDD (décryptée puis binarisée avec classification.CLASS_BINARIZATION) et enregistrer les classes à côté des minuties.
+
+    EXPLICATION :
+    -- Les empreintes ajoutées à la BDD après la classification sont non classées : elles sont comparées à toutes les empreintes jusqu'à la prochaine classification.
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param file_db: Fichier CSV de la BDD
+    @type file_db: String
+
+    @param key_file: Fichier contenant la clé de cryptage
+    @type key_file: String
+
+    @return: Classe de chaque image de la BDD
+    @rtype: Dictionnaire
+
+    """
+
+    # Initialisation de variables
+    keys = cryptage.readKeys(key_file) # Clés de cryptage valides
+    classes = {}                       # Classe de chaque image
+
+    with tracing.span("classify_db"):
+        for img, _, _ in db_entries(folder_db, file_db, classification.CLASS_BINARIZATION):
+            image = cryptage.decodeImage(cryptage.decryptionBuffer(keys, f'{folder_db}/{img}'))
+            classes[img] = classification.classify(binarize_array(image, classification.CLASS_BINARIZATION))
+
+    classification.write_classes(folder_db, classes)
+
+    return classes
+
+def enroll(image_path, person, image=None, folder_db="DB", key_file="key.txt"):
+    """! Enrôlement d'une empreinte
+
+    Fonction pour ajouter une empreinte à la BDD sans réécrire DB.csv ni recrypter les autres images.
+
+    EXPLICATION :
+    -- Les minuties sont extraites pour chaque méthode de binarisation, comme celles de DB.csv (squelettisation ENROLL_SKELETONIZATION puis crossing_number).
+    -- Seule la nouvelle image est cryptée, puis l'enrôlement est ajouté au journal (enrollment.py) : l'empreinte n'est visible qu'une fois la ligne du journal écrite.
+    -- Les moteurs de reconnaissance déjà chargés doivent être rechargés (RecognitionEngine.reload).
+
+    @param image_path: Image à enrôler
+    @type image_path: String
+
+    @param person: Personne associée
+    @type person: String
+
+    @param image: Nom de l'image dans la BDD (nom du fichier par défaut)
+    @type image: String
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param key_file: Fichier contenant la clé de cryptage
+    @type key_file: String
+
+    @return: Nom de l'image dans la BDD
+    @rtype: String
+
+    """
+
+    image = image or os.path.basename(image_path)
+
+    with open(image_path, 'rb') as input_file:
+        image_data = input_file.read()
+
+    with tracing.span("enroll", image=image):
+        # Minuties de chaque méthode de binarisation (colonnes de DB.csv)
+        minutiae = enrollment_minutiae(image_data)
+        if minutiae is None:
+            raise ValueError("Image illisible.")
+
+        # Cryptage de la seule nouvelle image puis ajout au journal, sous le verrou de la BDD (compaction et renouvellement de la clé attendent, même depuis un autre processus)
+        with cryptage.databaseLock(folder_db):
+            # Une image supprimée reste dans la BDD jusqu'à la compaction du journal
+            if os.path.exists(os.path.join(folder_db, image)):
+                raise ValueError("Une image de ce nom existe déjà dans la BDD.")
+
+            cryptage.encryptionMaster(folder_db, image, image_data, key_file)
+            enrollment.record_enrollment(folder_db, image, person, minutiae)
+
+    return image
+
+def enrollment_minutiae(image_data):
+    """! Minuties d'une image à enrôler
+
+    Fonction pour décoder une image une seule fois et extraire ses minuties pour chaque méthode de binarisation à partir de l'image en mémoire.
+
+    @param image_data: Contenu de l'image (tif, png, ...)
+    @type image_data: bytes
+
+    @return: Minuties de chaque méthode de binarisation (ordre de minutiae_store.METHODS, comme les colonnes de DB.csv) ou None si l'image est illisible
+    @rtype: Tableau de Tableau de coordonnées (x, y)
+
+    """
+
+    return enrollment_minutiae_batch([image_data])[0]
+
+def enrollment_minutiae_batch(images_data):
+    """! Minuties d'un lot d'images à enrôler
+
+    Fonction pour extraire les minuties de plusieurs images pour chaque méthode de binarisation.
+
+    EXPLICATION :
+    -- Chaque image est décodée une seule fois, puis les images de même taille sont réunies en une pile (load_stack) prétraitée d'un bloc par preprocess_stack.
+    -- Les piles de travail sont allouées une fois et réutilisées pour chaque méthode de binarisation et chaque taille d'image.
+
+    @param images_data: Contenu de chaque image (tif, png, ...)
+    @type images_data: Tableau de bytes
+
+    @return: Minuties de chaque image (cf. enrollment_minutiae), None pour une image illisible
+    @rtype: Tableau
+
+    """
+
+    # Initialisation de variables
+    minutiae = [None] * len(images_data) # Minuties de chaque image
+    groups = {}                          # Indices et images décodées de chaque taille d'image
+    buffers = {}                         # Piles de travail
+
+    # Décodage unique de chaque image lisible
+    for k, image_data in enumerate(images_data):
+        try:
+            image = load_image(image_data)
+        except ValueError:
+            continue
+        groups.setdefault(image.shape, []).append((k, image))
+
+    # Prétraitement de chaque pile pour toutes les méthodes de binarisation
+    for group in groups.values():
+        stack = load_stack([image for _, image in group])
+        methods = [preprocess_stack(stack, method, ENROLL_SKELETONIZATION, buffers)[3] for method in minutiae_store.METHODS]
+        for (k, _), image_minutiae in zip(group, zip(*methods)):
+            minutiae[k] = [tab_minutiae for _, _, tab_minutiae in image_minutiae]
+
+    return minutiae
+
+def enroll_batch(items, folder_db="DB", key_file="key.txt", workers=None):
+    """! Enrôlement en masse
+
+    Fonction pour enrôler un lot d'empreintes (ex : plusieurs milliers lors de l'intégration d'un groupe de personnes).
+
+    EXPLICATION :
+    -- Chaque image est lue une seule fois : ses minuties (trois binarisations, squelettes et crossing number) sont extraites de l'image en mémoire, puis elle est cryptée à partir des mêmes données.
+    -- Chaque groupe est réparti en un sous-lot par processus, prétraité en piles d'images (enrollment_minutiae_batch).
+    -- Le lot est traité par groupes de ENROLL_CHUNK images (mémoire bornée), chaque groupe étant crypté avec une seule écriture du manifeste (cryptage.BulkCrypto).
+    -- Les empreintes ne sont ajoutées au journal qu'à la fin, en une seule ligne : le lot devient visible en une fois.
+    -- Le cryptage de chaque groupe et l'ajout au journal se font sous le verrou de la BDD (cryptage.databaseLock) : la compaction et le renouvellement de la clé, même lancés par un autre processus, s'intercalent entre deux groupes. Les minuties sont calculées en dehors du verrou.
+
+    @param items: Chemin, personne et nom dans la BDD (None = nom du fichier) de chaque image
+    @type items: Tableau de Tuple
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    @param key_file: Fichier contenant la clé de cryptage
+    @type key_file: String
+
+    @param workers: Nombre de processus (WORKERS par défaut, 1 = en série)
+    @type workers: int
+
+    @return: Images enrôlées et chemins des images illisibles (ignorées)
+    @rtype: Tuple (Tableau de String, Tableau de String)
+
+    """
+
+    # Initialisation de variables
+    workers = workers or WORKERS
+    items = [(path, person, image or os.path.basename(path)) for path, person, image in items]
+    entries = []    # Image, personne et minuties des empreintes enrôlées
+    unreadable = [] # Chemins des images illisibles
+
+    # Noms vérifiés avant tout traitement
+    names = [image for _, _, image in items]
+    if len(set(names)) != len(names):
+        raise ValueError("Plusieurs images du lot ont le même nom.")
+    existing = [image for image in names if os.path.exists(os.path.join(folder_db, image))]
+    if existing:
+        raise ValueError(f"Images déjà présentes dans la BDD : {', '.join(existing[:10])}")
+
+    crypto = cryptage.BulkCrypto(folder_db, key_file)
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        with tracing.span("enroll_batch", images=len(items)):
+            for start in range(0, len(items), ENROLL_CHUNK):
+                chunk = items[start:start + ENROLL_CHUNK]
+
+                # Lecture unique de chaque image
+                sources = {}
+                for path, _, image in chunk:
+                    with open(path, 'rb') as input_file:
+                        sources[image] = input_file.read()
+
+                # Minuties de chaque image pour toutes les méthodes de binarisation
+                data = [sources[image] for _, _, image in chunk]
+                if executor is not None:
+                    size = -(-len(data) // workers)
+                    minutiae = [elt for part in executor.map(enrollment_minutiae_batch, [data[k:k + size] for k in range(0, len(data), size)]) for elt in part]
+                else:
+                    minutiae = enrollment_minutiae_batch(data)
+
+                # Cryptage des images lisibles à partir des données déjà lues, sous le verrou de la BDD (les noms sont vérifiés à nouveau : un autre processus a pu enrôler entre-temps)
+                readable = []
+                for (path, person, image), image_minutiae in zip(chunk, minutiae):
+                    if image_minutiae is None:
+                        unreadable.append(path)
+                    else:
+                        readable.append(image)
+                        entries.append((image, person, image_minutiae))
+                with cryptage.databaseLock(folder_db):
+                    existing = [image for image in readable if os.path.exists(os.path.join(folder_db, image))]
+                    if existing:
+                        raise ValueError(f"Images déjà présentes dans la BDD : {', '.join(existing[:10])}")
+                    crypto.encryptFiles(readable, {image: sources[image] for image in readable})
+
+            # Ajout du lot au journal en une seule fois
+            with cryptage.databaseLock(folder_db):
+                enrollment.record_enrollments(folder_db, entries)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    tracing.count("images_enrolled", len(entries))
+
+    return [image for image, _, _ in entries], unreadable
+
+def unenroll(person=None, image=None, folder_db="DB"):
+    """! Suppression d'une empreinte ou d'une personne
+
+    Fonction pour retirer de la BDD toutes les empreintes d'une personne ou une seule image (tombstone ajouté au journal, les images sont supprimées lors de la compaction).
+
+    @param person: Personne à supprimer
+    @type person: String
+
+    @param image: Image à supprimer (si person n'est pas donnée)
+    @type image: String
+
+    @param folder_db: Dossier contenant la BDD
+    @type folder_db: String
+
+    """
+
+    enrollment.record_removal(folder_db, person, image)
+
+def global_features(minuties, shape):
+    """! Caractéristiques globales d'une empreinte
+
+    Fonction pour résumer les minuties d'une empreinte en quelques valeurs comparables sans décrypter ni prétraiter les images de la BDD (premier étage de la recherche).
+
+    @param minuties: Minuties de l'empreinte
+    @type minuties: Tableau de coordonnées (x, y)
+
+    @param shape: Dimensions de l'image (l'histogramme spatial est relatif à ces dimensions)
+    @type shape: Tuple
+
+    @return: Nombre de minuties, rectangle englobant les minuties (x min, y min, x max, y max) et histogramme spatial des minuties (PREFILTER_GRID x PREFILTER_GRID cases, de somme 1)
+    @rtype: Tableau de réels
+
+    """
+
+    points = np.asarray(minuties, dtype=float).reshape(-1, 2)
+    features = np.zeros(5 + PREFILTER_GRID * PREFILTER_GRID)
+    features[0] = len(points)
+
+    if len(points):
+        # Rectangle englobant
+        features[1:3] = points.min(axis=0)
+        features[3:5] = points.max(axis=0)
+
+        # Proportion des minuties dans chaque case de l'image
+        rows, cols = shape[:2]
+        row = np.clip((points[:, 1] * PREFILTER_GRID) // rows, 0, PREFILTER_GRID - 1).astype(int)
+        col = np.clip((points[:, 0] * PREFILTER_GRID) // cols, 0, PREFILTER_GRID - 1).astype(int)
+        features[5:] = np.bincount(row * PREFILTER_GRID + col, minlength=PREFILTER_GRID * PREFILTER_GRID) / len(points)
+
+    return features
+
+def prefilter_scores(probe_features, db_features):
+    """! Similarité globale avec les empreintes de la BDD
+
+    @param probe_features: Caractéristiques globales de l'empreinte à traiter (cf. global_features)
+    @type probe_features: Tableau de réels
+
+    @param db_features: Caractéristiques globales des empreintes de la BDD (une ligne par empreinte)
+    @type db_features: Tableau de réels
+
+    @return: Score de chaque empreinte de la BDD entre 0 et 1 (moyenne des similarités du nombre de minuties, des rectangles englobants et des histogrammes spatiaux)
+    @rtype: Tableau de réels
+
+    """
+
+    # Rapport des nombres de minuties
+    counts = db_features[:, 0]
+    count_similarity = np.minimum(counts, probe_features[0]) / np.maximum(np.maximum(counts, probe_features[0]), 1)
+
+    # Recouvrement des rectangles englobants (intersection sur union)
+    width = np.maximum(np.minimum(db_features[:, 3], probe_features[3]) - np.maximum(db_features[:, 1], probe_features[1]), 0)
+    height = np.maximum(np.minimum(db_features[:, 4], probe_features[4]) - np.maximum(db_features[:, 2], probe_features[2]), 0)
+    areas = (db_features[:, 3] - db_features[:, 1]) * (db_features[:, 4] - db_features[:, 2])
+    union = areas + (probe_features[3] - probe_features[1]) * (probe_features[4] - probe_features[2]) - width * height
+    with np.errstate(divide='ignore', invalid='ignore'):
+        box_similarity = np.where(union > 0, width * height / union, 0.0)
+
+    # Intersection des histogrammes spatiaux
+    histogram_similarity = np.minimum(db_features[:, 5:], probe_features[5:]).sum(axis=1)
+
+    return (count_similarity + box_similarity + histogram_similarity) / 3
+
+def prefilter_candidates(probe_features, db_features, top_k):
+    """! Premier étage de la recherche
+
+    Fonction pour sélectionner les empreintes de la BDD à comparer en détail (compare_entry) d'après leurs caractéristiques globales.
+
+    @param probe_features: Caractéristiques globales de l'empreinte à traiter
+    @type probe_features: Tableau de réels
+
+    @param db_features: Caractéristiques globales des empreintes de la BDD (une ligne par empreinte)
+    @type db_features: Tableau de réels
+
+    @param top_k: Nombre d'empreintes retenues (None = toutes)
+    @type top_k: int
+
+    @return: Empreintes de la BDD retenues (les top_k plus similaires, dans l'ordre de la BDD)
+    @rtype: Tableau de bool
+
+    """
+
+    selected = np.ones(len(db_features), dtype=bool)
+
+    if top_k is not None and top_k < len(db_features):
+        selected[:] = False
+        selected[np.argsort(-prefilter_scores(probe_features, db_features), kind='stable')[:top_k]] = True
+
+    return selected
+
+def compare_entry(skeleton_image, skeleton_image_bdd, minuties, nb_minutiae, search_radius, match_methods, mask=None):
+    """! Comparaison avec une empreinte de la BDD
+
+    Fonction pour compter les minuties d'une empreinte de la BDD retrouvées sur l'empreinte à traiter.
+
+    EXPLICATION :
+    -- Avec mask, les minuties de la BDD situées en dehors de la zone de l'empreinte à traiter (fond ou bord) ne peuvent pas y être retrouvées : elles sont ignorées sans appel à match_template.
+    -- Sur toute l'image avec les cinq méthodes, une minutie est retrouvée lorsque les moyennes des zones trouvées par les méthodes sont égales (variance nulle).
+    -- Cette décision n'est pas valable dans une fenêtre (les méthodes s'accordent presque toujours sur une petite zone) ni avec une partie des méthodes (aucun sous-ensemble ne reproduit la décision des cinq méthodes, ceux sans cv2.TM_CCOEFF acceptent presque toute la BDD).
+       Dans ces deux cas, une minutie est retrouvée lorsque l'écart entre la minutie de la BDD et la zone trouvée par chaque méthode ne dépasse pas MATCH_THRESHOLD (cf. match_scores).
+
+    @param skeleton_image: Squelette de l'image à traiter
+    @type skeleton_image: Tableau d'image
+
+    @param skeleton_image_bdd: Squelette de l'image de la BDD
+    @type skeleton_image_bdd: Tableau d'image
+
+    @param minuties: Minuties de l'image de la BDD
+    @type minuties: Tableau de coordonnées (x, y)
+
+    @param nb_minutiae : Nombre de minuties à prélever
+    @type nb_minutiae : int
+
+    @param search_radius : Déplacement toléré d'une minutie en pixels (None = recherche sur toute l'image)
+    @type search_radius : int
+
+    @param match_methods : Méthodes de correspondance à combiner (None = toutes)
+    @type match_methods : Tableau de String
+
+    @param mask : Zone de l'empreinte à traiter (cf. segmentation.segment), None pour tester toutes les minuties
+    @type mask : Tableau de bool
+
+    @return: Nombre de minuties retrouvées (la recherche s'arrête à nb_minutiae)
+    @rtype: int
+
+    """
+
+    # Copies des images car des rectangles sont dessinés dessus
+    skeleton_image = skeleton_image.copy()
+    skeleton_image_bdd = skeleton_image_bdd.copy()
+
+    # Initialisation de variables
+    cpt = 0 # Compteur du nombre de correspondance entre l'image de la BDD et celle à traiter
+    i = 0   # Indice de boucle
+    exhaustive = search_radius is None and (match_methods is None or sorted(match_methods) == sorted(TEMPLATE_METHODS)) # Décision d'origine (variance des cinq méthodes sur toute l'image)
+
+    # Tant que le nombre de match de minuties à chercher n'est pas trouvé et qu'il y a des minuties à tester
+    while cpt < nb_minutiae and i < len(minuties):
+        # Récupération des points de coordonnées de la minutie
+        minutiae = (int(minuties[i][0]), int(minuties[i][1]))
+
+        # Minutie en dehors de la zone de l'empreinte à traiter
+        if mask is not None and not (0 <= minutiae[1] < mask.shape[0] and 0 <= minutiae[0] < mask.shape[1] and mask[minutiae[1], minutiae[0]]):
+            tracing.count("minutiae_skipped")
+            i += 1
+            continue
+        
+        # Extraction de la minutie (11 x 11 autour de ses coordonnées) sur chacune des images
+        minutiae_image_bdd = skeleton_image_bdd[minutiae[1]-5:minutiae[1]+6, minutiae[0]-5:minutiae[0]+6]
+        minutiae_image = skeleton_image[minutiae[1]-5:minutiae[1]+6, minutiae[0]-5:minutiae[0]+6]
+
+        if exhaustive:
+            # Recherche d'une correspondance entre l'image à traiter et la minutie extraite sur l'image de la bdd et sur l'image à traiter
+            match_minutiae_bdd = match_template(skeleton_image,minutiae_image_bdd)
+            match_minutiae = match_template(skeleton_image,minutiae_image)
+
+            # Calcul de la variance sur chacun de ses matchs
+            variance_minutiae_bdd = variance_calculation(match_minutiae_bdd)
+            variance_minutiae = variance_calculation(match_minutiae)
+
+            # Si les variances sont nulles, alors la correspondance est bonne
+            found = variance_minutiae_bdd == 0 and variance_minutiae == 0 # Ici la variance vaut 0, mais sur une applicaiton plus importante, il faudrait que la variance soit comparée à un intervalle de confiance
+        else:
+            # Recherche dans une fenêtre ou avec une partie des méthodes : la minutie de la BDD doit être retrouvée presque à l'identique par chaque méthode
+            found = max(match_scores(skeleton_image, minutiae_image_bdd, match_methods, minutiae, search_radius)) <= MATCH_THRESHOLD
+
+        if found:
+            # Incrémentation d'un compteur
+            cpt += 1
+
+            # Dessin d'un rectangle autour de la zone de correspondance dans l'image
+            cv2.rectangle(skeleton_image, (minutiae[0]-5,minutiae[1]-5), (minutiae[0]+5,minutiae[1]+5), (0, 0, 255), 2)
+            cv2.rectangle(skeleton_image_bdd, (minutiae[0]-5,minutiae[1]-5), (minutiae[0]+5,minutiae[1]+5), (0, 0, 255), 2)
+
+        # Incrémentation de l'indice de boucle
+        i += 1
+
+    return cpt
+
+def identify_entry(state, img, person, minuties):
+    """! Identification sur une empreinte de la BDD
+
+    Fonction pour décrypter, prétraiter puis comparer une empreinte de la BDD avec l'empreinte à traiter.
+
+    @param state: Paramètres de la reconnaissance (cf. fingerprint_recognition)
+    @type state: Dictionnaire
+
+    @param img: Nom de l'image de la BDD
+    @type img: String
+
+    @param person: Personne associée
+    @type person: String
+
+    @param minuties: Minuties de l'image de la BDD
+    @type minuties: Tableau de coordonnées (x, y)
+
+    @return: Contenu de l'image de la BDD si elle correspond, None sinon
+    @rtype: bytes
+
+    """
+
+    # Image de la BDD à comparer avec celle à traiter (décryptée en mémoire, rien n'est écrit sur le disque)
+    try:
+        imageDB = cryptage.decryptionBuffer(state["keys"], f'{state["folder_db"]}/{img}')
+    except InvalidToken:
+        # La clé a été renouvelée pendant la reconnaissance
+        state["keys"] = cryptage.readKeys(state["key_file"])
+        imageDB = cryptage.decryptionBuffer(state["keys"], f'{state["folder_db"]}/{img}')
+
+    # Prétraitement de l'image de la BDD (lu depuis le cache s'il a déjà été calculé)
+    skeleton_image_bdd = preprocess_db_image(imageDB, img, state["binarization_methods"], state["skeletonize_methods"], state["cache_key"], state["buffers"])
+
+    # Comptage des minuties retrouvées
+    with tracing.span("compare_entry", image=img):
+        cpt = compare_entry(state["skeleton_image"], skeleton_image_bdd, minuties, state["nb_minutiae"], state["search_radius"], state["match_methods"], state["probe_mask"])
+    tracing.count("entries_compared")
+
+    # Si le nombre de minuties à rechercher a été trouvé, alors l'empreinte correspond
+    return imageDB if cpt >= state["nb_minutiae"] else None
+
+def init_worker(barrier):
+    """! Initialisation d'un processus de reconnaissance
+
+    Fonction appelée une seule fois par processus, à sa création, pour recevoir la barrière utilisée par broadcast_state.
+
+    @param barrier: Barrière partagée par les processus de reconnaissance
+    @type barrier: multiprocessing.Barrier
+
+    """
+
+    global worker_barrier
+    worker_barrier = barrier
+
+def worker_pool(workers):
+    """! Processus de reconnaissance
+
+    Fonction pour obtenir l'ensemble de processus de reconnaissance, créé lors de la première reconnaissance répartie puis réutilisé par les suivantes.
+
+    @param workers: Nombre de processus
+    @type workers: int
+
+    @return: Ensemble de processus de reconnaissance
+    @rtype: concurrent.futures.ProcessPoolExecutor
+
+    """
+
+    global recognition_pool, recognition_pool_size
+
+    with recognition_pool_lock:
+        # Nouvel ensemble uniquement si le nombre de processus a changé
+        if recognition_pool is None or recognition_pool_size != workers:
+            if recognition_pool is not None:
+                recognition_pool.shutdown(wait=False, cancel_futures=True)
+            recognition_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(multiprocessing.Barrier(workers),))
+            recognition_pool_size = workers
+
+        return recognition_pool
+
+def shutdown_pool():
+    """! Arrêt des processus de reconnaissance
+
+    Fonction pour arrêter l'ensemble de processus de reconnaissance (recréé lors de la prochaine reconnaissance répartie).
+
+    """
+
+    global recognition_pool, recognition_pool_size
+
+    with recognition_pool_lock:
+        if recognition_pool is not None:
+            recognition_pool.shutdown(wait=False, cancel_futures=True)
+        recognition_pool, recognition_pool_size = None, 0
+
+def worker_load(query, state):
+    """! Réception des paramètres d'une reconnaissance
+
+    Fonction exécutée une seule fois par processus de reconnaissance et par reconnaissance (cf. broadcast_state).
+
+    @param query: Identifiant de la reconnaissance
+    @type query: int
+
+    @param state: Paramètres de la reconnaissance (cf. fingerprint_recognition)
+    @type state: Dictionnaire
+
+    """
+
+    # Images de travail conservées par le processus d'une reconnaissance à l'autre
+    state["buffers"] = worker_buffers
+    worker_states[query] = state
+
+    # Seuls les paramètres des dernières reconnaissances sont conservés
+    while len(worker_states) > WORKER_STATES:
+        del worker_states[next(iter(worker_states))]
+
+    # Attente des autres processus : aucun processus ne peut exécuter deux tâches de la même diffusion
+    worker_barrier.wait(BROADCAST_TIMEOUT)
+
+def broadcast_state(workers, state):
+    """! Diffusion des paramètres d'une reconnaissance
+
+    Fonction pour envoyer les paramètres d'une reconnaissance une seule fois à chacun des processus de reconnaissance.
+
+    EXPLICATION :
+    -- workers tâches worker_load sont soumises ensemble : la barrière partagée bloque chaque processus jusqu'à ce que tous aient reçu la leur, chacun reçoit donc exactement une copie des paramètres.
+    -- Les diffusions sont effectuées l'une après l'autre (recognition_pool_lock) pour que les tâches de deux reconnaissances ne se mélangent pas.
+    -- Si un processus a été arrêté ou si la barrière n'est pas atteinte à temps, un nouvel ensemble de processus est créé et la diffusion recommencée une fois.
+
+    @param workers: Nombre de processus
+    @type workers: int
+
+    @param state: Paramètres de la reconnaissance (cf. fingerprint_recognition)
+    @type state: Dictionnaire
+
+    @return: Ensemble de processus de reconnaissance et identifiant de la reconnaissance (cf. worker_identify)
+    @rtype: Tuple (concurrent.futures.ProcessPoolExecutor, int)
+
+    """
+
+    with recognition_pool_lock:
+        query = next(recognition_queries)
+
+        for attempt in range(2):
+            executor = worker_pool(workers)
+            try:
+                for task in [executor.submit(worker_load, query, state) for _ in range(workers)]:
+                    task.result()
+                return executor, query
+            except (concurrent.futures.process.BrokenProcessPool, threading.BrokenBarrierError):
+                # Processus arrêtés ou diffusion incomplète : un nouvel ensemble est créé
+                shutdown_pool()
+                if attempt:
+                    raise
+
+def worker_identify(query, entries):
+    """! Identification dans un processus
+
+    Fonction exécutée par les processus de reconnaissance pour un groupe d'empreintes de la BDD.
+
+    @param query: Identifiant de la reconnaissance (paramètres reçus par worker_load)
+    @type query: int
+
+    @param entries: Image, personne et minuties de chaque empreinte de la BDD du groupe
+    @type entries: Tableau de Tuple
+
+    @return: Contenu de chaque image de la BDD si elle correspond, None sinon
+    @rtype: Tableau de bytes
+
+    """
+
+    state = worker_states[query]
+
+    return [identify_entry(state, *entry) for entry in entries]
+
+def fingerprint_recognition(skeleton_image, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, workers=None, max_matches=None, progress=None, cancel=None, prefilter=None, probe_minutiae=None, stats=None, probe_class=None, probe_mask=None):
+    """! Comparaison d'empreinte digitale
+
+    Fonction pour effectuer la comparaison de l'empreinte digitale à traiter avec celles de la BDD.
+
+    EXPLICATION :
+    -- Avec workers > 1, les empreintes de la BDD sont réparties en groupes sur un ensemble de processus créé lors de la première reconnaissance et réutilisé par les suivantes (cf. worker_pool) : le coût de démarrage des processus n'est payé qu'une fois.
+    -- L'empreinte à traiter et les paramètres sont envoyés une seule fois à chaque processus (broadcast_state), chaque groupe ne contient que l'identifiant de la reconnaissance et les empreintes de la BDD.
+    -- Les empreintes de la BDD non comparées à cause de l'arrêt anticipé ou de l'annulation sont comptées dans entries_skipped (entries_pruned ne compte que celles écartées par la classification et le premier étage).
+    -- Les résultats sont récupérés dans l'ordre de la BDD, ils sont donc identiques à ceux d'un traitement en série.
+    -- Avec max_matches, la recherche s'arrête dès que ce nombre de personnes a été reconnu (les premières dans l'ordre de la BDD).
+    -- progress est appelée après chaque empreinte de la BDD (ex : barre de progression de l'interface) et cancel permet d'arrêter la recherche entre deux empreintes : les personnes déjà reconnues sont renvoyées.
+    -- Avec prefilter, un premier étage compare les caractéristiques globales des minuties (global_features, sans décryptage) à toute la BDD : seules les prefilter empreintes les plus proches sont comparées en détail, dans l'ordre de la BDD.
+    -- Avec probe_class, seules les empreintes de la BDD de classes compatibles (classification.candidate_classes) ou non classées sont parcourues, avant le premier étage.
+    -- Avec probe_mask, les minuties de la BDD situées en dehors de la zone de l'empreinte à traiter ne sont pas comparées (cf. compare_entry).
+
+    @param image_path: Squelette de l'image à traiter
+    @type image_path: Matrice binaire
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @param skeletonize_methods : Méthode de squelettisation
+    @type skeletonize_methods : String
+
+    @param nb_minutiae : Nombre de minuties à prélever
+    @type nb_minutiae : int
+
+    @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+    @type search_radius : int
+
+    @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut, cf. compare_entry)
+    @type match_methods : Tableau de String
+
+    @param workers : Nombre de processus de reconnaissance (WORKERS par défaut, 1 = en série)
+    @type workers : int
+
+    @param max_matches : Nombre de personnes reconnues au-delà duquel la recherche s'arrête (MAX_MATCHES par défaut, None = toute la BDD)
+    @type max_matches : int
+
+    @param progress : Fonction appelée après chaque empreinte de la BDD avec (nombre d'empreintes comparées, nombre total, personne, image si elle correspond sinon None)
+    @type progress : Fonction
+
+    @param cancel : Évènement arrêtant la recherche
+    @type cancel : threading.Event
+
+    @param prefilter : Nombre d'empreintes de la BDD comparées en détail (PREFILTER par défaut, None = toutes)
+    @type prefilter : int
+
+    @param probe_minutiae : Minuties de l'empreinte à traiter (calculées avec crossing_number si elles ne sont pas données)
+    @type probe_minutiae : Tableau de coordonnées (x, y)
+
+    @param stats : Dictionnaire complété avec le nombre d'empreintes de la BDD écartées par la classification et le premier étage (clé pruned_entries)
+    @type stats : Dictionnaire
+
+    @param probe_class : Classe de l'empreinte à traiter (cf. classification.classify, None = toute la BDD)
+    @type probe_class : String
+
+    @param probe_mask : Zone de l'empreinte à traiter (cf. segmentation.segment, None = toute l'image)
+    @type probe_mask : Tableau de bool
+
+    """
+
+    # global detection_image
+
+    # Paramètres de recherche par défaut
+    search_radius = SEARCH_RADIUS if search_radius is None else search_radius
+    workers = workers or WORKERS
+    max_matches = max_matches or MAX_MATCHES
+    prefilter = prefilter or PREFILTER
+
+    # Au moins une méthode de correspondance (la décision par variance utilise toujours les cinq méthodes, cf. compare_entry)
+    if match_methods is not None and (not match_methods or any(method not in TEMPLATE_METHODS for method in match_methods)):
+        raise ValueError("Méthodes de correspondance non reconnues.")
+
+    # Initialisation de variables
+    folder_db = "DB"                            # Dossier contenant la BDD des empreintes cryptées
+    file_db = "DB.csv"                          # Fichier contenant la BDD des informations des empreintes (Image (= empreinte), Personne associée et minuties de l'empreinte)
+    key_file = 'key.txt'                        # Fichier contenant la clé de cryptage
+    result = []                                 # Tableau contenant les personnes reconnues par le traitement
+
+    # Paramètres de la reconnaissance (envoyés une seule fois à chaque processus, cf. broadcast_state)
+    state = {
+        "skeleton_image": skeleton_image.copy(),         # Copie de l'image squeletisée à traiter
+        "binarization_methods": binarization_methods,
+        "skeletonize_methods": skeletonize_methods,
+        "nb_minutiae": nb_minutiae,
+        "search_radius": search_radius,
+        "match_methods": match_methods,
+        "probe_mask": probe_mask,                        # Zone de l'empreinte à traiter (None = toute l'image)
+        "folder_db": folder_db,
+        "key_file": key_file,
+        "keys": cryptage.readKeys(key_file),             # Clés de cryptage valides (deux pendant un renouvellement)
+        "cache_key": cache.read_key(),                   # Clé de cryptage du cache des squelettes
+        "buffers": {},                                   # Images de travail du prétraitement réutilisées d'une entrée à l'autre
+    }
+
+    # Nombre d'empreintes de la BDD (uniquement pour la progression)
+    total = db_size(folder_db, file_db) if progress is not None else None
+    done = 0
+
+    def add_match(person, imageDB):
+        nonlocal done
+
+        # Conservation du nom de la personne et de l'image reconnue
+        image = None
+        if imageDB is not None:
+            image = cryptage.decodeImage(imageDB)
+            result.append(person)
+            result.append(image)
+
+        # Progression de la recherche
+        done += 1
+        if progress is not None:
+            progress(done, total, person, image)
+
+        return max_matches is not None and len(result) // 2 >= max_matches
+
+    try:
+        # Parcours des images de la BDD et de leurs minuties
+        entries = db_entries(folder_db, file_db, binarization_methods)
+
+        # Classification : seules les empreintes de classes compatibles avec celle de l'empreinte à traiter sont parcourues
+        allowed = classification.candidate_classes(probe_class)
+        if allowed is not None:
+            classes = classification.read_classes(folder_db)
+            entries = list(entries)
+            kept = [entry for entry in entries if classes.get(entry[0], classification.UNKNOWN) in allowed]
+            tracing.count("entries_pruned", len(entries) - len(kept))
+            if stats is not None:
+                stats["pruned_entries"] = stats.get("pruned_entries", 0) + len(entries) - len(kept)
+            entries = kept
+            total = len(entries) if progress is not None else None
+
+        # Premier étage : seules les empreintes les plus proches selon les caractéristiques globales sont comparées en détail
+        if prefilter is not None:
+            entries = list(entries)
+            if probe_minutiae is None:
+                probe_minutiae = crossing_number(skeleton_image.copy(), probe_mask)[2]
+            with tracing.span("prefilter", entries=len(entries)):
+                db_features = np.array([global_features(minuties, skeleton_image.shape) for _, _, minuties in entries]).reshape(len(entries), -1)
+                selected = prefilter_candidates(global_features(probe_minutiae, skeleton_image.shape), db_features, prefilter)
+            tracing.count("entries_pruned", len(entries) - int(selected.sum()))
+            if stats is not None:
+                stats["pruned_entries"] = stats.get("pruned_entries", 0) + len(entries) - int(selected.sum())
+            entries = [entry for entry, keep in zip(entries, selected) if keep]
+            total = len(entries) if progress is not None else None
+
+        if workers <= 1:
+            # Reconnaissance en série
+            for img, person, minuties in entries:
+                if cancel is not None and cancel.is_set():
+                    break
+
+                imageDB = identify_entry(state, img, person, minuties)
+                if add_match(person, imageDB):
+                    break
+        else:
+            # Reconnaissance répartie sur les processus de reconnaissance (créés une seule fois, cf. worker_pool)
+            executor, query = broadcast_state(workers, state)
+            entries = [(img, person, np.asarray(minuties)) for img, person, minuties in entries]
+            size = max(1, -(-len(entries) // (workers * POOL_CHUNKS)))
+            tasks = [(chunk, executor.submit(worker_identify, query, chunk)) for chunk in (entries[i:i + size] for i in range(0, len(entries), size))]
+
+            # Récupération des résultats dans l'ordre de la BDD
+            stopped = False
+            for chunk, task in tasks:
+                if stopped or (cancel is not None and cancel.is_set()):
+                    # Annulation ou arrêt anticipé : annulation des comparaisons restantes (les processus sont conservés)
+                    tracing.count("entries_skipped", sum(len(pending) for pending, future in tasks if future.cancel()))
+                    break
+
+                for (img, person, minuties), imageDB in zip(chunk, task.result()):
+                    if add_match(person, imageDB):
+                        stopped = True
+                        break
+                
+    # Gestion des erreurs
+    except FileNotFoundError as e:
+        print(f"Le fichier {e.filename} n'a pas été trouvé.")
+    except Exception as e:
+        print(f"Une erreur s'est produite : {e}")
+
+    return result
+
+@dataclass
+class RecognitionResult:
+    """! Résultat d'une reconnaissance
+
+    Classe regroupant les images intermédiaires, les temps d'exécution (en secondes) et les personnes reconnues d'une reconnaissance.
+
+    """
+
+    original_image: np.ndarray = None                    # Image à traiter en niveau de gris (décodée une seule fois)
+    binarized_image: np.ndarray = None                   # Image binarisée
+    skeleton_image: np.ndarray = None                    # Image squeletisée
+    minutiae_image: np.ndarray = None                    # Minuties sur l'image squeletisée
+    binarized_time: float = 0.0                          # Temps d'exécution pour la binarisation
+    skeleton_time: float = 0.0                           # Temps d'exécution pour la squelettisation
+    minutiae_time: float = 0.0                           # Temps d'exécution pour la recherche des minuties
+    detection_time: float = 0.0                          # Temps d'exécution pour la reconnaissance
+    minutiae_number: int = 0                             # Nombre de minuties détectées
+    bifurcation_number: int = 0                          # Nombre de minuties de type bifurcation
+    minutiae: list = field(default_factory=list)         # Coordonnées (x, y) des bifurcations
+    candidates: list = field(default_factory=list)       # Personnes reconnues et images de la BDD associées (personne, image)
+    scores: list = field(default_factory=list)           # Score de chaque candidat (reconnaissance par descripteurs uniquement)
+    cancelled: bool = False                              # Recherche annulée avant la fin (candidats partiels)
+    pruned_entries: int = 0                              # Nombre d'empreintes de la BDD écartées par la classification et le premier étage de la recherche (prefilter)
+    pattern_class: str = None                            # Classe de l'empreinte (uniquement avec binning, cf. classification.py)
+    foreground_mask: np.ndarray = None                   # Zone de l'empreinte (uniquement avec segment, cf. segmentation.py)
+    bounding_box: tuple = None                           # Rectangle englobant de la zone de l'empreinte (x, y, largeur, hauteur)
+
+    def persons(self):
+        """! Personnes reconnues
+
+        @return: Noms des personnes reconnues
+        @rtype: Tableau de String
+
+        """
+
+        return [person for person, _ in self.candidates]
+
+    def legacy(self):
+        """! Résultat au format de main
+
+        @return: Tableau [personne, image, personne, image, ...]
+        @rtype: Tableau
+
+        """
+
+        return [elt for candidate in self.candidates for elt in candidate]
+
+def preprocess_probe(image_path, binarization_methods, skeletonize_methods, segment=False):
+    """! Prétraitement de l'empreinte à traiter
+
+    Fonction pour binariser, squelettiser et extraire les minuties de l'empreinte à traiter en mesurant le temps de chaque étape.
+
+    EXPLICATION :
+    -- L'image est lue et décodée une seule fois (cf. load_image), toutes les étapes travaillent ensuite en mémoire : l'image d'origine et chaque image intermédiaire sont renvoyées dans le résultat.
+    -- Avec segment, la zone de l'empreinte est délimitée sur l'image d'origine (segmentation.segment) avant la recherche des minuties, qui ignore le fond et le bord de l'empreinte.
+
+    @param image_path: Image à traiter
+    @type image_path: String (Adresse de l'image), bytes (contenu encodé, ex : image décryptée ou reçue par le réseau) ou Tableau d'image (ex : image reçue par server.py)
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @param skeletonize_methods : Méthode de squelettisation
+    @type skeletonize_methods : String
+
+    @param segment : Recherche des minuties limitée à la zone de l'empreinte
+    @type segment : bool
+
+    @return: Résultat de la reconnaissance (sans les personnes reconnues)
+    @rtype: RecognitionResult
+
+    """
+
+    # Initialisation du résultat
+    result = RecognitionResult()
+    
+    # Enregistrement du temps de début du traitement
+    start = time.perf_counter()
+    
+    # Binarisation de l'image à traiter et sauvagarde de l'image binarisée
+    with tracing.span("binarize"):
+        result.original_image = load_image(image_path)
+        result.binarized_image = binarize_array(result.original_image, binarization_methods)
+    
+    # Calcul du temps pris par la binarisation
+    result.binarized_time = time.perf_counter() - start
+
+    # Réinitialisation du compteur de temps
+    start = time.perf_counter()
+    
+    # Squelettisation de l'image à traiter et sauvagarde de l'image squelettisée
+    with tracing.span("skeletonize"):
+        result.skeleton_image = skeletonize_image(result.binarized_image, skeletonize_methods)
+        result.minutiae_image = result.skeleton_image.copy()
+    
+    # Calcul du temps pris par la squelettisation
+    result.skeleton_time = time.perf_counter() - start
+
+    # Réinitialisation du compteur de temps
+    start = time.perf_counter()
+    
+    # Appel de la fonction pour calculer le nombre de minuties, puis affichage et sauvegarde de l'image avec les minuties
+    with tracing.span("crossing_number"):
+        if segment:
+            with tracing.span("segment"):
+                result.foreground_mask, result.bounding_box = segmentation.segment(result.original_image)
+        result.minutiae_number, result.bifurcation_number, result.minutiae = crossing_number(result.minutiae_image, result.foreground_mask)
+
+    # Calcul du temps pris par la recherche des minuties
+    result.minutiae_time = time.perf_counter() - start
+
+    return result
+
+def preprocess_probes(images, binarization_methods, skeletonize_methods, segment=False):
+    """! Prétraitement d'un lot d'empreintes à traiter
+
+    Fonction pour binariser, squelettiser et extraire les minuties de plusieurs empreintes avec les mêmes méthodes.
+
+    EXPLICATION :
+    -- Chaque image est décodée une seule fois, puis les images de même taille sont traitées en une pile (load_stack) : chaque étape écrit dans une seule pile allouée pour tout le groupe.
+    -- Les images de chaque résultat sont des tranches de ces piles, identiques à celles de preprocess_probe.
+    -- Le temps de chaque étape est réparti entre les images du groupe.
+    -- Avec segment, la recherche des minuties de chaque image est limitée à la zone de l'empreinte (cf. preprocess_probe).
+
+    @param images: Images à traiter
+    @type images: Tableau de String, de bytes (contenu encodé) ou de Tableau d'image
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @param skeletonize_methods : Méthode de squelettisation
+    @type skeletonize_methods : String
+
+    @param segment : Recherche des minuties limitée à la zone de chaque empreinte
+    @type segment : bool
+
+    @return: Résultat de la reconnaissance de chaque empreinte (sans les personnes reconnues)
+    @rtype: Tableau de RecognitionResult
+
+    """
+
+    # Initialisation de variables
+    results = [RecognitionResult() for _ in images] # Résultat de chaque empreinte
+    groups = {}                                     # Indices des empreintes de chaque taille d'image
+
+    # Décodage unique de chaque image
+    for k, image in enumerate(images):
+        results[k].original_image = load_image(image)
+        groups.setdefault(results[k].original_image.shape, []).append(k)
+
+    for indices in groups.values():
+        group = [results[k] for k in indices]
+        stack = load_stack([result.original_image for result in group])
+
+        # Binarisation de la pile
+        start = time.perf_counter()
+        with tracing.span("binarize", images=len(group)):
+            binarized = binarize_stack(stack, binarization_methods)
+        binarized_time = (time.perf_counter() - start) / len(group)
+
+        # Squelettisation de la pile, puis copie sur laquelle les bifurcations sont encadrées
+        start = time.perf_counter()
+        with tracing.span("skeletonize", images=len(group)):
+            skeletons = skeletonize_stack(binarized, skeletonize_methods)
+            minutiae_images = skeletons.copy()
+        skeleton_time = (time.perf_counter() - start) / len(group)
+
+        # Minuties de chaque squelette
+        start = time.perf_counter()
+        with tracing.span("crossing_number", images=len(group)):
+            if segment:
+                with tracing.span("segment", images=len(group)):
+                    for result in group:
+                        result.foreground_mask, result.bounding_box = segmentation.segment(result.original_image)
+            minutiae = crossing_number_stack(minutiae_images, [result.foreground_mask for result in group])
+        minutiae_time = (time.perf_counter() - start) / len(group)
+
+        for k, result in enumerate(group):
+            result.binarized_image, result.skeleton_image, result.minutiae_image = binarized[k], skeletons[k], minutiae_images[k]
+            result.minutiae_number, result.bifurcation_number, result.minutiae = minutiae[k]
+            result.binarized_time, result.skeleton_time, result.minutiae_time = binarized_time, skeleton_time, minutiae_time
+
+    return results
+
+def preprocess_probe_template(image_path, binarization_methods):
+    """! Descripteurs de l'empreinte à traiter
+
+    Fonction pour binariser l'empreinte à traiter et extraire les descripteurs de ses minuties en mesurant le temps de chaque étape.
+
+    @param image_path: Image à traiter
+    @type image_path: String (Adresse de l'image), bytes (contenu encodé) ou Tableau d'image
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @return: Résultat de la reconnaissance (sans les personnes reconnues, le temps de squelettisation comprend l'extraction des descripteurs) et descripteurs
+    @rtype: Tuple (RecognitionResult, Tableau structuré)
+
+    """
+
+    # Initialisation du résultat
+    result = RecognitionResult()
+
+    # Binarisation de l'image à traiter
+    start = time.perf_counter()
+    with tracing.span("binarize"):
+        result.original_image = load_image(image_path)
+        result.binarized_image = binarize_array(result.original_image, binarization_methods)
+    result.binarized_time = time.perf_counter() - start
+
+    # Extraction des minuties et de leurs descripteurs
+    start = time.perf_counter()
+    with tracing.span("descriptors"):
+        template = descriptors.template(result.binarized_image)
+    result.skeleton_time = time.perf_counter() - start
+
+    # Minuties retenues
+    result.minutiae_number = len(template)
+    result.bifurcation_number = int(np.count_nonzero(template["kind"] == descriptors.BIFURCATION))
+    result.minutiae = list(zip(template["x"].tolist(), template["y"].tolist()))
+
+    return result, template
+
+def recognize(image_path, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, workers=None, max_matches=None, progress=None, cancel=None, prefilter=None, binning=None, segment=None):
+    """! Reconnaissance d'empreinte digitale
+
+    Fonction pour effectuer toutes les étapes de reconnaissance d'empreintes digitales.
+
+    EXPLICATION :
+    -- Aucune variable globale n'est modifiée : plusieurs reconnaissances peuvent être effectuées en même temps dans un même processus.
+    -- Avec binning, l'empreinte est classée (arc, boucle, verticille) et n'est comparée qu'aux empreintes de la BDD de classes compatibles.
+    -- Avec segment, l'extraction et la comparaison des minuties sont limitées à la zone de l'empreinte (segmentation.py).
+    
+    @param image_path: Image à traiter
+    @type image_path: String (Adresse de l'image), bytes (contenu encodé) ou Tableau d'image
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @param skeletonize_methods : Méthode de squelettisation
+    @type skeletonize_methods : String
+
+    @param nb_minutiae : Nombre de minuties à prélever
+    @type nb_minutiae : int
+
+    @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+    @type search_radius : int
+
+    @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut)
+    @type match_methods : Tableau de String
+
+    @param workers : Nombre de processus de reconnaissance (WORKERS par défaut)
+    @type workers : int
+
+    @param max_matches : Nombre de personnes reconnues au-delà duquel la recherche s'arrête (MAX_MATCHES par défaut)
+    @type max_matches : int
+
+    @param progress : Fonction appelée après chaque empreinte de la BDD (cf. fingerprint_recognition)
+    @type progress : Fonction
+
+    @param cancel : Évènement arrêtant la recherche entre deux empreintes de la BDD
+    @type cancel : threading.Event
+
+    @param prefilter : Nombre d'empreintes de la BDD comparées en détail (PREFILTER par défaut, None = toutes)
+    @type prefilter : int
+
+    @param binning : Comparaison aux seules empreintes de classes compatibles (BINNING par défaut)
+    @type binning : bool
+
+    @param segment : Extraction et comparaison des minuties limitées à la zone de l'empreinte (SEGMENTATION par défaut)
+    @type segment : bool
+
+    @return: Résultat de la reconnaissance
+    @rtype: RecognitionResult
+
+    """
+
+    binning = BINNING if binning is None else binning
+    segment = SEGMENTATION if segment is None else segment
+
+    with tracing.span("query", image=image_path if isinstance(image_path, str) else None):
+        # Prétraitement de l'empreinte à traiter
+        result = preprocess_probe(image_path, binarization_methods, skeletonize_methods, segment)
+
+        # Enregistrement du temps de début de la reconnaissance
+        start = time.perf_counter()
+
+        # Classe de l'empreinte à traiter
+        if binning:
+            with tracing.span("classify"):
+                result.pattern_class = classification.classify(result.binarized_image)
+    
+        # Reconnaissance de l'image à tester parmi les empreintes digitales de la BDD
+        stats = {}
+        detected = fingerprint_recognition(result.skeleton_image, binarization_methods, skeletonize_methods, nb_minutiae, search_radius, match_methods, workers, max_matches, progress, cancel,
+                                           prefilter, result.minutiae, stats, result.pattern_class, result.foreground_mask)
+        result.candidates = list(zip(detected[::2], detected[1::2]))
+        result.cancelled = cancel is not None and cancel.is_set()
+        result.pruned_entries = stats.get("pruned_entries", 0)
+
+        # Calcul du temps pris par la reconnaissance
+        result.detection_time = time.perf_counter() - start
+
+    # La BDD n'est que lue, le renouvellement du cryptage est planifié par maintenance.py
+    return result
+
+class RecognitionEngine:
+    """! Moteur de reconnaissance
+
+    Classe conservant en mémoire les clés de cryptage, les minuties et les squelettes de la BDD pour enchaîner les reconnaissances sans les recharger.
+
+    EXPLICATION :
+    -- La BDD est chargée (décryptage + squelettes lus depuis le cache) une seule fois par couple (méthode de binarisation, méthode de squelettisation).
+    -- Les reconnaissances ne modifient pas le moteur : plusieurs threads peuvent utiliser le même moteur.
+    -- Les descripteurs des minuties de la BDD (identify_descriptors) sont chargés une seule fois par méthode de binarisation.
+
+    """
+
+    def __init__(self, folder_db="DB", file_db="DB.csv", key_file="key.txt"):
+        """! Création du moteur
+
+        @param folder_db: Dossier contenant la BDD des empreintes cryptées
+        @type folder_db: String
+
+        @param file_db: Fichier CSV de la BDD
+        @type file_db: String
+
+        @param key_file: Fichier contenant la clé de cryptage
+        @type key_file: String
+
+        """
+
+        self.folder_db = folder_db
+        self.file_db = file_db
+        self.key_file = key_file
+        self.keys = cryptage.readKeys(key_file) # Clés de cryptage valides
+        self.cache_key = cache.read_key()       # Clé de cryptage du cache des squelettes
+        self.databases = {}                     # BDD chargées : (binarisation, squelettisation) -> [(image, personne, minuties, squelette)]
+        self.galleries = {}                     # Descripteurs chargés : binarisation -> ([(image, personne)], descriptors.Gallery)
+        self.features = {}                      # Caractéristiques globales des BDD chargées : (binarisation, squelettisation) -> (BDD, Tableau de réels)
+        self.classes = None                     # Classe de chaque image de la BDD (cf. classification.read_classes), lue lors de la première utilisation
+        self.lock = threading.Lock()            # Verrou pour le chargement de la BDD
+
+    def decrypt(self, img):
+        """! Décryptage d'une image de la BDD
+
+        @param img: Nom de l'image de la BDD
+        @type img: String
+
+        @return: Contenu de l'image décryptée
+        @rtype: bytes
+
+        """
+
+        try:
+            return cryptage.decryptionBuffer(self.keys, f'{self.folder_db}/{img}')
+        except InvalidToken:
+            # La clé a été renouvelée depuis le chargement du moteur
+            self.keys = cryptage.readKeys(self.key_file)
+            return cryptage.decryptionBuffer(self.keys, f'{self.folder_db}/{img}')
+
+    def database(self, binarization_methods, skeletonize_methods):
+        """! BDD prétraitée
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param skeletonize_methods : Méthode de squelettisation
+        @type skeletonize_methods : String
+
+        @return: Images, personnes, minuties et squelettes de la BDD
+        @rtype: Tableau de Tuple
+
+        """
+
+        with self.lock:
+            if (binarization_methods, skeletonize_methods) not in self.databases:
+                entries = []
+                with tracing.span("db_load", binarization=binarization_methods, skeletonization=skeletonize_methods):
+                    for img, person, minuties in db_entries(self.folder_db, self.file_db, binarization_methods):
+                        skeleton = preprocess_db_image(self.decrypt(img), img, binarization_methods, skeletonize_methods, self.cache_key)
+                        entries.append((img, person, np.array(minuties), skeleton))
+                self.databases[(binarization_methods, skeletonize_methods)] = entries
+
+            return self.databases[(binarization_methods, skeletonize_methods)]
+
+    def database_features(self, binarization_methods, skeletonize_methods, database):
+        """! Caractéristiques globales de la BDD prétraitée
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param skeletonize_methods : Méthode de squelettisation
+        @type skeletonize_methods : String
+
+        @param database : BDD prétraitée (cf. database)
+        @type database : Tableau de Tuple
+
+        @return: Caractéristiques globales de chaque empreinte de la BDD (cf. global_features), calculées une seule fois par BDD chargée
+        @rtype: Tableau de réels
+
+        """
+
+        with self.lock:
+            cached = self.features.get((binarization_methods, skeletonize_methods))
+            if cached is None or cached[0] is not database:
+                features = np.array([global_features(minuties, skeleton.shape) for _, _, minuties, skeleton in database]).reshape(len(database), -1)
+                cached = self.features[(binarization_methods, skeletonize_methods)] = (database, features)
+
+            return cached[1]
+
+    def database_classes(self, database):
+        """! Classes de la BDD prétraitée
+
+        @param database : BDD prétraitée (cf. database)
+        @type database : Tableau de Tuple
+
+        @return: Classe de chaque empreinte de la BDD (classification.UNKNOWN si elle n'a pas été classée)
+        @rtype: Tableau de String
+
+        """
+
+        with self.lock:
+            if self.classes is None:
+                self.classes = classification.read_classes(self.folder_db)
+
+            return np.array([self.classes.get(img, classification.UNKNOWN) for img, _, _, _ in database], dtype=object)
+
+    def gallery(self, binarization_methods):
+        """! Descripteurs de la BDD
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @return: Image et personne de chaque empreinte de la BDD, descripteurs de toutes les empreintes
+        @rtype: Tuple (Tableau de Tuple, descriptors.Gallery)
+
+        """
+
+        with self.lock:
+            if binarization_methods not in self.galleries:
+                entries, templates = [], []
+                with tracing.span("db_load", binarization=binarization_methods, skeletonization=DESCRIPTOR_METHOD):
+                    for img, person, _ in db_entries(self.folder_db, self.file_db, binarization_methods):
+                        templates.append(preprocess_db_template(self.decrypt(img), img, binarization_methods, self.cache_key))
+                        entries.append((img, person))
+                self.galleries[binarization_methods] = (entries, descriptors.Gallery(templates))
+
+            return self.galleries[binarization_methods]
+
+    def reload(self):
+        """! Rechargement du moteur
+
+        Fonction pour relire les clés et vider les BDD chargées (ex : après un enrôlement).
+
+        """
+
+        with self.lock:
+            self.keys = cryptage.readKeys(self.key_file)
+            self.databases = {}
+            self.galleries = {}
+            self.features = {}
+            self.classes = None
+
+    def identify(self, image_path, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, max_matches=None, prefilter=None, binning=None, segment=None):
+        """! Reconnaissance d'empreinte digitale
+
+        Fonction pour effectuer toutes les étapes de reconnaissance d'une empreinte avec la BDD chargée en mémoire (mêmes résultats que recognize).
+
+        @param image_path: Image à traiter
+        @type image_path: String, bytes (contenu encodé) ou Tableau d'image
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param skeletonize_methods : Méthode de squelettisation
+        @type skeletonize_methods : String
+
+        @param nb_minutiae : Nombre de minuties à prélever
+        @type nb_minutiae : int
+
+        @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+        @type search_radius : int
+
+        @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut)
+        @type match_methods : Tableau de String
+
+        @param max_matches : Nombre de personnes reconnues au-delà duquel la recherche s'arrête (MAX_MATCHES par défaut)
+        @type max_matches : int
+
+        @param prefilter : Nombre d'empreintes de la BDD comparées en détail (PREFILTER par défaut, None = toutes)
+        @type prefilter : int
+
+        @param binning : Comparaison aux seules empreintes de classes compatibles (BINNING par défaut)
+        @type binning : bool
+
+        @param segment : Extraction et comparaison des minuties limitées à la zone de l'empreinte (SEGMENTATION par défaut)
+        @type segment : bool
+
+        @return: Résultat de la reconnaissance
+        @rtype: RecognitionResult
+
+        """
+
+        return self.identify_batch([image_path], binarization_methods, skeletonize_methods, nb_minutiae, search_radius, match_methods, max_matches, prefilter=prefilter, binning=binning, segment=segment)[0]
+
+    def verify(self, image_path, person, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, segment=None):
+        """! Vérification d'empreinte digitale
+
+        Fonction pour vérifier qu'une empreinte appartient à une personne : seules les empreintes de cette personne dans la BDD sont comparées.
+
+        @param image_path: Image à traiter
+        @type image_path: String, bytes (contenu encodé) ou Tableau d'image
+
+        @param person: Personne revendiquée
+        @type person: String
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param skeletonize_methods : Méthode de squelettisation
+        @type skeletonize_methods : String
+
+        @param nb_minutiae : Nombre de minuties à prélever
+        @type nb_minutiae : int
+
+        @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+        @type search_radius : int
+
+        @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut)
+        @type match_methods : Tableau de String
+
+        @param segment : Extraction et comparaison des minuties limitées à la zone de l'empreinte (SEGMENTATION par défaut)
+        @type segment : bool
+
+        @return: Résultat de la reconnaissance (la personne fait partie des candidats si l'empreinte lui appartient)
+        @rtype: RecognitionResult
+
+        """
+
+        return self.identify_batch([image_path], binarization_methods, skeletonize_methods, nb_minutiae, search_radius, match_methods, persons=[person], segment=segment)[0]
+
+    def identify_batch(self, images, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, max_matches=None, persons=None, prefilter=None, binning=None, segment=None):
+        """! Reconnaissance d'un lot d'empreintes
+
+        Fonction pour reconnaître plusieurs empreintes en un seul parcours de la BDD.
+
+        EXPLICATION :
+        -- Chaque squelette de la BDD est comparé à toutes les empreintes du lot avant de passer au suivant : il n'est lu qu'une fois par lot.
+        -- Les empreintes du lot sont prétraitées en piles d'images de même taille (preprocess_probes).
+        -- Les résultats sont identiques à ceux de reconnaissances séparées (la recherche d'une empreinte s'arrête dès qu'elle atteint max_matches).
+        -- Le temps de reconnaissance de chaque empreinte est celui du parcours de la BDD pour tout le lot.
+        -- Avec binning, chaque empreinte du lot est classée et n'est comparée qu'aux empreintes de la BDD de classes compatibles ou non classées (classification.candidate_classes).
+        -- Avec prefilter, chaque empreinte du lot n'est comparée en détail qu'aux prefilter empreintes de la BDD (parmi celles de classes compatibles) les plus proches selon les caractéristiques globales (prefilter_candidates).
+        -- Avec segment, les minuties de chaque empreinte du lot sont extraites dans la zone de l'empreinte et seules les minuties de la BDD situées dans cette zone sont comparées.
+
+        @param images: Images à traiter
+        @type images: Tableau de String, de bytes (contenu encodé) ou de Tableau d'image
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param skeletonize_methods : Méthode de squelettisation
+        @type skeletonize_methods : String
+
+        @param nb_minutiae : Nombre de minuties à prélever
+        @type nb_minutiae : int
+
+        @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+        @type search_radius : int
+
+        @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut)
+        @type match_methods : Tableau de String
+
+        @param max_matches : Nombre de personnes reconnues au-delà duquel la recherche s'arrête (MAX_MATCHES par défaut)
+        @type max_matches : int
+
+        @param persons : Personne revendiquée pour chaque empreinte (vérification) ou None (identification parmi toute la BDD)
+        @type persons : Tableau de String
+
+        @param prefilter : Nombre d'empreintes de la BDD comparées en détail à chaque empreinte (PREFILTER par défaut, None = toutes)
+        @type prefilter : int
+
+        @param binning : Comparaison aux seules empreintes de classes compatibles (BINNING par défaut)
+        @type binning : bool
+
+        @param segment : Extraction et comparaison des minuties limitées à la zone de chaque empreinte (SEGMENTATION par défaut)
+        @type segment : bool
+
+        @return: Résultat de la reconnaissance de chaque empreinte
+        @rtype: Tableau de RecognitionResult
+
+        """
+
+        # Paramètres de recherche par défaut
+        search_radius = SEARCH_RADIUS if search_radius is None else search_radius
+        max_matches = max_matches or MAX_MATCHES
+        persons = persons or [None] * len(images)
+        prefilter = prefilter or PREFILTER
+        binning = BINNING if binning is None else binning
+        segment = SEGMENTATION if segment is None else segment
+
+        # Au moins une méthode de correspondance (la décision par variance utilise toujours les cinq méthodes, cf. compare_entry)
+        if match_methods is not None and (not match_methods or any(method not in TEMPLATE_METHODS for method in match_methods)):
+            raise ValueError("Méthodes de correspondance non reconnues.")
+
+        with tracing.span("query", probes=len(images)):
+            # Chargement de la BDD (uniquement lors de la première utilisation des méthodes)
+            database = self.database(binarization_methods, skeletonize_methods)
+
+            # Prétraitement des empreintes à traiter (en piles d'images de même taille)
+            results = preprocess_probes(images, binarization_methods, skeletonize_methods, segment)
+
+            # Empreintes de la BDD retenues pour chaque empreinte du lot (None = toutes)
+            selected = [None] * len(results)
+
+            # Classification : empreintes de la BDD de classes compatibles avec celle de chaque empreinte du lot
+            if binning:
+                classes = self.database_classes(database)
+                with tracing.span("classify", probes=len(images)):
+                    for k, result in enumerate(results):
+                        result.pattern_class = classification.classify(result.binarized_image)
+                        allowed = classification.candidate_classes(result.pattern_class)
+                        if allowed is not None:
+                            selected[k] = np.isin(classes, list(allowed))
+
+            # Premier étage : les prefilter plus proches parmi les empreintes retenues par la classification
+            if prefilter is not None:
+                features = self.database_features(binarization_methods, skeletonize_methods, database)
+                with tracing.span("prefilter", probes=len(images), entries=len(database)):
+                    for k, result in enumerate(results):
+                        allowed = np.ones(len(database), dtype=bool) if selected[k] is None else selected[k]
+                        kept = prefilter_candidates(global_features(result.minutiae, result.skeleton_image.shape), features[allowed], prefilter)
+                        selected[k] = np.zeros(len(database), dtype=bool)
+                        selected[k][np.flatnonzero(allowed)[kept]] = True
+
+            # Empreintes écartées avant la comparaison détaillée
+            for k, result in enumerate(results):
+                if selected[k] is not None:
+                    result.pruned_entries = len(database) - int(selected[k].sum())
+                    tracing.count("entries_pruned", result.pruned_entries)
+
+            # Empreintes dont la recherche n'est pas terminée
+            pending = list(range(len(results)))
+
+            # Enregistrement du temps de début de la reconnaissance
+            start = time.perf_counter()
+
+            # Comparaison de chaque empreinte de la BDD avec toutes les empreintes du lot
+            with tracing.span("match_batch", probes=len(images)):
+                for index, (img, person, minuties, skeleton_image_bdd) in enumerate(database):
+                    for k in pending:
+                        # Empreinte écartée par la classification ou le premier étage (déjà comptée)
+                        if selected[k] is not None and not selected[k][index]:
+                            continue
+
+                        # Vérification : seules les empreintes de la personne revendiquée sont comparées
+                        if persons[k] is not None and persons[k] != person:
+                            tracing.count("entries_pruned")
+                            continue
+
+                        with tracing.span("compare_entry", image=img):
+                            cpt = compare_entry(results[k].skeleton_image, skeleton_image_bdd, minuties, nb_minutiae, search_radius, match_methods, results[k].foreground_mask)
+                        tracing.count("entries_compared")
+
+                        if cpt >= nb_minutiae:
+                            results[k].candidates.append((person, cryptage.decodeImage(self.decrypt(img))))
+
+                    # Une recherche s'arrête à max_matches personnes reconnues, une vérification à la première correspondance
+                    remaining = [k for k in pending if not ((max_matches is not None and len(results[k].candidates) >= max_matches)
+                                                            or (persons[k] is not None and results[k].candidates))]
+
+                    # Entrées restantes non comparées pour les recherches terminées (hors entrées déjà écartées par la classification ou le premier étage)
+                    tracing.count("entries_skipped", sum(len(database) - index - 1 if selected[k] is None else int(selected[k][index + 1:].sum())
+                                                         for k in pending if k not in remaining))
+                    pending = remaining
+
+                    if not pending:
+                        break
+
+            # Calcul du temps pris par la reconnaissance
+            detection_time = time.perf_counter() - start
+            for result in results:
+                result.detection_time = detection_time
+
+        return results
+
+    def identify_descriptors(self, images, binarization_methods, threshold=None, max_matches=None, persons=None):
+        """! Reconnaissance par descripteurs de minuties
+
+        Fonction pour reconnaître des empreintes en comparant les descripteurs de leurs minuties à ceux de toute la BDD (cf. descriptors.py), sans squelettisation ni template matching.
+
+        EXPLICATION :
+        -- Chaque empreinte est comparée à toute la BDD en une fois (descriptors.Gallery.scores) : la BDD n'est pas parcourue image par image.
+        -- Les candidats sont les empreintes de la BDD dont le score atteint le seuil, par score décroissant.
+
+        @param images: Images à traiter
+        @type images: Tableau de String, de bytes (contenu encodé) ou de Tableau d'image
+
+        @param binarization_methods : Méthode de binarisaiton
+        @type binarization_methods : String
+
+        @param threshold : Score minimal d'une empreinte reconnue (DESCRIPTOR_THRESHOLD par défaut)
+        @type threshold : float
+
+        @param max_matches : Nombre maximal de candidats (MAX_MATCHES par défaut)
+        @type max_matches : int
+
+        @param persons : Personne revendiquée pour chaque empreinte (vérification) ou None (identification parmi toute la BDD)
+        @type persons : Tableau de String
+
+        @return: Résultat de la reconnaissance de chaque empreinte (avec le score de chaque candidat)
+        @rtype: Tableau de RecognitionResult
+
+        """
+
+        # Paramètres de recherche par défaut
+        threshold = DESCRIPTOR_THRESHOLD if threshold is None else threshold
+        max_matches = max_matches or MAX_MATCHES
+        persons = persons or [None] * len(images)
+
+        with tracing.span("query", probes=len(images)):
+            # Chargement des descripteurs de la BDD (uniquement lors de la première utilisation de la méthode)
+            entries, gallery = self.gallery(binarization_methods)
+            owners = np.array([person for _, person in entries], dtype=object)
+
+            results = []
+            for image, claimed in zip(images, persons):
+                result, template = preprocess_probe_template(image, binarization_methods)
+
+                # Comparaison avec toute la BDD
+                start = time.perf_counter()
+                with tracing.span("match_gallery", entries=gallery.size):
+                    scores = gallery.scores(template)
+                tracing.count("entries_compared", gallery.size)
+
+                # Vérification : seules les empreintes de la personne revendiquée sont retenues
+                if claimed is not None:
+                    scores = np.where(owners == claimed, scores, 0.0)
+
+                # Empreintes reconnues par score décroissant
+                order = [k for k in np.argsort(-scores, kind='stable') if scores[k] >= threshold][:max_matches]
+                result.candidates = [(entries[k][1], cryptage.decodeImage(self.decrypt(entries[k][0]))) for k in order]
+                result.scores = [float(scores[k]) for k in order]
+                result.detection_time = time.perf_counter() - start
+                results.append(result)
+
+        return results
+
+def main(image_path, binarization_methods, skeletonize_methods, nb_minutiae, search_radius=None, match_methods=None, workers=None, max_matches=None):
+    """! Reconnaissance d'empreinte digitale
+
+    Fonction principale pour effectuer toutes les étapes de reconnaissance d'empreintes digitales (cf. recognize pour le détail des étapes et des temps d'exécution).
+    
+    @param image_path: Image à traiter
+    @type image_path: String (Adresse de l'image), bytes (contenu encodé) ou Tableau d'image
+
+    @param binarization_methods : Méthode de binarisaiton
+    @type binarization_methods : String
+
+    @param skeletonize_methods : Méthode de squelettisation
+    @type skeletonize_methods : String
+
+    @param nb_minutiae : Nombre de minuties à prélever
+    @type nb_minutiae : int
+
+    @param search_radius : Déplacement toléré d'une minutie en pixels (SEARCH_RADIUS par défaut)
+    @type search_radius : int
+
+    @param match_methods : Méthodes de correspondance à combiner (MATCH_METHODS par défaut)
+    @type match_methods : Tableau de String
+
+    @param workers : Nombre de processus de reconnaissance (WORKERS par défaut)
+    @type workers : int
+
+    @param max_matches : Nombre de personnes reconnues au-delà duquel la recherche s'arrête (MAX_MATCHES par défaut)
+    @type max_matches : int
+
+    @return: Personnes reconnues et images associées [personne, image, personne, image, ...]
+    @rtype: Tableau
+
+    """
+
+    return recognize(image_path, binarization_methods, skeletonize_methods, nb_minutiae, search_radius, match_methods, workers, max_matches).legacy()
 
 # Exécute la fonction main
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file segmentation.py
+#
+# @brief Segmentation de l'empreinte (zone couverte par des crêtes) pour ignorer le fond de l'image lors de l'extraction et de la comparaison des minuties.
+#
+# EXPLICATION :
+#   -- L'image est découpée en blocs de BLOCK x BLOCK pixels : le fond est uniforme (variance faible) alors que les crêtes alternent avec les vallées (variance élevée).
+#   -- Un bloc appartient à l'empreinte si sa variance dépasse VARIANCE_RATIO fois la variance de toute l'image (seuil relatif, indépendant du contraste du capteur).
+#   -- Les trous à l'intérieur de l'empreinte sont bouchés (fermeture) et les blocs isolés du fond supprimés (ouverture), puis le masque est ramené à la taille de l'image.
+#   -- Une marge de MARGIN pixels est retirée au bord de l'empreinte : les crêtes y sont coupées et produisent de fausses minuties.
+#   -- Le rectangle englobant du masque borne la zone parcourue par crossing_number.
+#
+# @section Description
+# Segmentation réalisée avec numpy et OpenCV
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - cv2 extern library (https://pypi.org/project/opencv-python/)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import cv2
+
+def block_variance(image):
+    """! Variance par blocs
+
+    @param image: Image à découper en blocs de BLOCK x BLOCK pixels (le dernier bloc de chaque ligne et de chaque colonne est complété en répétant le bord)
+    @type image: Tableau d'image
+
+    @return: Variance de chaque bloc
+    @rtype: Tableau de réels (nombre de blocs sur la hauteur, nombre de blocs sur la largeur)
+
+    """
+
+    # Image complétée jusqu'à un nombre entier de blocs
+    rows, cols = -(-image.shape[0] // BLOCK), -(-image.shape[1] // BLOCK)
+    padded = np.pad(image.astype(np.float64), ((0, rows * BLOCK - image.shape[0]), (0, cols * BLOCK - image.shape[1])), mode='edge')
+    blocks = padded.reshape(rows, BLOCK, cols, BLOCK)
+
+    return blocks.var(axis=(1, 3))
+
+def foreground_blocks(image):
+    """! Blocs de l'empreinte
+
+    @param image: Image en niveau de gris (ou binarisée)
+    @type image: Tableau d'image
+
+    @return: Blocs appartenant à l'empreinte
+    @rtype: Tableau de bool (nombre de blocs sur la hauteur, nombre de blocs sur la largeur)
+
+    """
+
+    # Blocs dont la variance dépasse le seuil relatif
+    variance = block_variance(image)
+    blocks = (variance > VARIANCE_RATIO * image.var()).astype(np.uint8)
+
+    # Trous de l'empreinte bouchés puis blocs isolés supprimés
+    kernel = np.ones((3, 3), np.uint8)
+    blocks = cv2.morphologyEx(blocks, cv2.MORPH_CLOSE, kernel)
+    blocks = cv2.morphologyEx(blocks, cv2.MORPH_OPEN, kernel)
+
+    return blocks.astype(bool)
+
+def bounding_box(mask):
+    """! Rectangle englobant d'un masque
+
+    @param mask: Masque de l'empreinte
+    @type mask: Tableau de bool
+
+    @return: Position (x, y), largeur et hauteur du rectangle englobant (0, 0, 0, 0 si le masque est vide)
+    @rtype: Tuple (int, int, int, int)
+
+    """
+
+    return cv2.boundingRect(mask.astype(np.uint8))
+
+def segment(image):
+    """! Segmentation de l'empreinte
+
+    Fonction pour délimiter la zone de l'image couverte par l'empreinte.
+
+    @param image: Image en niveau de gris (ou binarisée)
+    @type image: Tableau d'image
+
+    @return: Masque de l'empreinte (de la taille de l'image) et son rectangle englobant (cf. bounding_box)
+    @rtype: Tuple (Tableau de bool, Tuple)
+
+    """
+
+    # Masque des blocs ramené à la taille de l'image
+    blocks = foreground_blocks(image)
+    mask = np.repeat(np.repeat(blocks, BLOCK, axis=0), BLOCK, axis=1)[:image.shape[0], :image.shape[1]].astype(np.uint8)
+
+    # Retrait d'une marge au bord de l'empreinte (le bord de l'image n'est pas érodé)
+    if MARGIN > 0:
+        mask = cv2.erode(mask, np.ones((2 * MARGIN + 1, 2 * MARGIN + 1), np.uint8))
+
+    mask = mask.astype(bool)
+
+    return mask, bounding_box(mask)
+
+# Initialisation de variables
+BLOCK = 16                        # Taille des blocs (en pixels)
+VARIANCE_RATIO = 0.1              # Variance minimale d'un bloc de l'empreinte (par rapport à la variance de toute l'image)
+MARGIN = 8                        # Marge retirée au bord de l'empreinte (en pixels)
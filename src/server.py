@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file server.py
+#
+# @brief Service local de reconnaissance d'empreintes digitales.
+#
+# EXPLICATION :
+#   -- Le service garde en mémoire un moteur de reconnaissance (project.RecognitionEngine) : clés, minuties et squelettes de la BDD ne sont chargés qu'une fois.
+#   -- Il répond en HTTP (JSON) sur l'adresse locale :
+#        GET  /health    : état du service
+#        POST /identify  : {"image": <image encodée en base64> ou "path": <chemin>, "binarization", "skeletonization", "minutiae", "search_radius", "max_matches", "prefilter", "binning", "segment"}
+#        POST /verify    : mêmes paramètres avec "person", la personne revendiquée
+#        POST /reload    : relecture des clés et de la BDD (ex : après un enrôlement)
+#        GET  /metrics   : durées des étapes et compteurs au format texte de Prometheus (cf. tracing.py)
+#   -- Les requêtes arrivant à moins de --batch-window millisecondes d'intervalle sont regroupées (au plus --max-batch) et reconnues en un seul parcours de la BDD.
+#   -- Au plus --concurrency lots sont reconnus en même temps, au-delà de --max-pending requêtes en attente le service répond 503.
+#   -- Les images sont décodées par les threads du service (comme les reconnaissances) : la boucle asyncio ne fait que lire les requêtes et écrire les réponses.
+#
+# @section Description
+# Service réalisé avec la librairie asyncio (sans dépendance externe)
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+# - asyncio standard library (https://docs.python.org/3/library/asyncio.html)
+# - argparse standard library (https://docs.python.org/3/library/argparse.html)
+# - base64 standard library (https://docs.python.org/3/library/base64.html?highlight=base64#module-base64)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+# - concurrent.futures standard library (https://docs.python.org/3/library/concurrent.futures.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+import asyncio, argparse, base64, json, time
+import concurrent.futures
+
+# Import des autres fichiers
+import project, cryptage, tracing
+
+class HTTPError(Exception):
+    """! Erreur renvoyée au client
+
+    Exception portant le code HTTP et le message de la réponse.
+
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class MicroBatcher:
+    """! Regroupement des requêtes
+
+    Classe regroupant les requêtes proches dans le temps en lots reconnus par le moteur en un seul parcours de la BDD.
+
+    """
+
+    def __init__(self, engine, batch_window=None, max_batch=None, concurrency=None, max_pending=None):
+        """! Création du regroupement
+
+        @param engine: Moteur de reconnaissance
+        @type engine: project.RecognitionEngine
+
+        @param batch_window: Durée d'attente des requêtes d'un lot en secondes (BATCH_WINDOW par défaut)
+        @type batch_window: float
+
+        @param max_batch: Nombre maximal de requêtes d'un lot (MAX_BATCH par défaut)
+        @type max_batch: int
+
+        @param concurrency: Nombre de lots reconnus en même temps (CONCURRENCY par défaut)
+        @type concurrency: int
+
+        @param max_pending: Nombre maximal de requêtes en attente (MAX_PENDING par défaut)
+        @type max_pending: int
+
+        """
+
+        self.engine = engine
+        self.batch_window = BATCH_WINDOW if batch_window is None else batch_window
+        self.max_batch = max_batch or MAX_BATCH
+        self.concurrency = concurrency or CONCURRENCY
+        self.max_pending = max_pending or MAX_PENDING
+        self.queue = asyncio.Queue()                                                                   # Requêtes en attente : (paramètres, image, personne, future)
+        self.semaphore = asyncio.Semaphore(self.concurrency)                                           # Limite du nombre de lots en cours
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.concurrency, thread_name_prefix="reconnaissance")
+        self.tasks = set()                                                                             # Lots en cours
+        self.batches = 0                                                                               # Nombre de lots reconnus
+        self.requests = 0                                                                              # Nombre de requêtes reconnues
+
+    async def submit(self, params, image, person=None):
+        """! Soumission d'une requête
+
+        @param params: Paramètres de la reconnaissance (binarization, skeletonization, minutiae, search_radius, max_matches, prefilter, binning, segment)
+        @type params: Tuple
+
+        @param image: Image à traiter
+        @type image: String ou Tableau d'image
+
+        @param person: Personne revendiquée (vérification) ou None (identification)
+        @type person: String
+
+        @return: Résultat de la reconnaissance et taille du lot
+        @rtype: Tuple (project.RecognitionResult, int)
+
+        """
+
+        if self.queue.qsize() >= self.max_pending:
+            raise HTTPError(503, "Trop de requêtes en attente.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((params, image, person, future))
+
+        return await future
+
+    async def run(self):
+        """! Constitution des lots
+
+        Boucle attendant une requête, puis les suivantes pendant batch_window secondes, avant de lancer la reconnaissance du lot.
+
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Attente de la première requête du lot puis des requêtes proches
+            requests = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(requests) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    requests.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Un lot par jeu de paramètres (méthodes, nombre de minuties, ...)
+            groups = {}
+            for request in requests:
+                groups.setdefault(request[0], []).append(request)
+
+            for params, group in groups.items():
+                # Attente d'une place libre avant de lancer le lot (les requêtes suivantes restent dans la file)
+                await self.semaphore.acquire()
+                task = asyncio.create_task(self.recognize(params, group))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+    async def recognize(self, params, group):
+        """! Reconnaissance d'un lot
+
+        @param params: Paramètres de la reconnaissance
+        @type params: Tuple
+
+        @param group: Requêtes du lot
+        @type group: Tableau de Tuple
+
+        """
+
+        binarization, skeletonization, nb_minutiae, search_radius, max_matches, prefilter, binning, segment = params
+        images = [image for _, image, _, _ in group]
+        persons = [person for _, _, person, _ in group]
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.engine.identify_batch, images, binarization, skeletonization,
+                                                                       nb_minutiae, search_radius, None, max_matches, persons, prefilter, binning, segment)
+        except Exception as e:
+            for _, _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.batches += 1
+            self.requests += len(group)
+            for (_, _, _, future), result in zip(group, results):
+                if not future.done():
+                    future.set_result((result, len(group)))
+        finally:
+            self.semaphore.release()
+
+def request_params(body):
+    """! Paramètres d'une requête
+
+    @param body: Corps JSON de la requête
+    @type body: Dictionnaire
+
+    @return: Paramètres de la reconnaissance
+    @rtype: Tuple
+
+    """
+
+    try:
+        params = (
+            body.get("binarization", "Méthode d'Otsu"),
+            body.get("skeletonization", "Filtre Laplacien"),
+            int(body.get("minutiae", 12)),
+            None if body.get("search_radius") is None else int(body["search_radius"]),
+            None if body.get("max_matches") is None else int(body["max_matches"]),
+            None if body.get("prefilter") is None else int(body["prefilter"]),
+            None if body.get("binning") is None else bool(body["binning"]),
+            None if body.get("segment") is None else bool(body["segment"]),
+        )
+    except (TypeError, ValueError):
+        raise HTTPError(400, "Paramètres invalides.")
+
+    if params[0] not in ["Méthode d'Otsu", "Moyenne adaptative", "Gaussienne adaptative"]:
+        raise HTTPError(400, "Méthode de binarisation non reconnue.")
+
+    if params[1] not in ["Filtre Laplacien", "Filtre Sobel", "zhang_suen", "guo_hall", "morphology"]:
+        raise HTTPError(400, "Méthode de squelettisation non reconnue.")
+
+    return params
+
+def request_image(body):
+    """! Image d'une requête
+
+    Fonction pour décoder l'image à traiter (exécutée par les threads du service pour ne pas bloquer la boucle asyncio).
+
+    @param body: Corps JSON de la requête
+    @type body: Dictionnaire
+
+    @return: Image à traiter en niveau de gris
+    @rtype: Tableau d'image
+
+    """
+
+    if "image" in body:
+        # Image encodée (tif, png, ...) transmise en base64
+        try:
+            image = cryptage.decodeImage(base64.b64decode(body["image"]))
+        except Exception:
+            image = None
+        if image is None:
+            raise HTTPError(400, "Image illisible.")
+    elif "path" in body:
+        # Image lue par le service
+        try:
+            image = cryptage.decodeImage(np.fromfile(body["path"], np.uint8))
+        except (OSError, TypeError, ValueError):
+            image = None
+        if image is None:
+            raise HTTPError(400, "Image introuvable ou illisible.")
+    else:
+        raise HTTPError(400, "Image absente (champ image ou path).")
+
+    return image
+
+def result_json(result, batch_size):
+    """! Résultat d'une reconnaissance au format JSON
+
+    @param result: Résultat de la reconnaissance
+    @type result: project.RecognitionResult
+
+    @param batch_size: Taille du lot de la requête
+    @type batch_size: int
+
+    @return: Résultat sérialisable en JSON
+    @rtype: Dictionnaire
+
+    """
+
+    return {
+        "persons": result.persons(),
+        "minutiae_number": result.minutiae_number,
+        "bifurcation_number": result.bifurcation_number,
+        "pruned_entries": result.pruned_entries,
+        "pattern_class": result.pattern_class,
+        "bounding_box": result.bounding_box,
+        "timings": {
+            "binarize": result.binarized_time,
+            "skeletonize": result.skeleton_time,
+            "minutiae": result.minutiae_time,
+            "detection": result.detection_time,
+        },
+        "batch_size": batch_size,
+    }
+
+async def dispatch(batcher, method, path, body):
+    """! Traitement d'une requête
+
+    @param batcher: Regroupement des requêtes
+    @type batcher: MicroBatcher
+
+    @param method: Méthode HTTP
+    @type method: String
+
+    @param path: Chemin de la requête
+    @type path: String
+
+    @param body: Corps de la requête
+    @type body: bytes
+
+    @return: Réponse JSON (ou texte pour /metrics)
+    @rtype: Dictionnaire ou String
+
+    """
+
+    if method == "GET" and path == "/metrics":
+        return tracing.TRACER.prometheus()
+
+    if method == "GET" and path == "/health":
+        return {"status": "ok", "pending": batcher.queue.qsize(), "batches": batcher.batches, "requests": batcher.requests,
+                "loaded": [list(key) for key in batcher.engine.databases]}
+
+    if method != "POST" or path not in ("/identify", "/verify", "/reload"):
+        raise HTTPError(404, "Ressource inconnue.")
+
+    if path == "/reload":
+        await asyncio.get_running_loop().run_in_executor(batcher.executor, batcher.engine.reload)
+        return {"status": "ok"}
+
+    try:
+        body = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "JSON invalide.")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "JSON invalide.")
+
+    # Paramètres vérifiés avant le décodage de l'image, effectué hors de la boucle asyncio
+    params = request_params(body)
+    image = await asyncio.get_running_loop().run_in_executor(batcher.executor, request_image, body)
+
+    start = time.perf_counter()
+    if path == "/identify":
+        result, batch_size = await batcher.submit(params, image)
+        response = result_json(result, batch_size)
+    else:
+        if not isinstance(body.get("person"), str):
+            raise HTTPError(400, "Personne absente (champ person).")
+        # Une vérification s'arrête à la première correspondance et ne compare que les empreintes de la personne : max_matches, prefilter et binning ne sont pas utilisés
+        result, batch_size = await batcher.submit(params[:4] + (None, None, False) + params[7:], image, body["person"])
+        response = result_json(result, batch_size)
+        response["person"] = body["person"]
+        response["match"] = body["person"] in result.persons()
+    response["latency"] = time.perf_counter() - start
+
+    return response
+
+async def handle_connection(batcher, reader, writer):
+    """! Gestion d'une connexion HTTP
+
+    Fonction pour lire les requêtes HTTP/1.1 d'une connexion (connexion persistante) et écrire les réponses.
+
+    @param batcher: Regroupement des requêtes
+    @type batcher: MicroBatcher
+
+    @param reader: Flux de lecture de la connexion
+    @type reader: asyncio.StreamReader
+
+    @param writer: Flux d'écriture de la connexion
+    @type writer: asyncio.StreamWriter
+
+    """
+
+    try:
+        while True:
+            # Ligne de requête et en-têtes
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+
+            lines = head.decode('latin-1').split("\r\n")
+            try:
+                method, path, _ = lines[0].split(" ", 2)
+            except ValueError:
+                break
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            keep_alive = headers.get("connection", "").lower() != "close"
+
+            try:
+                # Corps de la requête
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    keep_alive = False
+                    raise HTTPError(413, "Requête trop volumineuse.")
+                body = await reader.readexactly(length) if length else b""
+
+                status, response = 200, await dispatch(batcher, method, path.split("?", 1)[0], body)
+            except HTTPError as e:
+                status, response = e.status, {"error": str(e)}
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as e:
+                status, response = 500, {"error": str(e)}
+
+            # Réponse JSON (texte pour /metrics)
+            if isinstance(response, str):
+                data, content_type = response.encode('utf-8'), "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                data, content_type = json.dumps(response, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8"
+            writer.write(f"HTTP/1.1 {status} {STATUS_REASONS.get(status, 'Error')}\r\n"
+                         f"Content-Type: {content_type}\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=None, port=None, engine=None, batch_window=None, max_batch=None, concurrency=None, max_pending=None, preload=None):
+    """! Lancement du service
+
+    @param host: Adresse d'écoute (HOST par défaut)
+    @type host: String
+
+    @param port: Port d'écoute (PORT par défaut)
+    @type port: int
+
+    @param engine: Moteur de reconnaissance (créé à partir de DB, DB.csv et key.txt par défaut)
+    @type engine: project.RecognitionEngine
+
+    @param batch_window: Durée d'attente des requêtes d'un lot en secondes (BATCH_WINDOW par défaut)
+    @type batch_window: float
+
+    @param max_batch: Nombre maximal de requêtes d'un lot (MAX_BATCH par défaut)
+    @type max_batch: int
+
+    @param concurrency: Nombre de lots reconnus en même temps (CONCURRENCY par défaut)
+    @type concurrency: int
+
+    @param max_pending: Nombre maximal de requêtes en attente (MAX_PENDING par défaut)
+    @type max_pending: int
+
+    @param preload: Méthodes (binarisation, squelettisation) dont la BDD est chargée au démarrage
+    @type preload: Tableau de Tuple
+
+    """
+
+    engine = engine or project.RecognitionEngine()
+    batcher = MicroBatcher(engine, batch_window, max_batch, concurrency, max_pending)
+
+    # Chargement de la BDD avant d'accepter les requêtes
+    for binarization, skeletonization in preload or []:
+        engine.database(binarization, skeletonization)
+
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(batcher, reader, writer), host or HOST, port or PORT)
+    batching = asyncio.create_task(batcher.run())
+
+    print(f"Service de reconnaissance à l'écoute sur {', '.join(str(s.getsockname()) for s in server.sockets)}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batching.cancel()
+        batcher.executor.shutdown(wait=False)
+
+# Initialisation de variables
+HOST = "127.0.0.1"       # Adresse d'écoute (locale uniquement)
+PORT = 8765              # Port d'écoute
+BATCH_WINDOW = 0.01      # Durée d'attente des requêtes d'un lot (en secondes)
+MAX_BATCH = 8            # Nombre maximal de requêtes d'un lot
+CONCURRENCY = 2          # Nombre de lots reconnus en même temps
+MAX_PENDING = 64         # Nombre maximal de requêtes en attente
+MAX_BODY = 16 * 1024**2  # Taille maximale du corps d'une requête (en octets)
+STATUS_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Exécute le service
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service local de reconnaissance d'empreintes digitales (HTTP/JSON).")
+    parser.add_argument("--host", default=HOST, help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=PORT, help="Port d'écoute")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW * 1000, help="Durée d'attente des requêtes d'un lot (en millisecondes)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Nombre maximal de requêtes d'un lot")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Nombre de lots reconnus en même temps")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="Nombre maximal de requêtes en attente")
+    parser.add_argument("--db", default="DB", help="Dossier de la BDD")
+    parser.add_argument("--key", default="key.txt", help="Fichier contenant la clé de cryptage")
+    parser.add_argument("--preload", default="Méthode d'Otsu", help="Méthode de binarisation dont la BDD est chargée au démarrage (Filtre Laplacien)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, project.RecognitionEngine(args.db, key_file=args.key), args.batch_window / 1000, args.max_batch,
+                          args.concurrency, args.max_pending, [(args.preload, "Filtre Laplacien")] if args.preload else None))
+    except KeyboardInterrupt:
+        pass
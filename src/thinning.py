@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file thinning.py
+#
+# @brief Squelettisation (amincissement) des crêtes d'une image binarisée avec les méthodes de Zhang-Suen et de Guo-Hall.
+#
+# EXPLICATION :
+#   -- Remplace cv2.ximgproc.thinning, qui n'existe que dans opencv-contrib-python : le squelette obtenu a une épaisseur d'un pixel, ce qui fiabilise le crossing number.
+#   -- Les 8 voisins d'un pixel sont codés sur un octet (bit 0 = voisin du haut, puis dans le sens des aiguilles d'une montre). La décision de supprimer un pixel ne dépend que de ce code : elle est précalculée pour les 256 codes et pour chacune des deux sous-itérations (table LUTS).
+#   -- Seuls les pixels dont le voisinage a changé depuis leur dernière évaluation sont réévalués : les premières itérations traitent toute la crête, les suivantes quelques pixels seulement.
+#   -- Les crêtes sont les pixels noirs de l'image binarisée (valeur 0), le squelette est renvoyé en blanc (255) sur fond noir comme les filtres de skeletonize_image.
+#
+# @section Description
+# Squelettisation réalisée avec numpy
+#
+# @section Libraries/Modules
+# - numpy extern library (https://numpy.org/)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import numpy as np
+
+def neighbours(code):
+    """! Voisins d'un pixel
+
+    @param code: Code du voisinage (bit k = voisin k)
+    @type code: int
+
+    @return: Voisins P2 à P9 (haut, haut-droite, droite, bas-droite, bas, bas-gauche, gauche, haut-gauche) valant 0 ou 1
+    @rtype: Tableau de int
+
+    """
+
+    return [(code >> k) & 1 for k in range(8)]
+
+def zhang_suen_rule(code, step):
+    """! Règle de suppression de Zhang-Suen
+
+    @param code: Code du voisinage du pixel
+    @type code: int
+
+    @param step: Sous-itération (0 ou 1)
+    @type step: int
+
+    @return: Vrai si le pixel doit être supprimé
+    @rtype: bool
+
+    """
+
+    p2, p3, p4, p5, p6, p7, p8, p9 = neighbours(code)
+    sequence = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+
+    # Nombre de transitions 0 -> 1 autour du pixel et nombre de voisins appartenant à la crête
+    transitions = sum(sequence[k] == 0 and sequence[k + 1] == 1 for k in range(8))
+    count = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+
+    if step == 0:
+        m1, m2 = p2 * p4 * p6, p4 * p6 * p8
+    else:
+        m1, m2 = p2 * p4 * p8, p2 * p6 * p8
+
+    return transitions == 1 and 2 <= count <= 6 and m1 == 0 and m2 == 0
+
+def guo_hall_rule(code, step):
+    """! Règle de suppression de Guo-Hall
+
+    @param code: Code du voisinage du pixel
+    @type code: int
+
+    @param step: Sous-itération (0 ou 1)
+    @type step: int
+
+    @return: Vrai si le pixel doit être supprimé
+    @rtype: bool
+
+    """
+
+    p2, p3, p4, p5, p6, p7, p8, p9 = neighbours(code)
+
+    # Nombre de composantes connexes de la crête autour du pixel
+    connectivity = ((not p2) and (p3 or p4)) + ((not p4) and (p5 or p6)) + ((not p6) and (p7 or p8)) + ((not p8) and (p9 or p2))
+    n1 = (p9 or p2) + (p3 or p4) + (p5 or p6) + (p7 or p8)
+    n2 = (p2 or p3) + (p4 or p5) + (p6 or p7) + (p8 or p9)
+
+    if step == 0:
+        m = (p6 or p7 or not p9) and p8
+    else:
+        m = (p2 or p3 or not p5) and p4
+
+    return connectivity == 1 and 2 <= min(n1, n2) <= 3 and not m
+
+def build_lut(rule):
+    """! Table de suppression
+
+    @param rule: Règle de suppression (zhang_suen_rule ou guo_hall_rule)
+    @type rule: Fonction
+
+    @return: Décision de suppression pour chaque sous-itération et chaque code de voisinage
+    @rtype: Tableau de bool (2 x 256)
+
+    """
+
+    return np.array([[bool(rule(code, step)) for code in range(256)] for step in (0, 1)])
+
+def thin(image, method):
+    """! Squelettisation d'une image binarisée
+
+    @param image: Image binarisée (crêtes noires sur fond blanc)
+    @type image: Tableau d'image
+
+    @param method: Méthode de squelettisation (zhang_suen ou guo_hall)
+    @type method: String
+
+    @return: Squelette des crêtes (255) sur fond noir (0)
+    @rtype: Tableau d'image (uint8)
+
+    """
+
+    if method not in LUTS:
+        raise ValueError("Méthode de squelettisation non reconnue.")
+
+    # Crêtes à 1 sur fond à 0, avec une bordure de fond pour que chaque pixel ait 8 voisins
+    rows, cols = image.shape
+    padded = np.zeros((rows + 2, cols + 2), np.uint8)
+    padded[1:-1, 1:-1] = image < 128
+    pixels = padded.ravel()
+
+    # Décalage de chaque voisin dans l'image aplatie (même ordre que les bits du code)
+    width = cols + 2
+    offsets = np.array([di * width + dj for di, dj in NEIGHBOURS])
+
+    # Pixels à évaluer par chaque sous-itération (au départ toute la crête) et masques de ces pixels (un pixel n'est ajouté qu'une fois)
+    candidates = [np.flatnonzero(pixels)] * 2
+    queued = [pixels.copy(), pixels.copy()]
+    stamps = np.zeros(len(pixels), np.int32) # Dernière position de chaque pixel dans la liste en cours de dédoublonnage
+
+    while len(candidates[0]) or len(candidates[1]):
+        for step in (0, 1):
+            current = candidates[step]
+            candidates[step] = current[:0]
+            if not len(current):
+                continue
+
+            # Pixels à évaluer encore dans la crête
+            queued[step][current] = 0
+            current = current[pixels[current] == 1]
+
+            # Code du voisinage de chaque pixel évalué
+            codes = np.zeros(len(current), np.uint8)
+            for k, offset in enumerate(offsets):
+                codes |= pixels[current + offset] << k
+
+            # Suppression simultanée des pixels de la sous-itération
+            removed = current[LUTS[method][step][codes]]
+            if not len(removed):
+                continue
+            pixels[removed] = 0
+
+            # Voisins des pixels supprimés encore dans la crête, sans doublons (sans tri, contrairement à np.unique : chaque pixel note sa dernière position)
+            touched = (removed[:, None] + offsets).ravel()
+            touched = touched[pixels[touched] == 1]
+            positions = np.arange(len(touched), dtype=np.int32)
+            stamps[touched] = positions
+            touched = touched[stamps[touched] == positions]
+
+            # Ils sont réévalués par les deux sous-itérations
+            for k in (0, 1):
+                added = touched[queued[k][touched] == 0]
+                queued[k][added] = 1
+                candidates[k] = np.concatenate((candidates[k], added))
+
+    return padded[1:-1, 1:-1] * np.uint8(255)
+
+# Initialisation de variables
+NEIGHBOURS = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)] # Décalage (ligne, colonne) du voisin codé par chaque bit
+LUTS = {
+    "zhang_suen": build_lut(zhang_suen_rule), # Table de suppression de Zhang-Suen
+    "guo_hall": build_lut(guo_hall_rule),     # Table de suppression de Guo-Hall
+}
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file tracing.py
+#
+# @brief Chronométrage des étapes de la reconnaissance et export des mesures.
+#
+# EXPLICATION :
+#   -- Chaque étape instrumentée est une période (span) chronométrée avec time.perf_counter_ns : reconnaissance, décryptage, prétraitement d'une image de la BDD, appels à matchTemplate, recryptage, ...
+#   -- Les périodes sont imbriquées : chacune connaît la période qui l'englobe dans le même thread.
+#   -- Des compteurs complètent les durées (modèles évalués, entrées de la BDD écartées, entrées lues dans le cache, ...).
+#   -- Les durées sont agrégées par nom de période (nombre, total, maximum, histogramme) et les dernières périodes sont conservées pour l'export JSON.
+#   -- Les mesures peuvent être exportées au format JSON ou au format texte de Prometheus.
+#   -- Les mesures des processus de reconnaissance (project.WORKERS > 1) ne sont pas remontées au processus principal.
+#
+# @section Description
+# Mesures réalisées avec time.perf_counter_ns
+#
+# @section Libraries/Modules
+# - collections standard library (https://docs.python.org/3/library/collections.html)
+# - contextlib standard library (https://docs.python.org/3/library/contextlib.html)
+# - json standard library (https://docs.python.org/3/library/json.html)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - threading standard library (https://docs.python.org/3/library/threading.html)
+# - time standard library (https://docs.python.org/3/library/time.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import collections, contextlib, json, os, threading, time
+
+class Tracer:
+    """! Chronométrage des étapes
+
+    Classe enregistrant les périodes chronométrées et les compteurs d'un processus (utilisable par plusieurs threads).
+
+    """
+
+    def __init__(self, max_spans=None):
+        """! Création du chronométrage
+
+        @param max_spans: Nombre de périodes conservées pour l'export JSON (MAX_SPANS par défaut)
+        @type max_spans: int
+
+        """
+
+        self.enabled = True                                        # Chronométrage actif
+        self.spans = collections.deque(maxlen=max_spans or MAX_SPANS) # Dernières périodes terminées
+        self.stats = {}                                            # Agrégats par nom de période : [nombre, total (ns), maximum (ns), histogramme]
+        self.counters = collections.Counter()                      # Compteurs
+        self.lock = threading.Lock()                               # Verrou pour les agrégats
+        self.local = threading.local()                             # Pile des périodes en cours de chaque thread
+        self.next_id = 0                                           # Identifiant de la prochaine période
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """! Chronométrage d'une période
+
+        @param name: Nom de la période (ex : "decrypt")
+        @type name: String
+
+        @param attributes: Informations associées à la période (ex : image=...)
+        @type attributes: Dictionnaire
+
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        # Période englobante dans le même thread
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        with self.lock:
+            span_id = self.next_id
+            self.next_id += 1
+
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.perf_counter_ns()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            stack.pop()
+            self.record(name, duration, {"id": span_id, "parent": parent, "name": name, "start_ns": start, "duration_ns": duration,
+                                         "thread": threading.current_thread().name, "attributes": attributes})
+
+    def record(self, name, duration, span=None):
+        """! Enregistrement d'une durée
+
+        @param name: Nom de la période
+        @type name: String
+
+        @param duration: Durée (en nanosecondes)
+        @type duration: int
+
+        @param span: Détail de la période pour l'export JSON
+        @type span: Dictionnaire
+
+        """
+
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = [0, 0, 0, [0] * (len(BUCKETS) + 1)]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+            # Premier intervalle de l'histogramme contenant la durée (le dernier contient les durées supérieures à toutes les bornes)
+            seconds = duration / 1e9
+            bucket = 0
+            while bucket < len(BUCKETS) and seconds > BUCKETS[bucket]:
+                bucket += 1
+            stats[3][bucket] += 1
+
+            if span is not None:
+                self.spans.append(span)
+
+    def count(self, name, value=1):
+        """! Incrémentation d'un compteur
+
+        @param name: Nom du compteur (ex : "templates_evaluated")
+        @type name: String
+
+        @param value: Valeur à ajouter
+        @type value: int
+
+        """
+
+        if self.enabled:
+            with self.lock:
+                self.counters[name] += value
+
+    def reset(self):
+        """! Remise à zéro des mesures"""
+
+        with self.lock:
+            self.spans.clear()
+            self.stats = {}
+            self.counters = collections.Counter()
+
+    def snapshot(self):
+        """! Mesures au format JSON
+
+        @return: Agrégats par période (durées en secondes), compteurs et dernières périodes
+        @rtype: Dictionnaire
+
+        """
+
+        with self.lock:
+            return {
+                "stats": {name: {"count": count, "total": total / 1e9, "mean": total / count / 1e9, "max": maximum / 1e9}
+                          for name, (count, total, maximum, _) in self.stats.items()},
+                "counters": dict(self.counters),
+                "spans": list(self.spans),
+            }
+
+    def prometheus(self):
+        """! Mesures au format texte de Prometheus
+
+        @return: Histogrammes des durées (fingerprint_span_seconds) et compteurs (fingerprint_<nom>_total)
+        @rtype: String
+
+        """
+
+        lines = ["# HELP fingerprint_span_seconds Durée des étapes de la reconnaissance.", "# TYPE fingerprint_span_seconds histogram"]
+
+        with self.lock:
+            for name, (count, total, _, buckets) in sorted(self.stats.items()):
+                cumulated = 0
+                for bound, value in zip(BUCKETS + [float("inf")], buckets):
+                    cumulated += value
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'fingerprint_span_seconds_bucket{{span="{name}",le="{le}"}} {cumulated}')
+                lines.append(f'fingerprint_span_seconds_sum{{span="{name}"}} {total / 1e9}')
+                lines.append(f'fingerprint_span_seconds_count{{span="{name}"}} {count}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE fingerprint_{name}_total counter")
+                lines.append(f"fingerprint_{name}_total {value}")
+
+        return "\n".join(lines) + "\n"
+
+def export(path, tracer=None):
+    """! Export des mesures dans un fichier
+
+    Fonction pour écrire les mesures au format texte de Prometheus (extension .prom) ou au format JSON (autres extensions).
+
+    @param path: Fichier à écrire
+    @type path: String
+
+    @param tracer: Chronométrage à exporter (TRACER par défaut)
+    @type tracer: Tracer
+
+    """
+
+    tracer = tracer or TRACER
+
+    # Écriture dans un fichier temporaire puis remplacement (lecture possible à tout moment par un collecteur)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        if path.endswith(".prom"):
+            f.write(tracer.prometheus())
+        else:
+            json.dump(tracer.snapshot(), f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+# Initialisation de variables
+MAX_SPANS = 10000   # Nombre de périodes conservées pour l'export JSON
+BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0] # Bornes des histogrammes (en secondes)
+TRACER = Tracer()   # Chronométrage du processus
+
+# Raccourcis vers le chronométrage du processus
+span = TRACER.span
+count = TRACER.count
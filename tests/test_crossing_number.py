@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file test_crossing_number.py
+#
+# @brief Vérification de la version vectorisée du crossing number (project.crossing_number) par rapport à la version de référence pixel par pixel (project.crossing_number_reference).
+#
+# EXPLICATION :
+#   -- Les squelettes sont calculés à partir de quelques images de DB_original, pour plusieurs méthodes de binarisation et de squelettisation.
+#   -- Les deux versions doivent renvoyer les mêmes minuties et dessiner les mêmes rectangles sur l'image (ce qui vérifie aussi le recalcul du crossing number autour des rectangles).
+#   -- Lancement depuis la racine du projet : python -m pytest tests
+#
+# @section Libraries/Modules
+# - pytest extern library (https://docs.pytest.org/)
+# - numpy extern library (https://numpy.org/)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - sys standard library (https://docs.python.org/3/library/sys.html)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import os, sys
+import numpy as np
+import pytest
+
+# Les modules du projet sont dans src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import project
+
+@pytest.mark.parametrize("image", ["101_1.tif", "102_3.tif", "103_4.tif"])
+@pytest.mark.parametrize("binarization", ["Méthode d'Otsu", "Gaussienne adaptative"])
+@pytest.mark.parametrize("skeletonization", ["Filtre Laplacien", "Filtre Sobel", "zhang_suen"])
+def test_crossing_number_matches_reference(image, binarization, skeletonization):
+    """! Comparaison des deux versions du crossing number sur un squelette de DB_original"""
+
+    skeleton = project.skeletonize_image(project.binarize_image(os.path.join(DB_ORIGINAL, image), binarization), skeletonization)
+    vectorized_image, reference_image = skeleton.copy(), skeleton.copy()
+
+    assert project.crossing_number(vectorized_image) == project.crossing_number_reference(reference_image)
+    assert np.array_equal(vectorized_image, reference_image)
+
+# Initialisation de variables
+DB_ORIGINAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "DB_original") # Images non cryptées de la BDD
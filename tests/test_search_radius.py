@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""! @brief Programme Python de reconnaissance d'empreintes digitales."""
+##
+# @file test_search_radius.py
+#
+# @brief Vérification de la recherche des minuties dans une fenêtre (search_radius) et avec une partie des méthodes de correspondance (match_methods).
+#
+# EXPLICATION :
+#   -- La recherche sur toute l'image avec les cinq méthodes (plus de 40 s par empreinte) n'est pas relancée : ses résultats sur la BDD d'exemple sont donnés avec chaque empreinte.
+#   -- La recherche dans une fenêtre ou avec une partie des méthodes doit reconnaître la même personne que la recherche sur toute l'image.
+#   -- La reconnaissance est effectuée sur une copie de la BDD d'exemple (DB et key.txt) dans un dossier temporaire : le cache des squelettes n'est pas écrit dans src/.
+#   -- Lancement depuis la racine du projet : python -m pytest tests
+#
+# @section Libraries/Modules
+# - pytest extern library (https://docs.pytest.org/)
+# - os standard library (https://docs.python.org/3/library/os.html?highlight=os#module-os)
+# - sys standard library (https://docs.python.org/3/library/sys.html)
+# - shutil standard library (https://docs.python.org/3/library/shutil.html?highlight=shutil#module-shutil)
+#
+# @section Auteurs
+# - GANZHORN Octave
+# - GOUTH Thomas
+# - PAULY Alexandre
+# - SABADIE Laura
+##
+
+import os, sys, shutil
+import pytest
+
+# Les modules du projet sont dans src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import project
+
+@pytest.fixture(scope="module")
+def sample_db(tmp_path_factory):
+    """! Copie de la BDD d'exemple dans un dossier temporaire (dossier courant pendant les tests)"""
+
+    folder = tmp_path_factory.mktemp("sample_db")
+    shutil.copytree(os.path.join(SRC, "DB"), folder / "DB", ignore=shutil.ignore_patterns("minutiae"))
+    shutil.copy(os.path.join(SRC, "key.txt"), folder / "key.txt")
+
+    cwd = os.getcwd()
+    os.chdir(folder)
+    yield folder
+    os.chdir(cwd)
+
+@pytest.mark.parametrize("image, persons", [("101_1.tif", ["Id1"]), ("102_3.tif", ["Id11"]), ("103_2.tif", ["Id18"])])
+@pytest.mark.parametrize("options", [
+    {"search_radius": 10},
+    {"search_radius": 30},
+    {"search_radius": 10, "match_methods": ["cv2.TM_CCOEFF_NORMED", "cv2.TM_SQDIFF"]},
+    {"search_radius": 10, "match_methods": ["cv2.TM_SQDIFF_NORMED"]},
+])
+def test_windowed_search_matches_full_search(sample_db, image, persons, options):
+    """! Même personne reconnue que la recherche sur toute l'image"""
+
+    result = project.recognize(os.path.join(SRC, "DB_original", image), "Méthode d'Otsu", "Filtre Laplacien", 12, **options)
+
+    assert result.persons() == persons
+
+def test_unknown_match_method(sample_db):
+    """! Méthode de correspondance inconnue refusée"""
+
+    with pytest.raises(ValueError):
+        project.fingerprint_recognition(project.skeletonize_image(project.binarize_image(os.path.join(SRC, "DB_original", "101_1.tif"), "Méthode d'Otsu"), "Filtre Laplacien"),
+                                        "Méthode d'Otsu", "Filtre Laplacien", 12, 10, ["cv2.TM_INCONNUE"])
+
+# Initialisation de variables
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src") # Dossier des modules, de la BDD d'exemple et des images non cryptées